@@ -0,0 +1,336 @@
+#####################################################################################
+####    wjnaAccuracy.py  Astrometry Engine Accuracy Harness
+####    Version 1, October 18, 2026
+####        Compares the sun, moon and phase times of each engine path with the bundled
+####        reference ephemeris wjnaReference.json and reports the error of every event
+####        and the throughput of every path
+####        Checks the altitude solver where the sun grazes a twilight threshold
+####        Checks that the session events and the darkness calendar agree
+####    William Neubert
+#####################################################################################
+
+__version__ = "1.00"
+__author__ = "William Neubert"
+
+# IMPORT MODULES
+import argparse
+import copy
+import datetime
+import json
+import sys
+import time
+import numpy as np
+import wjnaAstrometry0200 as wa
+
+#  DEFINE GLOBAL CONSTANTS
+WA_ACCURACY_REFERENCE = "wjnaReference.json"
+WA_ACCURACY_MATCH_MINUTES = 90.0 # AN ENGINE EVENT FURTHER THAN THIS FROM EVERY REFERENCE EVENT IS EXTRA, AND THE REVERSE IS MISSED
+
+# ACCEPTED 95TH PERCENTILE OF THE ABSOLUTE ERROR IN MINUTES OF EACH EVENT, THE SAME FOR EVERY PATH.  THE PROGRAMS SHOW
+# TIMES TO THE MINUTE, SO SUN AND TWILIGHT EVENTS MAY BE OFF BY ONE.  MOON EVENTS AND PHASES COME FROM A SHORTENED LUNAR
+# THEORY AND MAY BE OFF BY TWO.
+WA_ACCURACY_TOLERANCE_MINUTES = {"Sunrise": 1.0, "Sunset": 1.0, "Civil dawn": 1.0, "Civil dusk": 1.0,
+    "Nautical dawn": 1.0, "Nautical dusk": 1.0, "Dawn": 1.0, "Dusk": 1.0, "Moonrise": 2.0, "Moonset": 2.0,
+    "New": 2.0, "First Quarter": 2.0, "Full": 2.0, "Last Quarter": 2.0}
+WA_ACCURACY_MISSED_FRACTION = 0.01 # SHARE OF THE REFERENCE EVENTS A PATH MAY MISS
+
+# KNOWN BAD PATHS, REPORTED AS EXPECTED FAILURES AND NOT COUNTED IN THE RESULT.  THE HOUR ANGLE METHOD OF THE SCALAR AND
+# BATCHED PATHS DRIFTS NEAR THE POLAR DAY AND NIGHT, THE SCALAR PATH ALSO LOSES WHOLE DATES AT HIGH LATITUDE, AND THE PHASE
+# SERIES KEEPS ONLY THE LARGEST TERMS OF MEEUS CHAPTER 49.
+WA_ACCURACY_EXPECTED_FAILURES = {"Scalar": ["Sunrise", "Sunset", "Dawn", "Dusk"], "Batched": ["Sunrise", "Sunset", "Dawn", "Dusk"],
+                                 "Phases Scalar": wa.WA_MOON_PHASE_NAMES, "Phases Catalog": wa.WA_MOON_PHASE_NAMES}
+
+# LATITUDES WHERE THE SUN GRAZES NAUTICAL TWILIGHT AT MIDNIGHT NEAR THE JUNE SOLSTICE, SO ON SOME NIGHTS THE DUSK AND DAWN
+# CROSSINGS ARE MINUTES APART AND FALL BETWEEN TWO SAMPLES OF THE SOLVER GRID.  THEY ARE CHECKED AGAINST A FINE GRID.
+WA_ACCURACY_GRAZING_LATITUDES = [54.82, 54.88]
+WA_ACCURACY_GRAZING_START = datetime.datetime(2026,6,1,12) # UTC
+WA_ACCURACY_GRAZING_DAYS = 40
+WA_ACCURACY_GRAZING_STEP_SECONDS = 10
+WA_ACCURACY_GRAZING_TOLERANCE_MINUTES = 0.1 # THE FINE GRID IS EXACT TO A FEW SECONDS, SO THE SOLVER MUST FIND EVERY CROSSING CLOSELY
+
+# THE SESSION EVENTS AND THE DARKNESS CALENDAR ARE COMPARED OVER THIS SPAN AT THE CONFIGURED SITES, THESE HIGH LATITUDE
+# SITES, AND A DAYLIGHT SAVINGS TIME COPY OF EVERY SITE
+WA_ACCURACY_AGREEMENT_START = datetime.date(2025,1,1)
+WA_ACCURACY_AGREEMENT_DAYS = 365
+WA_ACCURACY_AGREEMENT_SECONDS = 86400 * wa.WA_ALTITUDE_TOLERANCE_DAYS # THE CALENDAR SPAN MOVES THE SOLVER GRID, SO TIMES AGREE TO ITS TOLERANCE
+WA_ACCURACY_AGREEMENT_HIGH_LATITUDE_SITES = [
+    {"name": "NO-Tromso", "lat": 69.6496, "lon": 18.9560, "alt": 10, "timezone": "CET", "UTCOffset": 1},
+    {"name": "AK-Fairbanks", "lat": 64.8378, "lon": -147.7164, "alt": 136, "timezone": "AKST", "UTCOffset": -9}
+    ]
+
+# THRESHOLD NAMES OF waAltitudeCrossings FOR THE REFERENCE SUN EVENTS
+WA_ACCURACY_SUN_EVENTS = {"Horizon": ("Sunrise", "Sunset"), "Civil": ("Civil dawn", "Civil dusk"),
+                          "Nautical": ("Nautical dawn", "Nautical dusk"), "Astronomical": ("Dawn", "Dusk")}
+
+#
+#  FUNCTIONS
+#
+def wjnaLoadReference(filenameIn: str = WA_ACCURACY_REFERENCE):
+    """Loads the reference ephemeris.  Each site becomes a waObserverLocation without daylight savings time."""
+    with open(filenameIn, "rt") as referencefile:
+        reference = json.load(referencefile)
+    for entry in reference["Sites"]:
+        entry["Location"] = wa.waObserverLocation(entry["name"], wa.waEarthPosition(entry["lat"], entry["lon"], entry["alt"]),
+                                                  entry["timezone"], entry["UTCOffset"], False)
+    return reference
+
+def wjnaUTCSeconds(localTimesIn, siteIn: wa.waObserverLocation):
+    """UTC seconds since 1970 of local datetime64 values at a site.  NaT and the 1900-01-01 placeholder for
+    a missing moon event are dropped."""
+    times = np.asarray(localTimesIn, dtype="datetime64[us]")
+    times = times[~np.isnat(times) & (times > np.datetime64("1901-01-01"))]
+    return (times - np.datetime64("1970-01-01T00:00:00","us")) / np.timedelta64(1000000,"us") - 3600 * wa.waUTCOffsetHours(siteIn)
+
+def wjnaSiteDates(entryIn: dict):
+    """Local dates of the nights of a reference site, from the first noon through the day before the last."""
+    first = datetime.datetime(1970,1,1) + datetime.timedelta(seconds=entryIn["Start"] + 3600 * entryIn["UTCOffset"])
+    last = datetime.datetime(1970,1,1) + datetime.timedelta(seconds=entryIn["End"] + 3600 * entryIn["UTCOffset"])
+    return [first.date() + datetime.timedelta(days=d) for d in range((last.date() - first.date()).days + 1)]
+
+#
+#  ENGINE PATHS.  EACH RETURNS A DICTIONARY BY REFERENCE EVENT NAME OF UTC SECONDS.
+#
+def wjnaEventsScalar(entryIn: dict):
+    """waSun and waMoon objects of a session at noon of every date, as the graphical program builds them.
+    A date whose calculation fails contributes no events."""
+    site = entryIn["Location"]
+    events = {name: [] for name in ("Sunrise", "Sunset", "Dawn", "Dusk", "Moonrise", "Moonset")}
+    for date in wjnaSiteDates(entryIn):
+        sessionTime = wa.waSessionTime(datetime.datetime.combine(date, datetime.time(12,0,0)), site)
+        for body, names in ((wa.waSun, {"Rise": "Sunrise", "Set": "Sunset", "Dawn": "Dawn", "Dusk": "Dusk"}),
+                            (wa.waMoon, {"Rise": "Moonrise", "Set": "Moonset"})):
+            try:
+                bodyEvents = body(body.__name__, sessionTime).Events
+            except (ValueError, ZeroDivisionError):
+                continue
+            for event, name in names.items():
+                if isinstance(bodyEvents[event], datetime.datetime):
+                    events[name].append(np.datetime64(bodyEvents[event], "us"))
+    return {name: wjnaUTCSeconds(times, site) for name, times in events.items()}
+
+def wjnaEventsBatched(entryIn: dict):
+    """waSunEventsBatch and waMoonEventsBatch over every date at once, as the outlook and calendar use them."""
+    site = entryIn["Location"]
+    dates = np.array(wjnaSiteDates(entryIn), dtype="datetime64[D]")
+    sun = wa.waSunEventsBatch(dates, site)
+    moon = wa.waMoonEventsBatch(dates, site)
+    return {"Sunrise": wjnaUTCSeconds(sun["Rise"], site), "Sunset": wjnaUTCSeconds(sun["Set"], site),
+            "Dawn": wjnaUTCSeconds(sun["Dawn"], site), "Dusk": wjnaUTCSeconds(sun["Dusk"], site),
+            "Moonrise": wjnaUTCSeconds(moon["Rise"], site), "Moonset": wjnaUTCSeconds(moon["Set"], site)}
+
+def wjnaEventsSolver(entryIn: dict):
+    """Altitude crossings of waAltitudeCrossings over the whole span, as the darkness windows use them."""
+    site = entryIn["Location"]
+    startJD = entryIn["Start"] / 86400 + 2440587.5; endJD = entryIn["End"] / 86400 + 2440587.5
+    events = {}
+    sun = wa.waAltitudeCrossings(lambda jd: wa.waAltitudes("Sun", jd, site), startJD, endJD)
+    for threshold, (riseName, setName) in WA_ACCURACY_SUN_EVENTS.items():
+        events[riseName] = (sun[threshold]["Rise"] - 2440587.5) * 86400
+        events[setName] = (sun[threshold]["Set"] - 2440587.5) * 86400
+    moon = wa.waAltitudeCrossings(lambda jd: wa.waAltitudes("Moon", jd, site), startJD, endJD, {"Horizon": wa.WA_ALTITUDE_THRESHOLDS["Horizon"]})
+    events["Moonrise"] = (moon["Horizon"]["Rise"] - 2440587.5) * 86400
+    events["Moonset"] = (moon["Horizon"]["Set"] - 2440587.5) * 86400
+    return events
+
+def wjnaGrazingCheck():
+    """Nautical twilight crossings of waAltitudeCrossings at WA_ACCURACY_GRAZING_LATITUDES against the sign changes of
+    the sun altitude on a grid of WA_ACCURACY_GRAZING_STEP_SECONDS.  Returns the summaries of the dawn and dusk crossings."""
+    threshold = wa.WA_ALTITUDE_THRESHOLDS["Nautical"]
+    startJD = wa.waJulianDate(WA_ACCURACY_GRAZING_START); endJD = startJD + WA_ACCURACY_GRAZING_DAYS
+    start = (startJD - 2440587.5) * 86400; end = (endJD - 2440587.5) * 86400
+    results = {"Nautical dawn": [], "Nautical dusk": []}
+    for latitude in WA_ACCURACY_GRAZING_LATITUDES:
+        site = wa.waObserverLocation("Grazing", wa.waEarthPosition(latitude, 0, 0), "UTC", 0, False)
+        altitude = lambda jd: wa.waAltitudes("Sun", jd, site)
+        crossings = wa.waAltitudeCrossings(altitude, startJD, endJD, {"Nautical": threshold})["Nautical"]
+        seconds = np.arange(start, end, WA_ACCURACY_GRAZING_STEP_SECONDS)
+        f = altitude(seconds / 86400 + 2440587.5) - threshold
+        i = np.flatnonzero(np.signbit(f[:-1]) != np.signbit(f[1:]))
+        reference = seconds[i] + WA_ACCURACY_GRAZING_STEP_SECONDS * f[i] / (f[i] - f[i + 1]) # LINEAR BETWEEN THE SAMPLES
+        rising = f[i] < 0
+        results["Nautical dawn"].append(wjnaEventErrors((crossings["Rise"] - 2440587.5) * 86400, reference[rising], start, end))
+        results["Nautical dusk"].append(wjnaEventErrors((crossings["Set"] - 2440587.5) * 86400, reference[~rising], start, end))
+    return [wjnaSummarize("Grazing", name, results[name], WA_ACCURACY_GRAZING_TOLERANCE_MINUTES, 0.0) for name in results]
+
+def wjnaAgreementSites():
+    """Configured sites from wjnaLocations.json and WA_ACCURACY_AGREEMENT_HIGH_LATITUDE_SITES, each with and without
+    daylight savings time."""
+    Configuration, LocationList = wa.wjnaLoadSettings()
+    sites = list(LocationList)
+    for site in WA_ACCURACY_AGREEMENT_HIGH_LATITUDE_SITES:
+        sites.append(wa.waObserverLocation(site["name"], wa.waEarthPosition(site["lat"], site["lon"], site["alt"]),
+                                           site["timezone"], site["UTCOffset"], False))
+    variants = []
+    for site in sites:
+        for DST in (False, True):
+            variant = copy.copy(site)
+            variant.DST = DST
+            variants.append(variant)
+    return variants
+
+def wjnaEventsAgree(eventsIn: dict, nightIn: dict):
+    """True if every session event is within WA_ACCURACY_AGREEMENT_SECONDS of the calendar night, or both are None."""
+    for name, value in eventsIn.items():
+        other = nightIn[name]
+        if value is None or other is None:
+            if value is not other:
+                return False
+        elif abs((value - other).total_seconds() if name != "Duration" else 3600 * (value - other)) > WA_ACCURACY_AGREEMENT_SECONDS:
+            return False
+    return True
+
+def wjnaAgreementCheck(startDateIn: datetime.date = WA_ACCURACY_AGREEMENT_START, daysIn: int = WA_ACCURACY_AGREEMENT_DAYS):
+    """Compares waSession.Events of every night with the same night of waDarknessNights at wjnaAgreementSites
+    by wjnaEventsAgree.
+    Returns one dictionary per site of the Site, DST, Nights, the Differing nights, the Errors raised and the First
+    differing or failing date."""
+    endDate = startDateIn + datetime.timedelta(days=daysIn - 1)
+    results = []
+    for site in wjnaAgreementSites():
+        result = {"Site": site.name, "DST": site.DST, "Nights": 0, "Differing": 0, "Errors": 0, "First": None}
+        for night in wa.waDarknessNights(startDateIn, endDate, site):
+            result["Nights"] += 1
+            try:
+                events = wa.waSession(datetime.datetime.combine(night["Date"], datetime.time(12,0,0)), site).Events
+                agree = wjnaEventsAgree(events, night)
+            except Exception:
+                result["Errors"] += 1; agree = True
+                result["First"] = result["First"] or night["Date"]
+            if not agree:
+                result["Differing"] += 1
+                result["First"] = result["First"] or night["Date"]
+        results.append(result)
+    return results
+
+def wjnaPhasesScalar(startIn: float, endIn: float):
+    """waMoon.GetPhases every week of the span, at a site on UTC so the times are UTC."""
+    site = wa.waObserverLocation("UTC", wa.waEarthPosition(0,0,0), "UTC", 0, False)
+    phases = {name: set() for name in wa.WA_MOON_PHASE_NAMES}
+    date = datetime.datetime(1970,1,1) + datetime.timedelta(seconds=startIn)
+    while date < datetime.datetime(1970,1,1) + datetime.timedelta(seconds=endIn):
+        sessionTime = wa.waSessionTime(date, site)
+        for name, phaseTime in wa.waMoon("Moon", sessionTime).GetPhases(sessionTime):
+            if name in phases:
+                phases[name].add(np.datetime64(phaseTime, "us"))
+        date += datetime.timedelta(days=7)
+    return {name: np.sort(wjnaUTCSeconds(list(times), site)) for name, times in phases.items()}
+
+def wjnaPhasesCatalog(startIn: float, endIn: float):
+    """Phase times of a waMoonPhaseCatalog covering the span."""
+    first = datetime.datetime(1970,1,1) + datetime.timedelta(seconds=startIn)
+    last = datetime.datetime(1970,1,1) + datetime.timedelta(seconds=endIn)
+    catalog = wa.waMoonPhaseCatalog(first.year, last.year)
+    seconds = (catalog.Time - np.datetime64("1970-01-01T00:00:00","us")) / np.timedelta64(1000000,"us")
+    return {name: seconds[catalog.Phase == n] for n, name in enumerate(wa.WA_MOON_PHASE_NAMES)}
+
+WA_ACCURACY_EVENT_PATHS = {"Scalar": wjnaEventsScalar, "Batched": wjnaEventsBatched, "Solver": wjnaEventsSolver}
+WA_ACCURACY_PHASE_PATHS = {"Scalar": wjnaPhasesScalar, "Catalog": wjnaPhasesCatalog}
+
+#
+#  COMPARISON
+#
+def wjnaEventErrors(engineIn, referenceIn, startIn: float, endIn: float):
+    """Errors in minutes of engine event times against reference times, both UTC seconds, within a span.
+    Each reference event is matched with the nearest engine event.  Returns the errors of matched events and the
+    counts of Missed reference events and Extra engine events with no partner within WA_ACCURACY_MATCH_MINUTES."""
+    reference = np.sort(np.asarray(referenceIn, dtype=float))
+    reference = reference[(reference >= startIn) & (reference < endIn)]
+    engine = np.sort(np.asarray(engineIn, dtype=float))
+    engine = engine[(engine >= startIn) & (engine < endIn)]
+    if len(engine) == 0:
+        return {"Errors": np.array([]), "Missed": len(reference), "Extra": 0}
+    i = np.clip(np.searchsorted(engine, reference), 1, len(engine) - 1) if len(engine) > 1 else np.zeros(len(reference), dtype=int)
+    nearest = np.where(np.abs(engine[i - 1] - reference) < np.abs(engine[i] - reference), engine[i - 1], engine[i]) if len(engine) > 1 else engine[i]
+    errors = (nearest - reference) / 60
+    matched = np.abs(errors) <= WA_ACCURACY_MATCH_MINUTES
+    unmatched = np.ones(len(engine), dtype=bool)
+    unmatched[np.searchsorted(engine, nearest[matched])] = False
+    return {"Errors": errors[matched], "Missed": int(np.count_nonzero(~matched)), "Extra": int(np.count_nonzero(unmatched))}
+
+def wjnaSummarize(pathIn: str, nameIn: str, resultsIn: list, limitIn: float = None, missedFractionIn: float = WA_ACCURACY_MISSED_FRACTION):
+    """Error distribution of one event of one path over all sites, with Passed if the 95th percentile of the absolute
+    error is within limitIn, by default the WA_ACCURACY_TOLERANCE_MINUTES of the event, and no more than missedFractionIn
+    of the reference is missed.  Expected is True for the known bad paths of WA_ACCURACY_EXPECTED_FAILURES."""
+    errors = np.concatenate([result["Errors"] for result in resultsIn])
+    missed = sum(result["Missed"] for result in resultsIn); extra = sum(result["Extra"] for result in resultsIn)
+    absolute = np.abs(errors)
+    summary = {"Path": pathIn, "Event": nameIn, "Count": len(errors), "Missed": missed, "Extra": extra,
+               "Mean": float(np.mean(errors)) if len(errors) else np.nan,
+               "Median": float(np.median(absolute)) if len(errors) else np.nan,
+               "P95": float(np.percentile(absolute, 95)) if len(errors) else np.nan,
+               "Max": float(np.max(absolute)) if len(errors) else np.nan}
+    summary["Limit"] = limitIn if limitIn is not None else WA_ACCURACY_TOLERANCE_MINUTES[nameIn]
+    summary["Passed"] = bool(len(errors) > 0 and summary["P95"] <= summary["Limit"] and
+                             missed <= missedFractionIn * (len(errors) + missed))
+    summary["Expected"] = nameIn in WA_ACCURACY_EXPECTED_FAILURES.get(pathIn, [])
+    return summary
+
+def wjnaRunHarness(referenceIn: dict, eventPathsIn: list, phasePathsIn: list):
+    """Runs the selected paths against the reference.  Returns the summaries and the time and event count of each path."""
+    summaries = []; throughput = []
+    for path in eventPathsIn:
+        start = time.perf_counter()
+        engines = [WA_ACCURACY_EVENT_PATHS[path](entry) for entry in referenceIn["Sites"]]
+        seconds = time.perf_counter() - start
+        names = [name for name in engines[0] if name in referenceIn["Thresholds"]]
+        for name in names:
+            summaries.append(wjnaSummarize(path, name, [wjnaEventErrors(engine[name], entry["Events"][name], entry["Start"], entry["End"])
+                                                        for engine, entry in zip(engines, referenceIn["Sites"])]))
+        throughput.append({"Path": path, "Seconds": seconds, "Events": sum(len(engine[name]) for engine in engines for name in names)})
+    if "Solver" in eventPathsIn:
+        summaries.extend(wjnaGrazingCheck())
+    if phasePathsIn:
+        phases = referenceIn["Phases"]
+        start = min(min(times) for times in phases.values()); end = max(max(times) for times in phases.values()) + 1
+        for path in phasePathsIn:
+            began = time.perf_counter()
+            engine = WA_ACCURACY_PHASE_PATHS[path](start, end)
+            seconds = time.perf_counter() - began
+            for name in wa.WA_MOON_PHASE_NAMES:
+                summaries.append(wjnaSummarize("Phases " + path, name, [wjnaEventErrors(engine[name], phases[name], start, end)]))
+            throughput.append({"Path": "Phases " + path, "Seconds": seconds, "Events": sum(len(times) for times in engine.values())})
+    return summaries, throughput
+
+def wjnaAccuracyParser():
+    parser = argparse.ArgumentParser(description="Accuracy and speed of the astrometry engine against a reference ephemeris.")
+    parser.add_argument("--reference", default=WA_ACCURACY_REFERENCE, help="reference file (default {})".format(WA_ACCURACY_REFERENCE))
+    parser.add_argument("--paths", default=",".join(WA_ACCURACY_EVENT_PATHS), help="comma separated event paths (default all)")
+    parser.add_argument("--phases", default=",".join(WA_ACCURACY_PHASE_PATHS), help="comma separated phase paths (default all)")
+    parser.add_argument("--agreement-days", type=int, default=WA_ACCURACY_AGREEMENT_DAYS,
+                        help="nights of the session and calendar agreement check, 0 to skip (default {})".format(WA_ACCURACY_AGREEMENT_DAYS))
+    parser.add_argument("--table", default=None, help="use this precomputed ephemeris table for the Sun and Moon positions")
+    return parser
+
+def main(argv=None):
+    args = wjnaAccuracyParser().parse_args(argv)
+    reference = wjnaLoadReference(args.reference)
+    wa.waUseEphemerisTable(args.table)
+    summaries, throughput = wjnaRunHarness(reference, [path for path in args.paths.split(",") if path],
+                                           [path for path in args.phases.split(",") if path])
+
+    print(reference["Source"])
+    print("{:<15} {:<14} {:>6} {:>6} {:>6} {:>8} {:>8} {:>8} {:>8} {:>6}  {}".format(
+        "Path", "Event", "Count", "Missed", "Extra", "Mean", "Median", "P95", "Max", "Limit", "Result"))
+    for summary in summaries:
+        print("{:<15} {:<14} {:>6} {:>6} {:>6} {:>8.2f} {:>8.2f} {:>8.2f} {:>8.2f} {:>6.1f}  {}".format(
+            summary["Path"], summary["Event"], summary["Count"], summary["Missed"], summary["Extra"], summary["Mean"],
+            summary["Median"], summary["P95"], summary["Max"], summary["Limit"],
+            ("xpass" if summary["Passed"] else "xfail") if summary["Expected"] else ("pass" if summary["Passed"] else "FAIL")))
+    print("Errors are engine minus reference in minutes;  Median, P95 and Max are of the absolute error and Limit applies to P95.")
+    print("xfail and xpass mark the known bad paths, which do not count in the result.")
+    print()
+    for path in throughput:
+        print("{:<15} {:>8.3f} s  {:>8.0f} events/s".format(path["Path"], path["Seconds"], path["Events"] / max(path["Seconds"], 1e-9)))
+    agreement = wjnaAgreementCheck(WA_ACCURACY_AGREEMENT_START, args.agreement_days) if args.agreement_days > 0 else []
+    if agreement:
+        print()
+        print("Session events against the darkness calendar from {}".format(WA_ACCURACY_AGREEMENT_START.isoformat()))
+        print("{:<28} {:>4} {:>6} {:>9} {:>6}  {}".format("Site", "DST", "Nights", "Differing", "Errors", "First"))
+        for result in agreement:
+            print("{:<28} {:>4} {:>6} {:>9} {:>6}  {}".format(result["Site"], "yes" if result["DST"] else "no", result["Nights"],
+                result["Differing"], result["Errors"], "--" if result["First"] is None else result["First"].isoformat()))
+    agreed = all(result["Differing"] == 0 and result["Errors"] == 0 for result in agreement)
+    return 0 if agreed and all(summary["Passed"] or summary["Expected"] for summary in summaries) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
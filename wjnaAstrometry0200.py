@@ -9,18 +9,62 @@
 ####    William Neubert
 #####################################################################################
 
-__version__ = "2.08"
+__version__ = "2.12"
 __author__ = "William Neubert"
 
 # IMPORT MODULES
+import collections
+import copy
+import csv
 import datetime
+import functools
+import itertools
 import math
 import numpy as np
 import json
+import os
+import weakref
+import wjnaConstellations0100 as wc
 
 #  DEFINE GLOBAL CONSTANTS
 DEBUGMODE = False
 WA_UNITS_AU_TO_KM = 1.4959787e8 # ASTRONOMICAL UNIT TO KILOMETERS
+WA_UNITS_EARTH_RADIUS_TO_KM = 6378.14 # EQUATORIAL RADIUS OF THE EARTH IN KILOMETERS
+
+# CONSTELLATIONS ALONG THE ECLIPTIC:  STARTING ECLIPTIC LONGITUDE IN DEGREES, NAME AND ABBREVIATION
+WA_ECLIPTIC_CONSTELLATIONS_START = np.array([0, 29.05, 53.775, 90.447, 118.25, 138.3484, 174.1,
+    218.129, 241.208, 248.205, 266.65, 302.1996, 327.8, 351.99, 389.05])
+WA_ECLIPTIC_CONSTELLATIONS_NAME = np.array(["Pisces", "Aries", "Taurus", "Gemini", "Cancer", "Leo", "Virgo",
+    "Libra", "Scorpio", "Ophiuchus", "Sagittarius", "Capricornus", "Aquarius", "Pisces", "Pisces"])
+WA_ECLIPTIC_CONSTELLATIONS_ABBREVIATION = np.array(["PSC", "ARI", "TAU", "GEM", "CNC", "LEO", "VIR",
+    "LIB", "SCO", "OPH", "SAG", "CAP", "AQR", "PSC", "PSC"])
+
+# LUNAR SERIES USED BY waMoon.GetPosition3 AND waMoonPositionKernel
+# FUNDAMENTAL ARGUMENTS IN REVOLUTIONS:  CONSTANT, RATE PER DAY AND RATE PER DAY SQUARED
+WA_MOON_ARGUMENTS = np.array([
+    [0.60643457694, 0.036601101318, -9.130334E-18], # L:  MOON'S MEAN LONGITUDE, EQUATION 47.1
+    [0.37489832333, 0.036291647084, 5.0558658602E-17], # M:  MOON'S MEAN ANOMALY
+    [0.25908915278, 0.036748195112, 2.113349E-17], # F:  MOON'S ARGUMENT OF LATITUDE, EQUATION 47.5
+    [0.82736164472, 0.033863191984, -1.0884565358E-17], # D:  MEAN ELONGATION OF THE MOON, EQUATION 47.2
+    [0.34734596639, -0.000147093793, 1.200373E-17], # n:  MEAN ASCENDING NODE LONGITUDE, EQUATION 47.7
+    [0.99313641444, 0.002737778560, -8.8839430312E-19]]) # G:  SUN'S MEAN ANOMALY, EQUATION 47.3
+# PERIODIC TERMS:  COEFFICIENT FOLLOWED BY THE MULTIPLES OF L, M, F, D, n AND G IN THE ARGUMENT
+WA_MOON_V_TERMS = np.array([ # SINE TERMS
+    [0.39558, 0, 0, 1, 0, 1, 0], [0.082, 0, 0, 1, 0, 0, 0], [0.03257, 0, 1, -1, 0, -1, 0],
+    [0.01092, 0, 1, 1, 0, 1, 0], [0.00666, 0, 1, -1, 0, 0, 0], [-0.00644, 0, 1, 1, -2, 1, 0],
+    [-0.00331, 0, 0, 1, -2, 1, 0], [-0.00304, 0, 0, 1, -2, 0, 0], [-0.0024, 0, 1, -1, -2, -1, 0],
+    [0.00226, 0, 1, 1, 0, 0, 0], [-0.00108, 0, 1, 1, -2, 0, 0], [-0.00079, 0, 0, 1, 0, -1, 0],
+    [0.00078, 0, 0, 1, 2, 1, 0]])
+WA_MOON_U_TERMS = np.array([ # COSINE TERMS
+    [-0.10828, 0, 1, 0, 0, 0, 0], [-0.0188, 0, 1, 0, -2, 0, 0], [-0.01479, 0, 0, 0, 2, 0, 0],
+    [0.00181, 0, 2, 0, -2, 0, 0], [-0.00147, 0, 2, 0, 0, 0, 0], [-0.00105, 0, 0, 0, 2, 0, -1],
+    [-0.00075, 0, 1, 0, -2, 0, 1]])
+WA_MOON_W_TERMS = np.array([ # SINE TERMS
+    [0.10478, 0, 1, 0, 0, 0, 0], [-0.04105, 0, 0, 2, 0, 2, 0], [-0.0213, 0, 1, 0, -2, 0, 0],
+    [-0.01779, 0, 0, 2, 0, 1, 0], [0.01774, 0, 0, 0, 0, 1, 0], [0.00987, 0, 0, 0, 2, 0, 0],
+    [-0.00338, 0, 1, -2, 0, -2, 0], [-0.00309, 0, 0, 0, 0, 0, 1], [-0.0019, 0, 0, 2, 0, 0, 0],
+    [-0.00144, 0, 1, 0, 0, 1, 0], [-0.00144, 0, 1, -2, 0, -1, 0], [-0.00113, 0, 1, 2, 0, 2, 0],
+    [-0.00094, 0, 1, 0, -2, 0, 1], [-0.00092, 0, 2, 0, -2, 0, 0]])
 
 
 #
@@ -46,7 +90,13 @@ def waJulianDate(utcIn: datetime.datetime):
     b = 2 - a + math.floor(a/4)
     JD = math.floor(365.25*(y+4716)) + math.floor(30.6001*(m+1)) + d + b - 1524.5;
     return JD;
-    
+
+def waGreenwichSiderealTime(jdIn: float):
+    """SIDERIAL TIME AT GREENWICH IN HOURS FOR A JULIAN DATE.  SEE JEAN MEEUS CHAPTER 12."""
+    jCent = (jdIn - 2451545.0)/36525
+    SiderealTime = ((280.46061837+360.98564736629*(jdIn - 2451545)+0.000387933*math.pow(jCent,2)-math.pow(jCent,3)/38710000)) % 360; # VALUE IN DEGREES
+    return 24*SiderealTime / 360; # VALUE IN HOURS
+
 def waDtoDMS(angleIn):
     # RECEIVE ANGLE IN DIGITAL DEGREES AND RETURN IN DMS FORMAT AS A STRING
     angleInAbs = math.fabs(angleIn)
@@ -129,6 +179,12 @@ def waTimeDeltaToDHMS(timeDeltaIn: float, formatIn: str):
 
     return offsetString
 
+def waFormatTime(timeIn: datetime.datetime, formatIn: str = "%H:%M"):
+    """Formats an event time, or dashes if the event does not occur."""
+    if timeIn is None:
+        return "--"
+    return timeIn.strftime(formatIn)
+
     
 def waMeridianEclipticalConstellation(right_ascention_in: float):
     """This function returns the constellation given the right ascention in hours.  It does not correct for declination, so is only valid at the meridian.
@@ -139,18 +195,8 @@ def waMeridianEclipticalConstellation(right_ascention_in: float):
     try:
         el = waDegrees( math.atan2( math.sin(ra_rad) * math.cos(epsilon0_rad) + math.sin(ra_rad)*math.tan(epsilon0_rad)*math.sin(epsilon0_rad), math.cos(ra_rad)))
         if el < 0: el += 360
-        cons = np.array([[0,"Pisces","PSC"],
-            [29.05,"Aries","ARI"],[53.775,"Taurus","TAU"],[90.447,"Gemini","GEM"],
-            [118.25,"Cancer","CNC"],[138.3484,"Leo","LEO"],[174.1,"Virgo","VIR"],
-            [218.129,"Libra","LIB"],[241.208,"Scorpio","SCO"],[248.205,"Ophiuchus","OPH"],
-            [266.65,"Sagittarius","SAG"],[302.1996,"Capricornus","CAP"],[327.8,"Aquarius","AQR"],
-            [351.99,"Pisces","PSC"],[389.05,"Pisces","PSC"]
-            ])
-        for i in range(0,15):
-            if float(cons[i][0]) > el:
-                i -= 1
-                returnvalue = cons[i,1:3]
-                break
+        i = np.searchsorted(WA_ECLIPTIC_CONSTELLATIONS_START, el, side="right") - 1
+        returnvalue = np.array([WA_ECLIPTIC_CONSTELLATIONS_NAME[i], WA_ECLIPTIC_CONSTELLATIONS_ABBREVIATION[i]])
     except:
         returnvalue=["---","---"]
 
@@ -183,56 +229,48 @@ class waObserverLocation:
         return f"{self.name} {self.EarthPosition} {self.timeZoneName}({self.UTCOffset})"
 
 class waSessionTime():
-    """Observing session time"""
+    """Observing session time.  The Julian date, Julian century and sidereal times are computed once per instant."""
     def __init__(self,dateIn: datetime.datetime,locationIn: waObserverLocation):
         self.date = dateIn
-        self.location = locationIn
-        if locationIn.DST:
-            self.UTCOffset = locationIn.UTCOffset + 1
-        else:
-            self.UTCOffset = locationIn.UTCOffset
+        # A COPY, SO A SESSION TIME SHARED THROUGH waBodyCache KEEPS THE SITE AND DST IT WAS BUILT WITH EVEN IF
+        # THE CALLER CHANGES ITS SITE AFTERWARDS
+        self.location = copy.copy(locationIn)
+        self.DST = bool(locationIn.DST)
+        self.UTCOffset = waUTCOffsetHours(locationIn)
         self.utc = self.date - datetime.timedelta(hours=self.UTCOffset)
-        self.JCentury = self.JCentury()
-        
+        self.JulianDate = waJulianDate(self.utc)
+        self.JCentury = float((self.JulianDate - 2451545.0)/36525)
+        self.GST = waGreenwichSiderealTime(self.JulianDate)
+        self.LST = (self.GST + 24*self.location.EarthPosition.longitude/360) % 24 # WEST LON AS NEGATIVE.  VALUE IN HOURS.
+
     def JD(self):
-        """CALCULATE THE JULIAN DATE.  FROM JEAN MEEUS ASTRONOMICAL ALGORITHMS SECOND ADDITION CHAPTER 7."""
-        d = self.utc.day + (self.utc.hour + self.utc.minute/60 + self.utc.second/3600)/24
-        m = self.utc.month
-        y = self.utc.year
-        if m < 3:
-            m = m + 12
-            y = y - 1
-        a = math.floor(y/100)
-        b = 2 - a + math.floor(a/4)
-        JD = math.floor(365.25*(y+4716)) + math.floor(30.6001*(m+1)) + d + b - 1524.5;
-        # self.JD = wjnaJulianDate(self.utc)
-        return JD
-    def JCentury(self):
-        JCentury = float((self.JD() - 2451545.0)/36525)
-        return JCentury
+        """JULIAN DATE.  FROM JEAN MEEUS ASTRONOMICAL ALGORITHMS SECOND ADDITION CHAPTER 7."""
+        return self.JulianDate
     def SiderealTime(self):
         """SIDERIAL TIME AT GREENWICH IN HOURS."""
-        jCent = (self.JD() - 2451545.0)/36525
-        #jCent = self.JCentury()
-        SiderealTime = ((280.46061837+360.98564736629*(self.JD() - 2451545)+0.000387933*math.pow(jCent,2)-math.pow(jCent,3)/38710000)) % 360; # VALUE IN DEGREES
-        SiderealTime = 24*SiderealTime / 360; # VALUE IN HOURS
-        return SiderealTime
+        return self.GST
     def LocalSiderealTime(self):
         """LOCAL SIDERIAL TIME AT CURRENT LOCATION IN HOURS"""
-        LocalSiderealTime =  (self.SiderealTime() + 24*self.location.EarthPosition.longitude/360) % 24; # WEST LON AS NEGATIVE.  VALUE IN HOURS.
-        return LocalSiderealTime
+        return self.LST
 
 class waSkyPosition:
     """Position of an object in the sky.  RA and Dec are in degrees.  Distance is in Km."""
     def __init__(self,raIn,decIn, distanceIn: float):
         self.ra = raIn # DEGREES
         self.dec = decIn # DEGREES
-        self.EclipticLongitude = self.GetEclipticLongitude()
-        self.EclipticConstellation = self.GetEclipticConstellation(self.EclipticLongitude)
         self.distance = distanceIn # GEOCENTRIC DISTANCE IN KM
     
     def __str__(self) -> str:
         return f"RA degrees: {self.ra}, DEC degrees: {self.dec}"
+
+    # ECLIPTIC LONGITUDE AND CONSTELLATION ARE COMPUTED ON FIRST ACCESS
+    @functools.cached_property
+    def EclipticLongitude(self):
+        return self.GetEclipticLongitude()
+
+    @functools.cached_property
+    def EclipticConstellation(self):
+        return self.GetEclipticConstellation(self.EclipticLongitude)
     
     def GetEclipticLongitude(self):
         epsilon0 = 23.43929111 # OBLIQUITY IN DEGREES OF EPOCH 2000.0 NOT ADJUSTED FOR PROCESSION
@@ -257,58 +295,116 @@ class waSkyPosition:
         return el
     
     def GetEclipticConstellation(self, EclipticLongIn: float):
-        cons = np.array([[0,"Pisces","PSC"],
-            [29.05,"Aries","ARI"],[53.775,"Taurus","TAU"],[90.447,"Gemini","GEM"],
-            [118.25,"Cancer","CNC"],[138.3484,"Leo","LEO"],[174.1,"Virgo","VIR"],
-            [218.129,"Libra","LIB"],[241.208,"Scorpio","SCO"],[248.205,"Ophiuchus","OPH"],
-            [266.65,"Sagittarius","SAG"],[302.1996,"Capricornus","CAP"],[327.8,"Aquarius","AQR"],
-            [351.99,"Pisces","PSC"],[389.05,"Pisces","PSC"]
-            ])
-        for i in range(0,15):
-            if float(cons[i][0]) > EclipticLongIn:
-                i -= 1
-                break
-        return cons[i,1:3]
+        i = np.searchsorted(WA_ECLIPTIC_CONSTELLATIONS_START, EclipticLongIn, side="right") - 1
+        return np.array([WA_ECLIPTIC_CONSTELLATIONS_NAME[i], WA_ECLIPTIC_CONSTELLATIONS_ABBREVIATION[i]])
     
 
+class waEphemerisCache():
+    """Least recently used cache of computed sky object state, keyed by site, time zone and instant."""
+    def __init__(self, maxsizeIn: int = 512):
+        self.maxsize = maxsizeIn
+        self.hits = 0
+        self.misses = 0
+        self.entries = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def Get(self, keyIn):
+        """Returns the cached value for the key, or None if it has not been computed."""
+        try:
+            value = self.entries[keyIn]
+        except KeyError:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(keyIn)
+        self.hits += 1
+        return value
+
+    def Put(self, keyIn, valueIn):
+        """Stores a value, evicting the least recently used entries beyond the maximum size."""
+        if self.maxsize <= 0:
+            return
+        self.entries[keyIn] = valueIn
+        self.entries.move_to_end(keyIn)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def Clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def Info(self):
+        return {"Hits": self.hits, "Misses": self.misses, "Size": len(self.entries), "Maxsize": self.maxsize}
+
+def waSiteKey(locationIn: waObserverLocation):
+    """Cache key of a site:  coordinates, UTC offset and DST."""
+    return (locationIn.EarthPosition.latitude, locationIn.EarthPosition.longitude,
+            locationIn.UTCOffset, bool(locationIn.DST))
+
+def waEphemerisKey(nameIn, sessionTimeIn: waSessionTime):
+    """Cache key of a body at a session time:  site coordinates, UTC offset, DST and the local instant."""
+    return (nameIn,) + waSiteKey(sessionTimeIn.location) + (sessionTimeIn.date,)
+
+# PER-PROCESS CACHE OF SUN AND MOON STATE SHARED BY waSun, waMoon AND waSession
+waBodyCache = waEphemerisCache()
+
 class waSkyObject:
+    """Object in the sky.  SkyPosition, SkyPositionTopocentric and Events are computed on first access,
+    so callers only pay for the attributes they use.  A sky position passed in is used as is."""
     def __init__(self,nameIn,skyPositionIn: waSkyPosition, sessionTimeIn: waSessionTime):
         self.name = nameIn
-        self.SkyPosition = skyPositionIn
+        if skyPositionIn is not None:
+            self.SkyPosition = skyPositionIn
         self.SessionTime = sessionTimeIn
-        # self.SkyPositionTopocentric = self.GetPositionTopocentric(self, self.skyPositionIn, self.sessionTimeIn)
-        self.SkyPositionTopocentric = waSkyPosition(0,0,0)
         self.LApparent = 0.0
-        self.Events = {"Rise": 0, "Transit": 0, "Set": 0, "Dawn": 0, "Dusk": 0}
 
     def __str__(self) -> str:
         print(f"{self.name}")
 
-    def GetPosition(self):
-        # FUNCTION TO BE OVERIDDEN.  BY DEFAULT IT ONLY RETURNS THE CURRENT POSITION
-        return waSkyPosition(self.SkyPosition.Ra,self.SkyPosition.dec)
+    @functools.cached_property
+    def SkyPosition(self):
+        return self.GetPosition(self.SessionTime)
+
+    @functools.cached_property
+    def SkyPositionTopocentric(self):
+        return self.GetPositionTopocentric(self.SkyPosition, self.SessionTime)
+
+    @functools.cached_property
+    def Events(self):
+        return self.GetEvents(self.SkyPosition)
+
+    def GetPosition(self, sessionTimeIn: waSessionTime):
+        # FUNCTION TO BE OVERIDDEN.  BY DEFAULT THE POSITION IS UNKNOWN
+        return waSkyPosition(0,0,0)
+
+    def GetAltitudes(self, jdIn):
+        """Altitudes in degrees at an array of Julian dates.  Overridden by bodies that move;  by default the
+        sky position is fixed."""
+        location = self.SessionTime.location
+        return waHorizontalCoordinates(self.SkyPosition.ra, self.SkyPosition.dec,
+            waLocalSiderealTimes(jdIn, location.EarthPosition.longitude), location.EarthPosition.latitude)[0]
+
+    def GetAltitudeEvents(self, thresholdsIn: dict = None, daysIn: int = 1):
+        """Rise and set times at each altitude threshold (default WA_ALTITUDE_THRESHOLDS) from local midnight
+        starting the session day through daysIn days.  Returns a dictionary by threshold name of dictionaries
+        with Rise and Set lists of local datetimes."""
+        location = self.SessionTime.location
+        day = self.SessionTime.date
+        startJD = waJulianDate(datetime.datetime(day.year, day.month, day.day) - datetime.timedelta(hours=waUTCOffsetHours(location)))
+        crossings = waAltitudeCrossings(self.GetAltitudes, startJD, startJD + daysIn, thresholdsIn)
+        return {name: {event: waLocalDatetimes(jd, location).astype(datetime.datetime).tolist() for event, jd in events.items()}
+                for name, events in crossings.items()}
     
     def GetPositionTopocentric(self, skyPositionIn: waSkyPosition, sessionTimeIn: waSessionTime):
-        """Topocentric positon in the sky corrected for parallax.  See Jean Meeus chapter 40."""
-        ra = waRadians(skyPositionIn.ra)
-        dec = waRadians(skyPositionIn.dec)
-        lat = waRadians(sessionTimeIn.location.EarthPosition.latitude)
-        # lon = sessionTimeIn.location.EarthPosition.longitude
-        lstHours = waSessionTime(sessionTimeIn.date + datetime.timedelta(hours=+12), sessionTimeIn.location).LocalSiderealTime()
-        # lst = 2.0 * math.pi * sessionTimeIn.LocalSiderealTime() / 24.0
-        lst = lstHours * 2 * math.pi / 24
-        hourAngle = lst - ra
-        distance = skyPositionIn.distance
-
-        parallax = sessionTimeIn.location.EarthPosition.radiusEquatorial / distance  # SINE OF THE PARALLAX
-        tanDeltaRA = -math.cos(lat)*parallax*math.sin(hourAngle) / (math.cos(dec)-math.cos(lat)*parallax*math.cos(hourAngle))
-        deltaRA = math.atan(tanDeltaRA)
-        decGeocentric = math.atan( (math.sin(dec) - math.sin(lat) * parallax) * math.cos(deltaRA) / \
-            (math.cos(dec) - math.cos(lat) * parallax * math.cos (hourAngle)) )
-        RAGeocentric = waDegrees(ra + deltaRA)
-        decGeocentric = waDegrees(decGeocentric)
-
-        return waSkyPosition(RAGeocentric, decGeocentric, distance)
+        """Topocentric positon in the sky corrected for parallax.  See waTopocentricPositions."""
+        location = sessionTimeIn.location
+        # SIDEREAL TIME TWELVE HOURS AFTER THE SESSION TIME, AS IN THE SCALAR FORMULAS THIS REPLACES
+        lstHours = waLocalSiderealTimes(sessionTimeIn.JulianDate + 0.5, location.EarthPosition.longitude)
+        ra, dec = waTopocentricPositions(skyPositionIn.ra, skyPositionIn.dec, skyPositionIn.distance, lstHours,
+            location.EarthPosition.latitude, location.EarthPosition.radiusEquatorial)
+        return waSkyPosition(float(ra), float(dec), skyPositionIn.distance)
 
     def GetEvents(self,skyPositionIn: waSkyPosition):
         # TODO:  MAKE PRECISE BY INTERPOLATING TIME FOR MOVING OBJECTS
@@ -349,21 +445,27 @@ class waSkyObject:
         # duskTime = time0.date + datetime.timedelta(days=m2)
         
         # return {"Rise": riseTime, "Transit": transitTime, "Set": setTime, "Dawn": dawnTime, "Dusk": duskTime}
-        pass
+        return {"Rise": 0, "Transit": 0, "Set": 0, "Dawn": 0, "Dusk": 0}
 
 class waSun(waSkyObject):
     def __init__(self, nameIn, sessionTimeIn: waSessionTime):
-        super().__init__(nameIn, waSkyPosition(0,0,0), sessionTimeIn)
+        cacheKey = waEphemerisKey("Sun", sessionTimeIn)
+        cachedState = waBodyCache.Get(cacheKey)
+        if cachedState is not None:
+            self.__dict__ = cachedState # SHARE THE STATE ALREADY COMPUTED FOR THIS SITE AND INSTANT
+            return
+        super().__init__(nameIn, None, sessionTimeIn)
         self.name = "Sun"
-        #self.SessionTime = sessionTimeIn
-        self.SkyPosition = self.GetPosition(self.SessionTime)
-        self.Events = self.GetEvents(self.SkyPosition)
-        self.SkyPositionTopocentric = self.GetPositionTopocentric(self.SkyPosition, self.SessionTime)
+        # POSITION, EVENTS AND TOPOCENTRIC POSITION ARE COMPUTED ON FIRST ACCESS AND SHARED THROUGH THE CACHE
+        waBodyCache.Put(cacheKey, self.__dict__)
 
     def GetPosition(self, sessionTimeIn: waSessionTime):
         # EQUATIONS FROM ASTRONOMICAL ALGORITHMS BY JEAN MEEUS, CHAPTER 25
         #waT = self.SessionTime.JCentury()
         waT = sessionTimeIn.JCentury
+        if waActiveEphemerisTable is not None and waActiveEphemerisTable.Covers(sessionTimeIn.JulianDate):
+            apparentRa, apparentDec, distance = waActiveEphemerisTable.SunPositions(sessionTimeIn.JulianDate)
+            return waSkyPosition(float(apparentRa),float(apparentDec),float(distance))
         # MEAN EQUINOX
         L0 = (280.46646 + 36000.76983 * waT + 0.0003032 * math.pow(waT,2)) % 360.0
         # MEAN ANOMALY
@@ -373,7 +475,7 @@ class waSun(waSkyObject):
         # SUN'S EQUATION OF CENTER
         C = (1.914602 - 0.004817 * waT - 0.000014 * math.pow(waT,2) )* math.sin(waRadians(M)) + \
             (0.019993 - 0.000101 * waT) * math.sin(2*waRadians(M)) + \
-            0.000289 * math.sin(3*waRadians(3*M))
+            0.000289 * math.sin(3*waRadians(M))
         LTrue = L0 + C
         TrueAnomaly = M + C
         # SUN'S RADIUS VECTOR
@@ -390,6 +492,9 @@ class waSun(waSkyObject):
         apparentDec = waDegrees( math.asin(math.sin( waRadians(epsilon) ) * math.sin( waRadians(LApparent) )))
 
         return waSkyPosition(apparentRa,apparentDec,R*WA_UNITS_AU_TO_KM)
+
+    def GetAltitudes(self, jdIn):
+        return waAltitudes("Sun", jdIn, self.SessionTime.location)
     
     def GetEvents(self,skyPositionIn: waSkyPosition):
         """Calculates the events of rise, transit and set."""
@@ -439,12 +544,35 @@ class waSun(waSkyObject):
 
 class waMoon(waSkyObject):
     def __init__(self, nameIn, sessionTimeIn: waSessionTime):
-        super().__init__(nameIn, waSkyPosition(0,0,0), sessionTimeIn)
+        cacheKey = waEphemerisKey("Moon", sessionTimeIn)
+        cachedState = waBodyCache.Get(cacheKey)
+        if cachedState is not None:
+            self.__dict__ = cachedState # SHARE THE STATE ALREADY COMPUTED FOR THIS SITE AND INSTANT
+            return
+        super().__init__(nameIn, None, sessionTimeIn)
         self.name = "Moon"
-        self.SkyPosition = self.GetPosition3(self.SessionTime)
-        self.IlluminatedFraction = round(self.GetIllumination(),4)
-        self.Phases = self.GetPhases(self.SessionTime)
-        self.SkyPositionTopocentric = self.GetPositionTopocentric(self.SkyPosition, self.SessionTime)
+        # POSITION, EVENTS, ILLUMINATION, PHASES AND TOPOCENTRIC POSITION ARE COMPUTED ON FIRST ACCESS AND SHARED THROUGH THE CACHE
+        waBodyCache.Put(cacheKey, self.__dict__)
+
+    @functools.cached_property
+    def SkyPosition(self):
+        return self.GetPosition3(self.SessionTime) # ALSO STORES THE RISE AND SET EVENTS
+
+    @functools.cached_property
+    def Events(self):
+        position = self.GetPosition3(self.SessionTime) # STORES THE RISE AND SET EVENTS
+        self.__dict__.setdefault("SkyPosition", position)
+        return self.__dict__["Events"]
+
+    @functools.cached_property
+    def IlluminatedFraction(self):
+        return round(self.GetIllumination(),4)
+
+    @functools.cached_property
+    def Phases(self):
+        catalog = waActiveMoonPhaseCatalog if waActiveMoonPhaseCatalog is not None else waUseMoonPhaseCatalog()
+        phases = catalog.PhasesNear(self.SessionTime)
+        return phases if phases is not None else self.GetPhases(self.SessionTime)
 
     """def GetPosition(self, sessionTimeIn: waSessionTime):
         # THIS PROGRAM COMPUTES THE TIMES OF MOONRISE AND MOON- SET ANYWHERE IN THE WORLD.
@@ -857,23 +985,18 @@ class waMoon(waSkyObject):
         # FROM SKY & TELESCOPE, JULY, 1989, PAGE 78.
         # UPGRATED BY W NEUBERT FOR IMPROVED ACCURACY USING JEAN MEEUSS'S ASTRONOMICAL ALGORITHMS, SECOND EDITION
         # RESTRUCTURED BY W NEUBERT TO CLARIFY VARIABLES, COMBINE STEPS AND USE ROUTINES FROM OTHER CLASSES 
+        # THE LUNAR SERIES AND HOURLY SCAN ARE EVALUATED BY waMoonPositionKernel AND waMoonRiseSetScan
 
         # CONSTANTS
-        P1 = math.pi; P2 = 2 * P1; R1 = P1 / 180
-        K1 = 15 * R1 * 1.00273790935 # WJN ADDED SIGNIFICANT DIGITS.  THIS CONVERTS TIME DURATIONS IN HOURS TO SIDERIAL TIME DURATIONS IN DEGREES
         strS = "Moonset "; strR = "Moonrise "
         strM1 = "NO MOONRISE"; strM2 = "NO MOONSET"
         strM3 = "MOON DOWN ALL DAY"; strM4 = "MOON UP ALL DAY"
 
         # INITIALIZE VARIABLES
-        # waLat = Latitude, waLon = Longitude (West is negative)
         # H = Time Zone (hours ahead of UTC)
         waLat = sessionTimeIn.location.EarthPosition.latitude # LATITUDE
-        waLon = sessionTimeIn.location.EarthPosition.longitude / 360 # LONGITUDE.  WEST IS NEGATIVE.
         H = -1 * sessionTimeIn.UTCOffset #TIME ZONE.  PROGRAM USES HOURS BEHIND UTC
 
-        waMoonPos = np.empty([4,4])
-        wHold = str("")
         # WJN - RISE AND SET TIME TO THESE DEFAULT VALUES FOR THE SITUATION WHERE THE MOON DOES NOT RISE OR SET
         riseTime = datetime.datetime(1900,1,1,0,0,0); setTime = datetime.datetime(1900,1,1,0,0,0)
         beginTime = waSessionTime(datetime.datetime(sessionTimeIn.date.year, sessionTimeIn.date.month, sessionTimeIn.date.day, 0, 0, 0), sessionTimeIn.location)
@@ -881,155 +1004,57 @@ class waMoon(waSkyObject):
 
         Z0 = H / 24
         t = round(sessionTimeIn.JD() - 2451545 - 0.5 + sessionTimeIn.UTCOffset/24, 2) # WJN
-        t2 = round(beginTime.JD() - 2451545 + beginTime.UTCOffset/24, 2) # WJN
 
         # LST AT 0H ZONE TIME
         # TODO:  CHECK THIS AS IT APPEARS TO BE LST AT LOCAL LOCATION IN THE ORIGINAL MOONUP.BAS CODE
         T0 = 2*math.pi*beginTime.LocalSiderealTime()/24 # WJN
         # LST AT CURRENT TIME ZONE
         t = t + Z0
-        
-        # POSITION LOOP
-        for i in range(1,4):
-            # FUNDAMENTAL ARGUMENTS
-            L = 0.60643457694 + 0.036601101318 * t - 9.130334E-18 * math.pow(t,2) # MOON'S MEAN LONGITUDE, EQUATION 47.1
-            M = 0.37489832333 + 0.036291647084 * t + 5.0558658602E-17 * math.pow(t,2) # MOON'S MEAN ANOMALY
-            F = 0.25908915278 + 0.036748195112 * t - -2.113349E-17 * math.pow(t,2) # MOON'S ARGUMENT OF LATITUDE, EQUATION 47.5
-            D = 0.82736164472 + 0.033863191984 * t - 1.0884565358E-17 * math.pow(t,2) # MEAN ELONGATION OF THE MOON, EQUATION 47.2
-            n = 0.34734596639 - 0.000147093793 * t + 1.200373E-17 * math.pow(t,2) # MEAN ASCENDING NODE LONGITUDE, EQUATION 47.7
-            G = 0.99313641444 + 0.002737778560 * t - 8.8839430312E-19 * math.pow(t,2) # SUN'S MEAN ANOMALY, EQUATION 47.3
-            L -= math.floor(L); M -= math.floor(M)
-            F -= math.floor(F); D -= math.floor(D)
-            n -= math.floor(n); G -= math.floor(G)
-            L *= P2; M *= P2; F *= P2
-            D *= P2; n *= P2; G *= P2
-            V = 0.39558 * math.sin(F + n) + \
-                0.082 * math.sin(F) + \
-                0.03257 * math.sin(M - F - n) + \
-                0.01092 * math.sin(M + F + n) + \
-                0.00666 * math.sin(M - F) - \
-                0.00644 * math.sin(M + F - 2 * D + n) - \
-                0.00331 * math.sin(F - 2 * D + n) - \
-                0.00304 * math.sin(F - 2 * D) - \
-                0.0024 * math.sin(M - F - 2 * D - n) + \
-                0.00226 * math.sin(M + F) - \
-                0.00108 * math.sin(M + F - 2 * D) - \
-                0.00079 * math.sin(F - n) + \
-                0.00078 * math.sin(F + 2 * D + n)
-            U = 1 - 0.10828 * math.cos(M) - \
-                0.0188 * math.cos(M - 2 * D) - \
-                0.01479 * math.cos(2 * D) + \
-                0.00181 * math.cos(2 * M - 2 * D) - \
-                0.00147 * math.cos(2 * M) - \
-                0.00105 * math.cos(2 * D - G) - \
-                0.00075 * math.cos(M - 2 * D + G)
-            W = 0.10478 * math.sin(M) - \
-                0.04105 * math.sin(2 * F + 2 * n) - \
-                0.0213 * math.sin(M - 2 * D) - \
-                0.01779 * math.sin(2 * F + n) + \
-                0.01774 * math.sin(n) + \
-                0.00987 * math.sin(2 * D) - \
-                0.00338 * math.sin(M - 2 * F - 2 * n) -\
-                0.00309 * math.sin(G) - \
-                0.0019 * math.sin(2 * F) - \
-                0.00144 * math.sin(M + n) - \
-                0.00144 * math.sin(M - 2 * F - n) - \
-                0.00113 * math.sin(M + 2 * F + 2 * n) - \
-                0.00094 * math.sin(M - 2 * D + G) - \
-                0.00092 * math.sin(2 * M - 2 * D)
-            #COMPUTE RA, DEC, DIST
-            #WJN - RA(Radians) IS STORED IN waRA, DEC(Radians) IS STORED IN D5 AND DISTANCE STORED IN waDec (EARTH RADII)
-            S = W / math.sqrt(U - V * V)
-            waRA = L + math.atan(S / math.sqrt(1 - S * S))
-            S = V / math.sqrt(U); D5 = math.atan(S / math.sqrt(1 - S * S))
-            waDec = 60.40974 * math.sqrt(U) # WJN:  DISTANCE IN EARTH RADII
-            waMoonPos[i, 1] = waRA; waMoonPos[i, 2] = D5; waMoonPos[i, 3] = waDec
-            waMoonPos[i, 0] = t # WJN:  STORE THE TIME FOR POTENTIAL FUTURE USE IN POSITION AT A SPECIFIC TIME 
-            #print("DEBUG",waDecimalToDHMS(24*waDegrees(waRA)/360,24,"HM"),waDecimalToDHMS(waDegrees(D5),360,"DM")) # DEBUG
-            t = t + 0.5
-        dReturnT = waMoonPos[3,0] # 'WJN MOON'S GEOCENTRIC POSITION AT MIDNIGHT END OF DAY
-        dReturnMoonRA = waDegrees(waMoonPos[3,1]) % 360; dReturnMoonDec = waDegrees(waMoonPos[3,2])
-        dReturnMoonDistance = waMoonPos[3,3]*sessionTimeIn.location.EarthPosition.radiusEquatorial
-
-        if waMoonPos[2, 1] <= waMoonPos[1, 1]:
-            waMoonPos[2, 1] = waMoonPos[2, 1] + P2
-        if waMoonPos[3, 1] <= waMoonPos[2, 1]:
-            waMoonPos[3, 1] = waMoonPos[3, 1] + P2
-        Z1 = R1 * (90.567 - 41.685 / waMoonPos[2, 3]) # SEE JEAN MEEUS CHAPTER 15 PAGE 102.  THIS ADDRESSES THE VARIATIONS OF SEMIDIAMETER AND PARALLAX.
-        S = math.sin(waLat * R1); C = math.cos(waLat * R1)
-        Z = math.cos(Z1); M8 = 0; W8 = 0
-        A0 = waMoonPos[1, 1]; D0 = waMoonPos[1, 2]
 
-        for C0 in range(0,24):  # WJN:  RANGE OBJECT MUST GO THROUGH ALL HOURS 0 - 23
-            P = (C0 + 1) / 24
-            F0 = waMoonPos[1, 1]; F1 = waMoonPos[2, 1]; F2 = waMoonPos[3, 1]
-            # 3-POINT INTERPOLATION FOR RA
-            a = F1 - F0; B = F2 - F1 - a
-            F = F0 + P * (2 * a + B * (2 * P - 1))
-            A2 = F
-            F0 = waMoonPos[1, 2]; F1 = waMoonPos[2, 2]; F2 = waMoonPos[3, 2]
-            # 3-POINT INTERPOLATION FOR DEC
-            a = F1 - F0; B = F2 - F1 - a
-            F = F0 + P * (2 * a + B * (2 * P - 1))
-            D2 = F
-            # TEST AN HOUR FOR AN EVENT
-            L0 = T0 + C0 * K1; L2 = L0 + K1 # L0 IS THE ANGLE AT START OF HOUR.  L2 IS THE ANGLE ONE HOUR LATER.
-            if A2 < A0: A2 = A2 + 2 * P1
-            H0 = L0 - A0; H2 = L2 - A2
-            H1 = (H2 + H0) / 2 # HOUR ANGLE
-            D1 = (D2 + D0) / 2 # DEC
-            if C0 <= 0:
-                V0 = S * math.sin(D0) + C * math.cos(D0) * math.cos(H0) - Z
-            V2 = S * math.sin(D2) + C * math.cos(D2) * math.cos(H2) - Z
-            if np.sign(V0) != np.sign(V2):
-                V1 = S * math.sin(D1) + C * math.cos(D1) * math.cos(H1) - Z
-                a = 2 * V2 - 4 * V1 + 2 * V0; B = 4 * V1 - 3 * V0 - V2
-                D = B * B - 4 * a * V0
-                
-                if D >= 0:
-                    D = math.sqrt(D)
-                    if (V0 < 0 and V2 > 0): waMoonRiseSet1 = waMoonRiseSet1 + " " + strR
-                    if (V0 < 0 and V2 > 0): M8 = 1 # WJN:  M8 IS 1 IF A MOONRISE OCCURS AND 0 IF NOT
-                    if (V0 > 0 and V2 < 0): waMoonRiseSet1 = waMoonRiseSet1 + " " + strS
-                    if (V0 > 0 and V2 < 0): W8 = 1 # WJN:  W8 IS 1 IF A MOONSET OCCURS AND 0 IF NOT
-                    E = (-B + D) / (2 * a)
-                    if (E > 1 or E < 0): E = (-B - D) / (2 * a)
-                    T3 = C0 + E + 1 / 120 # ROUND OFF
-                    H3 = math.floor(T3); M3 = math.floor((T3 - H3) * 60)
-                    #PUT THE EVENT DATE AND TIME IN THE RETURN VARIABLES (WJN)
-                    #wHold = str(sessionTimeIn.date.year) + "/" + str(sessionTimeIn.date.month) + "/" + str(sessionTimeIn.date.day) + " "
-                    wHold = sessionTimeIn.date.strftime("%Y/%m/%d")  + " "
-                    if (V0 < 0 and V2 > 0): 
-                        ReturnMoonRise = wHold + "{:02d}:{:02d}".format(H3,M3)
-                        waMoonRiseSet1 = waMoonRiseSet1 + " " + ReturnMoonRise
-                        riseTime = datetime.datetime(sessionTimeIn.date.year,sessionTimeIn.date.month,sessionTimeIn.date.day,H3,M3)
-                    elif (V0 > 0 and V2 < 0):
-                        ReturnMoonSet = wHold + "{:02d}:{:02d}".format(H3,M3)
-                        waMoonRiseSet1 = waMoonRiseSet1 + " " + ReturnMoonSet
-                        setTime = datetime.datetime(sessionTimeIn.date.year,sessionTimeIn.date.month,sessionTimeIn.date.day,H3,M3)
-                    else:
-                        pass
-                    H7 = H0 + E * (H2 - H0)
-                    N7 = -math.cos(D1) * math.sin(H7)
-                    D7 = C * math.sin(D1) - S * math.cos(D1) * math.cos(H7)
-                    A7 = math.atan(N7 / D7) / R1
-                    if D7 < 0: A7 = A7 + 180
-                    if A7 < 0: A7 = A7 + 360
-                    if A7 > 360: A7 = A7 - 360
-                    waMoonRiseSet1 = waMoonRiseSet1 + ",  AZ= {} deg".format(int(A7))
-            A0 = A2; D0 = D2; V0 = V2
+        # POSITION AT THE START, MIDDLE AND END OF THE DAY
+        waRA, waDec, waDistance = waMoonPositionKernel(t + 0.5 * np.arange(3)) # RADIANS AND EARTH RADII
+        # WJN MOON'S GEOCENTRIC POSITION AT MIDNIGHT END OF DAY
+        dReturnMoonRA = waDegrees(waRA[2]) % 360; dReturnMoonDec = waDegrees(waDec[2])
+        dReturnMoonDistance = waDistance[2]*sessionTimeIn.location.EarthPosition.radiusEquatorial
+
+        # TEST EACH HOUR FOR AN EVENT
+        scan = waMoonRiseSetScan(waRA, waDec, waDistance, T0, waLat)
+        dayStart = datetime.datetime(sessionTimeIn.date.year,sessionTimeIn.date.month,sessionTimeIn.date.day)
+        for C0 in np.flatnonzero(scan["Rise"] | scan["Set"]):
+            T3 = C0 + scan["E"][C0] + 1 / 120 # ROUND OFF
+            H3 = math.floor(T3); M3 = math.floor((T3 - H3) * 60)
+            # AN EVENT ROUNDED UP TO 24:00 IS REPORTED AT 00:00 OF THE NEXT DAY, AS waMoonEventsBatch DOES
+            eventTime = dayStart + datetime.timedelta(hours=H3, minutes=M3)
+            #PUT THE EVENT DATE AND TIME IN THE RETURN VARIABLES (WJN)
+            if scan["Rise"][C0]:
+                waMoonRiseSet1 = waMoonRiseSet1 + " " + strR
+                ReturnMoonRise = eventTime.strftime("%Y/%m/%d %H:%M")
+                waMoonRiseSet1 = waMoonRiseSet1 + " " + ReturnMoonRise
+                riseTime = eventTime
+            else:
+                waMoonRiseSet1 = waMoonRiseSet1 + " " + strS
+                ReturnMoonSet = eventTime.strftime("%Y/%m/%d %H:%M")
+                waMoonRiseSet1 = waMoonRiseSet1 + " " + ReturnMoonSet
+                setTime = eventTime
+            waMoonRiseSet1 = waMoonRiseSet1 + ",  AZ= {} deg".format(int(scan["Azimuth"][C0]))
         
         #   SPECIAL MESSAGE ROUTINE
-        if (M8 == 0) and (W8 == 0):
+        M8 = scan["Rise"].any() # WJN:  TRUE IF A MOONRISE OCCURS
+        W8 = scan["Set"].any() # WJN:  TRUE IF A MOONSET OCCURS
+        V2 = scan["V2"][-1]
+        if not M8 and not W8:
             if V2 < 0: waMoonRiseSet1 += " " + strM3
             if V2 > 0: waMoonRiseSet1 += " " + strM4
         else:
-            if M8 == 0: waMoonRiseSet1 += " " + strM1
-            if W8 == 0: waMoonRiseSet1 += " " + strM2
+            if not M8: waMoonRiseSet1 += " " + strM1
+            if not W8: waMoonRiseSet1 += " " + strM2
         waMoonRiseSet1 = waMoonRiseSet1.strip() # GET RID OF THE LEADING WHITE SPACE
         self.Events = {"Rise": riseTime, "Set": setTime, "Description": waMoonRiseSet1}
         return waSkyPosition(dReturnMoonRA,dReturnMoonDec, dReturnMoonDistance)
     
+    def GetAltitudes(self, jdIn):
+        return waAltitudes("Moon", jdIn, self.SessionTime.location)
+
     def GetIllumination(self):
         #  CHAPTER 48 OF ASTRONOMICAL ALGORITHMS, SECOND ADDTION BY JEAN MEEUS
         wTcent = float(self.SessionTime.JCentury)
@@ -1085,7 +1110,7 @@ class waMoon(waSkyObject):
             else:
                 print("Warning:  Could not detect phase for time correction.")
             phasedate += datetime.timedelta(days=correction)
-            phasedate += datetime.timedelta(hours=int(sessionTimeIn.UTCOffset+sessionTimeIn.location.DST*1))
+            phasedate += datetime.timedelta(hours=int(sessionTimeIn.UTCOffset+sessionTimeIn.DST*1))
             phases.append([k_to_phases[k-math.floor(k)],phasedate])
             k += 0.25
         return phases
@@ -1098,93 +1123,1261 @@ class waSession():
         self.SessionTime1 = waSessionTime(datetime.datetime(dateIn.year,dateIn.month,dateIn.day,12,0,0),siteLocationIn) # CURRENT DAY START OF SESSION
         self.SessionTime2 = waSessionTime(self.SessionTime1.date + datetime.timedelta(days=1),siteLocationIn) # NEXT DAY END OF SESSION
         #self.SessionTime2 = waSessionTime(datetime.datetime(dateIn.year,dateIn.month,dateIn.day + 1,12,0,0),siteLocationIn) # NEXT DAY END OF SESSION
-        self.Sun1 = waSun("Sun",self.SessionTime1)
-        self.Sun2 = waSun("Sun",self.SessionTime2)
-        self.Moon1 = waMoon("Moon",self.SessionTime1)
-        self.Moon2 = waMoon("Moon",self.SessionTime2)
-        self.Events = self.GetEvents()
+
+    # THE SUN, MOON AND EVENTS ARE COMPUTED ON FIRST ACCESS.  SUN AND MOON STATE COMES FROM waBodyCache,
+    # SO CONSECUTIVE SESSIONS SHARE THEIR COMMON DAY
+    @functools.cached_property
+    def Sun1(self):
+        return waSun("Sun",self.SessionTime1)
+
+    @functools.cached_property
+    def Sun2(self):
+        return waSun("Sun",self.SessionTime2)
+
+    @functools.cached_property
+    def Moon1(self):
+        return waMoon("Moon",self.SessionTime1)
+
+    @functools.cached_property
+    def Moon2(self):
+        return waMoon("Moon",self.SessionTime2)
+
+    @functools.cached_property
+    def Events(self):
+        return self.GetEvents()
+
+    @functools.cached_property
+    def AltitudeCurves(self):
+        """Sun and Moon altitude and azimuth every minute of the session night.  See waNightAltitudeCurves."""
+        return waNightAltitudeCurves(self)
+
+    @functools.cached_property
+    def DarknessWindows(self):
+        """Every window of darkness of the session night.  See waDarknessWindows."""
+        return waDarknessWindows(self.SessionTime1.date.date(), 1, self.Site)
+
+    @functools.cached_property
+    def Planets(self):
+        """Rise, transit, set and visibility of each planet through the session night.  See waPlanetVisibility."""
+        return waPlanetVisibility(self.SessionTime1.date.date(), 1, self.Site)
     
     def GetEvents(self):
-        """Returns the key darkness events of a session based on the sun and moon."""
-        # CALCULATE DURATION OF DARKNESS
-
-        # SUN EVENTS
-        Sun1 = waSun("Sun",self.SessionTime1) # SUN ON BEGINNING DAY
-        Sun2 = waSun("Sun",self.SessionTime2) # SUN ON END DAY
-        sun1Events = Sun1.Events
-        sun2Events = Sun2.Events
-        sunset1 = sun1Events["Set"]
-        dusk1 = sun1Events["Dusk"]
-        dawn2 = sun2Events["Dawn"]
-        sunrise2 = sun2Events["Rise"]
-
-        # MOON EVENTS
-        Moon1 = waMoon("Moon",self.SessionTime1)
-        Moon2 = waMoon("Moon",self.SessionTime2)
-        moon1Events = Moon1.Events
-        moon2Events = Moon2.Events
-        moonrise1 = moon1Events["Rise"]
-        moonset1 = moon1Events["Set"]
-        moonrise2 = moon2Events["Rise"]
-        moonset2 = moon2Events["Set"]
-        
-        darkness_start = 0; darkness_end = 0
-        
-        # DARKNESS BASED ON EVENT TIMES
-        if (moonrise1>dusk1):
-            darkness_start = dusk1
-            darkness_end = moonrise1
-            moonriseLatest = moonrise1
-            moonsetLatest = moonset2
-            if DEBUGMODE: print("Session events condition 1")
-        elif (moonset1>dusk1):
-            darkness_start = moonset1
-            darkness_end = min(dawn2,moonrise2)
-            moonriseLatest = moonrise2
-            moonsetLatest = moonset1
-            if DEBUGMODE: print("Session events condition 2")
-        elif (moonrise2<dawn2):
-            darkness_start = max(dusk1,moonset1)
-            darkness_end = moonrise2
-            moonriseLatest = moonrise2
-            moonsetLatest = moonset1
-            if DEBUGMODE: print("Session events condition 3")
-        elif (moonset2<dawn2):
-            darkness_start = moonset2
-            darkness_end = min(dawn2,moonrise2)
-            moonriseLatest = moonrise2
-            moonsetLatest = moonset2
-            if DEBUGMODE: print("Session events condition 4")
-        elif moonrise1 < dusk1 and moonset2 > dawn2:
-            if moonrise1 > moonset1:
-                darkness_start = dusk1
-                darkness_end = dusk1
-                moonriseLatest = moonrise1
-                moonsetLatest = moonset2
-                if DEBUGMODE: print("Session events condition 5")
-            else:
-                darkness_start = dusk1
-                darkness_end = dawn2
-                moonriseLatest = moonrise1
-                moonsetLatest = moonset2
-                if DEBUGMODE: print("Session events condition 6")
+        """Returns the key darkness events of a session based on the sun and moon:  Sunset, Dusk, Dawn, Sunrise,
+        Moonrise, Moonset, Darkness from, Darkness to (datetime, or None if the event does not occur) and Duration
+        (hours).  They are the night of the session in waDarknessCalendar, so the session and the outlook agree."""
+        # THE LOCATION OF THE SESSION TIME IS A COPY, SO THE EVENTS KEEP THE SITE AND DST THE SESSION WAS BUILT WITH
+        calendar = waDarknessCalendar(self.SessionTime1.date.date(), 1, self.SessionTime1.location)
+        night = waCalendarNight(calendar, 0)
+        return {name: night[name] for name in ["Sunset", "Dusk", "Dawn", "Sunrise", "Moonrise", "Moonset",
+                                               "Darkness from", "Darkness to", "Duration"]}
+
+#
+#  BATCH (VECTORIZED) FUNCTIONS
+#
+def waUTCOffsetHours(locationIn: waObserverLocation):
+    """Returns the offset of local time from UTC in hours, including daylight savings time."""
+    if locationIn.DST:
+        return locationIn.UTCOffset + 1
+    return locationIn.UTCOffset
+
+def waJulianDates(datetimesIn):
+    """Returns an array of Julian dates for an array of UTC datetime64 values."""
+    datetimes = np.asarray(datetimesIn, dtype="datetime64[us]")
+    days = (datetimes - np.datetime64("1970-01-01T00:00:00","us")) / np.timedelta64(86400000000,"us")
+    return days + 2440587.5 # JULIAN DATE OF THE UNIX EPOCH
+
+def waBatchJulianDates(timesIn, siteIn: waObserverLocation = None):
+    """Returns Julian dates for an array of Julian dates or datetime64 values.
+    Datetime64 values are local times at the site, as for waSessionTime, or UTC if no site is given."""
+    times = np.asarray(timesIn)
+    if np.issubdtype(times.dtype, np.datetime64):
+        times = times.astype("datetime64[us]")
+        if siteIn is not None:
+            times = times - np.timedelta64(int(round(3600000000 * waUTCOffsetHours(siteIn))),"us")
+        return waJulianDates(times)
+    return times.astype(float)
+
+def waEclipticLongitudes(raIn, decIn):
+    """Vectorized form of waSkyPosition.GetEclipticLongitude.  RA and Dec are in degrees."""
+    epsilon0 = waRadians(23.43929111) # OBLIQUITY IN DEGREES OF EPOCH 2000.0 NOT ADJUSTED FOR PROCESSION
+    ra = np.radians(raIn)
+    el = np.degrees(np.arctan2(np.sin(ra) * math.cos(epsilon0) + np.tan(np.radians(decIn)) * math.sin(epsilon0), np.cos(ra)))
+    return np.where(el < 0, el + 360, el)
+
+def waSunPositionBatch(timesIn, siteIn: waObserverLocation = None, useTableIn: bool = True):
+    """Apparent geocentric position of the sun for an array of instants in one vectorized pass.
+    Same equations as waSun.GetPosition (Jean Meeus chapter 25).  Returns a dictionary of arrays:
+    JD, ra and dec in degrees, distance in km and EclipticLongitude in degrees.
+    Positions come from the active ephemeris table when it covers every instant, unless useTableIn is False."""
+    jd = waBatchJulianDates(timesIn, siteIn)
+    if useTableIn and waActiveEphemerisTable is not None and waActiveEphemerisTable.Covers(jd):
+        apparentRa, apparentDec, distance = waActiveEphemerisTable.SunPositions(jd)
+        return {"JD": jd, "ra": apparentRa, "dec": apparentDec, "distance": distance,
+                "EclipticLongitude": waEclipticLongitudes(apparentRa, apparentDec)}
+    waT = (jd - 2451545.0)/36525
+    waT2 = waT * waT
+    # MEAN EQUINOX
+    L0 = (280.46646 + 36000.76983 * waT + 0.0003032 * waT2) % 360.0
+    # MEAN ANOMALY
+    M = (357.52911 + 35999.05029 * waT - 0.0001537 * waT2) % 360.0
+    Mrad = np.radians(M)
+    # ECCENTRICTY
+    e = 0.016780634 - 0.000042037 * waT - 0.0000001267 * waT2
+    # SUN'S EQUATION OF CENTER
+    C = (1.914602 - 0.004817 * waT - 0.000014 * waT2) * np.sin(Mrad) + \
+        (0.019993 - 0.000101 * waT) * np.sin(2*Mrad) + \
+        0.000289 * np.sin(3*Mrad)
+    LTrue = L0 + C
+    TrueAnomaly = M + C
+    # SUN'S RADIUS VECTOR
+    R = 1.000001018*(1-e*e)/(1 + e*np.cos(np.radians(TrueAnomaly)))
+    # APPARENT LONGITUDE
+    Omega = np.radians(125.04 - 1934.136 * waT)
+    LApparent = np.radians(LTrue - 0.00569 - 0.00478 * np.sin(Omega))
+    # ADJUSTED OBLIQUITY OF THE ECLIPTIC BUT NOT PARALLAX.  RA AND DEC ARE GEOCENTRIC.
+    epsilon0 = 23.43929111 + ( -46.8150 * waT -0.00059 * waT2 + 0.001813 * waT2 * waT)/3600.0
+    epsilon = np.radians(epsilon0 + .00256 * np.cos(Omega))
+    apparentRa = np.degrees(np.arctan2(np.cos(epsilon) * np.sin(LApparent), np.cos(LApparent)))
+    apparentDec = np.degrees(np.arcsin(np.sin(epsilon) * np.sin(LApparent)))
+
+    return {"JD": jd, "ra": apparentRa, "dec": apparentDec, "distance": R*WA_UNITS_AU_TO_KM,
+            "EclipticLongitude": waEclipticLongitudes(apparentRa, apparentDec)}
+
+def waMoonPositionKernel(tIn, useTableIn: bool = True):
+    """Geocentric position of the moon for an array of times t in days from J2000.0.
+    Evaluates the lunar series of waMoon.GetPosition3 for all instants at once, or interpolates the
+    active ephemeris table when it covers every instant, unless useTableIn is False.
+    Returns the arrays RA (radians), Dec (radians) and distance (Earth radii)."""
+    t = np.asarray(tIn, dtype=float)
+    if useTableIn and waActiveEphemerisTable is not None and waActiveEphemerisTable.Covers(t + 2451545.0):
+        ra, dec, distance = waActiveEphemerisTable.MoonPositions(t + 2451545.0)
+        return np.radians(ra), np.radians(dec), distance / WA_UNITS_EARTH_RADIUS_TO_KM
+    # FUNDAMENTAL ARGUMENTS L, M, F, D, n, G IN REVOLUTIONS, REDUCED TO ONE REVOLUTION AND CONVERTED TO RADIANS
+    args = WA_MOON_ARGUMENTS[:,0] + np.multiply.outer(t, WA_MOON_ARGUMENTS[:,1]) + np.multiply.outer(t * t, WA_MOON_ARGUMENTS[:,2])
+    args = (args - np.floor(args)) * 2 * math.pi
+    L = args[..., 0]
+    V = np.sin(args @ WA_MOON_V_TERMS[:,1:].T) @ WA_MOON_V_TERMS[:,0]
+    U = 1 + np.cos(args @ WA_MOON_U_TERMS[:,1:].T) @ WA_MOON_U_TERMS[:,0]
+    W = np.sin(args @ WA_MOON_W_TERMS[:,1:].T) @ WA_MOON_W_TERMS[:,0]
+    # COMPUTE RA, DEC, DIST
+    S = W / np.sqrt(U - V * V)
+    ra = L + np.arctan(S / np.sqrt(1 - S * S))
+    S = V / np.sqrt(U)
+    dec = np.arctan(S / np.sqrt(1 - S * S))
+    distance = 60.40974 * np.sqrt(U) # DISTANCE IN EARTH RADII
+    return ra, dec, distance
+
+def waMoonRiseSetScan(raIn, decIn, distanceIn, lst0In, latitudeIn: float):
+    """Hourly moonrise and moonset scan of waMoon.GetPosition3, vectorized over the hours of the day and over days.
+    raIn, decIn and distanceIn hold the kernel positions at the start, middle and end of each day in their last axis.
+    lst0In is the local sidereal time at the start of each day in radians.
+    Returns a dictionary of arrays with one entry per hour:  V2 (altitude function at the end of the hour),
+    E (fraction of the hour at the event), Azimuth in degrees, and the Rise and Set masks."""
+    P1 = math.pi; R1 = P1 / 180
+    K1 = 15 * R1 * 1.00273790935 # CONVERTS TIME DURATIONS IN HOURS TO SIDERIAL TIME DURATIONS IN RADIANS
+    ra = np.array(raIn, dtype=float); dec = np.asarray(decIn, dtype=float)
+    # UNWRAP THE RIGHT ASCENSION SO IT INCREASES THROUGH THE DAY
+    ra[...,1] = np.where(ra[...,1] <= ra[...,0], ra[...,1] + 2 * P1, ra[...,1])
+    ra[...,2] = np.where(ra[...,2] <= ra[...,1], ra[...,2] + 2 * P1, ra[...,2])
+    Z1 = R1 * (90.567 - 41.685 / np.asarray(distanceIn)[...,1]) # SEE JEAN MEEUS CHAPTER 15 PAGE 102.  THIS ADDRESSES THE VARIATIONS OF SEMIDIAMETER AND PARALLAX.
+    Z = np.cos(Z1)[...,np.newaxis]
+    S = math.sin(latitudeIn * R1); C = math.cos(latitudeIn * R1)
+
+    C0 = np.arange(24)
+    P = (C0 + 1) / 24
+    # 3-POINT INTERPOLATION FOR RA AND DEC AT THE END OF EACH HOUR
+    a = ra[...,1:2] - ra[...,0:1]; B = ra[...,2:3] - ra[...,1:2] - a
+    A2 = ra[...,0:1] + P * (2 * a + B * (2 * P - 1))
+    a = dec[...,1:2] - dec[...,0:1]; B = dec[...,2:3] - dec[...,1:2] - a
+    D2 = dec[...,0:1] + P * (2 * a + B * (2 * P - 1))
+    # VALUES AT THE START OF EACH HOUR ARE THOSE AT THE END OF THE PREVIOUS HOUR
+    A0 = np.concatenate((ra[...,0:1], A2[...,:-1]), axis=-1)
+    A2 = np.where(A2 < A0, A2 + 2 * P1, A2)
+    A0 = np.concatenate((ra[...,0:1], A2[...,:-1]), axis=-1)
+    D0 = np.concatenate((dec[...,0:1], D2[...,:-1]), axis=-1)
+    L0 = np.asarray(lst0In)[...,np.newaxis] + C0 * K1; L2 = L0 + K1 # L0 IS THE ANGLE AT START OF HOUR.  L2 IS THE ANGLE ONE HOUR LATER.
+    H0 = L0 - A0; H2 = L2 - A2
+    H1 = (H2 + H0) / 2 # HOUR ANGLE
+    D1 = (D2 + D0) / 2 # DEC
+    V0 = S * np.sin(D0) + C * np.cos(D0) * np.cos(H0) - Z
+    V2 = S * np.sin(D2) + C * np.cos(D2) * np.cos(H2) - Z
+    V1 = S * np.sin(D1) + C * np.cos(D1) * np.cos(H1) - Z
+    a = 2 * V2 - 4 * V1 + 2 * V0; B = 4 * V1 - 3 * V0 - V2
+    D = B * B - 4 * a * V0
+    event = (np.sign(V0) != np.sign(V2)) & (D >= 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        D = np.sqrt(np.where(event, D, 0))
+        E = (-B + D) / (2 * a)
+        E = np.where((E > 1) | (E < 0), (-B - D) / (2 * a), E)
+        # AZIMUTH AT THE EVENT
+        H7 = H0 + E * (H2 - H0)
+        N7 = -np.cos(D1) * np.sin(H7)
+        D7 = C * np.sin(D1) - S * np.cos(D1) * np.cos(H7)
+        A7 = np.arctan(N7 / D7) / R1
+    A7 = np.where(D7 < 0, A7 + 180, A7)
+    A7 = np.where(A7 < 0, A7 + 360, A7)
+    A7 = np.where(A7 > 360, A7 - 360, A7)
+    return {"V2": V2, "E": E, "Azimuth": A7,
+            "Rise": event & (V0 < 0) & (V2 > 0), "Set": event & (V0 > 0) & (V2 < 0)}
+
+def waMoonPositionBatch(timesIn, siteIn: waObserverLocation = None):
+    """Geocentric position of the moon for an array of instants in one vectorized pass.
+    Returns a dictionary of arrays: JD, ra and dec in degrees, distance in km and EclipticLongitude in degrees."""
+    jd = waBatchJulianDates(timesIn, siteIn)
+    ra, dec, distance = waMoonPositionKernel(jd - 2451545.0)
+    ra = np.degrees(ra) % 360; dec = np.degrees(dec)
+    return {"JD": jd, "ra": ra, "dec": dec, "distance": distance * WA_UNITS_EARTH_RADIUS_TO_KM,
+            "EclipticLongitude": waEclipticLongitudes(ra, dec)}
+
+def waLocalSiderealTimes(jdIn, longitudeIn: float):
+    """Local sidereal time in hours for an array of Julian dates.  Vectorized form of waGreenwichSiderealTime
+    and waSessionTime.LocalSiderealTime."""
+    jd = np.asarray(jdIn, dtype=float)
+    jCent = (jd - 2451545.0)/36525
+    siderealTime = (280.46061837+360.98564736629*(jd - 2451545)+0.000387933*jCent*jCent-jCent*jCent*jCent/38710000) % 360 # VALUE IN DEGREES
+    return (24*siderealTime/360 + 24*longitudeIn/360) % 24 # WEST LON AS NEGATIVE.  VALUE IN HOURS.
+
+def waTopocentricPositions(raIn, decIn, distanceIn, lstIn, latitudeIn: float, radiusIn: float = WA_UNITS_EARTH_RADIUS_TO_KM):
+    """Topocentric RA and Dec in degrees, corrected for parallax, for arrays of geocentric RA and Dec in degrees,
+    distance in km and local sidereal time in hours.  radiusIn is the equatorial radius of the Earth in km.
+    RA keeps the range of raIn.  See Jean Meeus chapter 40."""
+    ra = np.radians(raIn); dec = np.radians(decIn); lat = waRadians(latitudeIn)
+    hourAngle = np.radians(15*np.asarray(lstIn)) - ra
+    parallax = radiusIn / np.asarray(distanceIn)  # SINE OF THE PARALLAX
+    denominator = np.cos(dec) - math.cos(lat) * parallax * np.cos(hourAngle)
+    deltaRA = np.arctan2(-math.cos(lat) * parallax * np.sin(hourAngle), denominator)
+    decTopocentric = np.arctan2((np.sin(dec) - math.sin(lat) * parallax) * np.cos(deltaRA), denominator)
+    return np.degrees(ra + deltaRA), np.degrees(decTopocentric)
+
+def waEclipticConstellations(eclipticLongitudesIn):
+    """Vectorized form of waSkyPosition.GetEclipticConstellation.  Returns arrays of constellation names and abbreviations."""
+    i = np.searchsorted(WA_ECLIPTIC_CONSTELLATIONS_START, eclipticLongitudesIn, side="right") - 1
+    return WA_ECLIPTIC_CONSTELLATIONS_NAME[i], WA_ECLIPTIC_CONSTELLATIONS_ABBREVIATION[i]
+
+def waDaysToDatetimes(datetimesIn, daysIn):
+    """Adds a fractional number of days to datetime64 values.  NaN days give NaT."""
+    days = np.asarray(daysIn, dtype=float)
+    microseconds = np.round(np.where(np.isnan(days), 0, days) * 86400000000).astype(np.int64)
+    datetimes = np.asarray(datetimesIn).astype("datetime64[us]") + microseconds.astype("timedelta64[us]")
+    return np.where(np.isnan(days), np.datetime64("NaT"), datetimes)
+
+def waSunEventsBatch(datesIn, siteIn: waObserverLocation):
+    """Sun events for an array of local dates (datetime64[D]), as waSun.GetEvents computes them for a sun at local noon.
+    Returns a dictionary of datetime64 arrays:  Rise, Transit, Set, Dawn and Dusk.  Events that do not occur are NaT."""
+    noon = np.asarray(datesIn).astype("datetime64[D]") + np.timedelta64(12,"h")
+    position = waSunPositionBatch(noon, siteIn)
+    localSiderealTime = waLocalSiderealTimes(position["JD"], siteIn.EarthPosition.longitude)
+    # TRANSIT TIME.  m0 MUST BE BETWEEN 0 AND 1
+    m0 = position["ra"]/360 - localSiderealTime/24
+    m0 = np.where(m0 < 0, m0 + 1, m0)
+    m0 = np.where(m0 > 1, m0 - 1, m0)
+    phi = waRadians(siteIn.EarthPosition.latitude)
+    dec = np.radians(position["dec"])
+    events = {"Transit": waDaysToDatetimes(noon, m0)}
+    for h0, riseName, setName in ((-0.8333, "Rise", "Set"), (-18.0, "Dawn", "Dusk")):
+        with np.errstate(invalid="ignore"):
+            H0 = np.degrees(np.arccos((math.sin(waRadians(h0)) - math.sin(phi) * np.sin(dec)) / (math.cos(phi) * np.cos(dec))))
+        events[riseName] = waDaysToDatetimes(noon, m0 - H0/360.0)
+        events[setName] = waDaysToDatetimes(noon, m0 + H0/360.0)
+    return events
+
+def waMoonIlluminations(jCenturyIn):
+    """Vectorized form of waMoon.GetIllumination for an array of Julian centuries."""
+    wTcent = np.asarray(jCenturyIn, dtype=float)
+    wTcent2 = wTcent * wTcent; wTcent3 = wTcent2 * wTcent; wTcent4 = wTcent3 * wTcent
+    # SAME OPERATOR ORDER AS waMoon.GetIllumination
+    D = 297.8501921+445267.111403*wTcent-0.0018819*wTcent2+wTcent3/545868-wTcent4/113065000 % 360 # MEAN ELONGATION OF THE MOON, EQUATION 47.2
+    M = 357.5291092+35999.0502909*wTcent-0.0001536*wTcent2+wTcent3/24490000 % 360 # SUN'S MEAN ANOMALY, EQUATION 47.3
+    M2 = 134.9633964+477198.8675055*wTcent+0.0087414*wTcent2+wTcent3/69699-wTcent4/14712000 % 360 # MOON'S MEAN ANOMALY
+    i = 180-D-6.289*np.sin(np.radians(M2))+2.1*np.sin(np.radians(M))-1.274*np.sin(np.radians(2*D-M2))- \
+        0.658*np.sin(np.radians(2*D))-0.214*np.sin(np.radians(2*M2))-0.11*np.sin(np.radians(D)) # PHASE ANGLE, EQUATION 48.4
+    return (1 + np.cos(np.radians(i)))/2 # ILLUMINATED FRACTION OF THE MOON, EQUATION 48.1
+
+def waMoonEventsBatch(datesIn, siteIn: waObserverLocation):
+    """Moon events for an array of local dates (datetime64[D]), as waMoon.GetPosition3 computes them for a moon at local noon.
+    Returns a dictionary of arrays:  Rise and Set (datetime64, 1900-01-01 when there is no event that day),
+    the geocentric position at the end of the day (ra, dec in degrees and distance in km), EclipticLongitude and
+    the IlluminatedFraction at noon.  An event rounded up to 24:00 is reported at 00:00 of the next day, as in
+    waMoon.GetPosition3."""
+    dates = np.asarray(datesIn).astype("datetime64[D]")
+    UTCOffset = waUTCOffsetHours(siteIn)
+    jdNoon = waBatchJulianDates(dates + np.timedelta64(12,"h"), siteIn)
+    # DAYS FROM J2000.0 AT THE START OF THE LOCAL DAY, AS IN waMoon.GetPosition3
+    t = np.round(jdNoon - 2451545 - 0.5 + UTCOffset/24, 2) - UTCOffset/24
+    T0 = 2*math.pi*waLocalSiderealTimes(waBatchJulianDates(dates, siteIn), siteIn.EarthPosition.longitude)/24
+    ra, dec, distance = waMoonPositionKernel(t[:,np.newaxis] + 0.5 * np.arange(3))
+    scan = waMoonRiseSetScan(ra, dec, distance, T0, siteIn.EarthPosition.latitude)
+
+    events = {}
+    noEvent = np.datetime64("1900-01-01T00:00:00","us")
+    for name in ("Rise", "Set"):
+        # THE LAST EVENT OF THE DAY IS REPORTED, AS IN THE HOURLY LOOP OF waMoon.GetPosition3
+        found = scan[name].any(axis=-1)
+        hour = 23 - np.argmax(scan[name][:,::-1], axis=-1)
+        T3 = hour + scan["E"][np.arange(len(dates)), hour] + 1 / 120 # ROUND OFF
+        H3 = np.floor(np.where(found, T3, 0)); M3 = np.floor((np.where(found, T3, 0) - H3) * 60)
+        minutes = (60 * H3 + M3).astype(np.int64).astype("timedelta64[m]")
+        events[name] = np.where(found, dates.astype("datetime64[us]") + minutes, noEvent)
+
+    events["ra"] = np.degrees(ra[:,2]) % 360; events["dec"] = np.degrees(dec[:,2])
+    events["distance"] = distance[:,2]*siteIn.EarthPosition.radiusEquatorial
+    events["EclipticLongitude"] = waEclipticLongitudes(events["ra"], events["dec"])
+    events["IlluminatedFraction"] = np.round(waMoonIlluminations((jdNoon - 2451545.0)/36525), 4)
+    return events
+
+def waDarknessCalendar(startDateIn: datetime.date, nightsIn: int, siteIn: waObserverLocation):
+    """Key darkness events of consecutive nights, computed in one batched pass.  A night runs from local noon on
+    its date to the next noon.  Sun and moon events are the altitude crossings of waAltitudeCrossings and darkness
+    is the intersection of the sun below astronomical twilight with the moon below the horizon, as in
+    waDarknessWindows.  Returns a dictionary of arrays with one entry per night starting on the local date startDateIn:
+    Date, Sunset, Dusk, Dawn, Sunrise, Moonrise, Moonset (datetime64, the first of each in the night or NaT),
+    Darkness from, Darkness to (the longest window of the night), Duration (hours), Illumination (moon illuminated
+    fraction at noon) and MoonConstellation (abbreviation at midnight).  waDarknessWindows lists every window."""
+    days = np.datetime64(startDateIn.strftime("%Y-%m-%d"),"D") + np.arange(nightsIn + 1)
+    noon = waBatchJulianDates(days + np.timedelta64(12,"h"), siteIn)
+    startJD = noon[0]; endJD = noon[-1]
+    sunAltitude = lambda jd: waAltitudes("Sun", jd, siteIn)
+    moonAltitude = lambda jd: waAltitudes("Moon", jd, siteIn)
+    sunHorizon = WA_ALTITUDE_THRESHOLDS["Horizon"]; sunDark = WA_ALTITUDE_THRESHOLDS["Astronomical"]; moonHorizon = WA_ALTITUDE_THRESHOLDS["Horizon"]
+    sun = waAltitudeCrossings(sunAltitude, startJD, endJD, {"Horizon": sunHorizon, "Astronomical": sunDark})
+    moon = waAltitudeCrossings(moonAltitude, startJD, endJD, {"Horizon": moonHorizon})["Horizon"]
+    startAltitudes = np.array([sunAltitude(noon[:1])[0], moonAltitude(noon[:1])[0]])
+
+    # DARKNESS IS THE LONGEST WINDOW OF EACH NIGHT.  THE NIGHTS SPLIT WINDOWS THAT CROSS NOON.
+    start, end = waIntersectIntervals([waIntervalsFromCrossings(sun["Astronomical"], startAltitudes[0] < sunDark, startJD, endJD),
+                                       waIntervalsFromCrossings(moon, startAltitudes[1] < moonHorizon, startJD, endJD),
+                                       (noon[:-1], noon[1:])])
+    keep = end > start
+    start = start[keep]; end = end[keep]
+    night = np.floor(start - startJD).astype(int)
+    order = np.lexsort((end - start, night))
+    longest = order[np.append(night[order][1:] != night[order][:-1], True)] if len(order) else order
+    dusk = waFirstInNights(sun["Astronomical"]["Set"], startJD, nightsIn, siteIn)
+    # A NIGHT WITHOUT DARKNESS HAS A WINDOW OF NO LENGTH AT DUSK, OR AT MIDNIGHT IF THE SUN STAYS ABOVE -18
+    darknessStart = np.where(np.isnat(dusk), days[:-1] + np.timedelta64(24,"h"), dusk)
+    darknessEnd = darknessStart.copy()
+    darknessStart[night[longest]] = waLocalDatetimes(start[longest], siteIn)
+    darknessEnd[night[longest]] = waLocalDatetimes(end[longest], siteIn)
+
+    return {"Date": days[:-1],
+            "Sunset": waFirstInNights(sun["Horizon"]["Set"], startJD, nightsIn, siteIn), "Dusk": dusk,
+            "Dawn": waLastInNights(sun["Astronomical"]["Rise"], startJD, nightsIn, siteIn),
+            "Sunrise": waLastInNights(sun["Horizon"]["Rise"], startJD, nightsIn, siteIn),
+            "Moonrise": waFirstInNights(moon["Rise"], startJD, nightsIn, siteIn),
+            "Moonset": waFirstInNights(moon["Set"], startJD, nightsIn, siteIn),
+            "Darkness from": darknessStart, "Darkness to": darknessEnd,
+            "Duration": (darknessEnd - darknessStart) / np.timedelta64(3600000000,"us"), # HOURS
+            "Illumination": np.round(waMoonIlluminations((noon[:-1] - 2451545.0)/36525), 4),
+            "MoonConstellation": waEclipticConstellations(waMoonPositionBatch(noon[:-1] + 0.5)["EclipticLongitude"])[1]}
+
+WA_DARKNESS_NIGHTS_CHUNK = 31 # NIGHTS COMPUTED IN EACH BATCHED PASS OF waDarknessNights
+
+def waDarknessNights(startDateIn: datetime.date, endDateIn: datetime.date, siteIn: waObserverLocation,
+                     chunkNightsIn: int = WA_DARKNESS_NIGHTS_CHUNK):
+    """Yields the key darkness events of each night from startDateIn through endDateIn as a dictionary with the
+    keys of waDarknessCalendar.  Times are datetime, or None for an event that does not occur.  Nights are
+    computed by waDarknessCalendar chunkNightsIn at a time, so memory does not grow with the range and the first
+    nights are yielded before the later ones are computed."""
+    date = startDateIn
+    while date <= endDateIn:
+        nights = min(chunkNightsIn, (endDateIn - date).days + 1)
+        calendar = waDarknessCalendar(date, nights, siteIn)
+        for i in range(nights):
+            yield waCalendarNight(calendar, i)
+        date += datetime.timedelta(days=nights)
+
+def waCalendarNight(calendarIn: dict, indexIn: int):
+    """Night indexIn of a waDarknessCalendar as a dictionary of Python values.  Times are datetime, or None for an
+    event that does not occur."""
+    night = {}
+    for name, values in calendarIn.items():
+        value = values[indexIn]
+        if isinstance(value, np.datetime64):
+            # NaT AND THE 1900-01-01 PLACEHOLDER MARK AN EVENT THAT DOES NOT OCCUR
+            value = None if np.isnat(value) or value < np.datetime64("1901-01-01") else value.astype(datetime.datetime)
+        elif isinstance(value, np.floating):
+            value = float(value)
+        elif isinstance(value, np.str_):
+            value = str(value)
+        night[name] = value
+    return night
+
+def waSiteDarknessSummary(siteIn: waObserverLocation, startDateIn: datetime.date, nightsIn: int = 1):
+    """Darkness summary of one site over a range of nights.  This is the unit of work of waMultiSiteDarkness."""
+    calendar = waDarknessCalendar(startDateIn, nightsIn, siteIn)
+    duration = calendar["Duration"]
+    return {"Site": siteIn.name, "Nights": nightsIn,
+            "Total": float(duration.sum()), "Mean": float(duration.mean()), "Best": float(duration.max()),
+            "Darkness from": calendar["Darkness from"][0].astype(datetime.datetime),
+            "Darkness to": calendar["Darkness to"][0].astype(datetime.datetime),
+            "Duration": float(duration[0])}
+
+def waMultiSiteDarkness(sitesIn: list, startDateIn: datetime.date, nightsIn: int = 1, workersIn: int = None):
+    """Darkness summaries of many sites computed in a process pool, ranked by total darkness duration.
+    The pool is sized to the available cores unless workersIn is given.  Returns a list of dictionaries
+    from waSiteDarknessSummary with a Rank added."""
+    workers = workersIn or os.cpu_count() or 1
+    if workers <= 1 or len(sitesIn) <= 1:
+        summaries = [waSiteDarknessSummary(site, startDateIn, nightsIn) for site in sitesIn]
+    else:
+        import concurrent.futures # IMPORTED HERE, AS MOST PROGRAMS NEVER START A PROCESS POOL
+        chunksize = max(1, len(sitesIn) // (4 * workers))
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            summaries = list(executor.map(waSiteDarknessSummary, sitesIn,
+                itertools.repeat(startDateIn), itertools.repeat(nightsIn), chunksize=chunksize))
+    summaries.sort(key=lambda summary: summary["Total"], reverse=True)
+    for rank, summary in enumerate(summaries, 1):
+        summary["Rank"] = rank
+    return summaries
+
+#
+#  ALTITUDE EVENTS
+#
+# ALTITUDES OF THE CENTER OF THE SUN OR MOON IN DEGREES.  THE HORIZON VALUE ALLOWS FOR REFRACTION AND THE SEMIDIAMETER.
+WA_ALTITUDE_THRESHOLDS = {"Horizon": -0.8333, "Civil": -6.0, "Nautical": -12.0, "Astronomical": -18.0}
+WA_ALTITUDE_TOLERANCE_DAYS = 1.0/86400 # CROSSING TIMES ARE REFINED TO ONE SECOND
+WA_ALTITUDE_RATE_LIMIT = 16.0 # DEGREES PER HOUR, MORE THAN THE FASTEST ALTITUDE CHANGE OF THE SUN OR MOON
+WA_ALTITUDE_REFINE_DIVISIONS = 8 # GRID INTERVALS THAT MAY HIDE TWO CROSSINGS ARE SPLIT INTO THIS MANY
+WA_ALTITUDE_REFINE_MINUTES = 1.0 # AND SPLIT AGAIN UNTIL THE STEP IS BELOW THIS
+
+def waHorizontalCoordinates(raIn, decIn, lstIn, latitudeIn: float):
+    """Altitude and azimuth in degrees for arrays of RA and Dec in degrees and local sidereal time in hours.
+    Azimuth is measured from north through east."""
+    H = np.radians(15*np.asarray(lstIn) - np.asarray(raIn)) # HOUR ANGLE
+    dec = np.radians(decIn); phi = waRadians(latitudeIn)
+    altitude = np.arcsin(math.sin(phi) * np.sin(dec) + math.cos(phi) * np.cos(dec) * np.cos(H))
+    azimuth = np.arctan2(-np.cos(dec) * np.sin(H), math.cos(phi) * np.sin(dec) - math.sin(phi) * np.cos(dec) * np.cos(H))
+    return np.degrees(altitude), np.degrees(azimuth) % 360
+
+def waBodyTopocentricPositions(nameIn: str, jdIn, siteIn: waObserverLocation):
+    """Topocentric RA and Dec in degrees of the Sun, Moon or a planet at an array of Julian dates, corrected for
+    parallax by waTopocentricPositions, which matters mostly for the moon.  Returns RA, Dec and the local sidereal
+    time in hours."""
+    jd = np.asarray(jdIn, dtype=float)
+    if nameIn in WA_PLANET_NAMES:
+        position = waPlanetPositionBatch(nameIn, jd)
+    else:
+        position = waMoonPositionBatch(jd) if nameIn == "Moon" else waSunPositionBatch(jd)
+    lst = waLocalSiderealTimes(jd, siteIn.EarthPosition.longitude)
+    ra, dec = waTopocentricPositions(position["ra"], position["dec"], position["distance"], lst,
+        siteIn.EarthPosition.latitude, siteIn.EarthPosition.radiusEquatorial)
+    return ra, dec, lst
+
+def waBodyHorizontalCoordinates(nameIn: str, jdIn, siteIn: waObserverLocation):
+    """Topocentric altitude and azimuth in degrees of the Sun, Moon or a planet at an array of Julian dates."""
+    ra, dec, lst = waBodyTopocentricPositions(nameIn, jdIn, siteIn)
+    return waHorizontalCoordinates(ra, dec, lst, siteIn.EarthPosition.latitude)
+
+def waAltitudes(nameIn: str, jdIn, siteIn: waObserverLocation):
+    """Topocentric altitude in degrees of the Sun, Moon or a planet at an array of Julian dates."""
+    return waBodyHorizontalCoordinates(nameIn, jdIn, siteIn)[0]
+
+def waAltitudeCrossings(altitudeFunctionIn, startJDIn: float, endJDIn: float, thresholdsIn: dict = None, stepHoursIn: float = 2.0):
+    """Times at which a body crosses altitude thresholds between two Julian dates.
+    altitudeFunctionIn maps an array of Julian dates to altitudes in degrees.  Crossings of every threshold are
+    bracketed on one grid of stepHoursIn, then refined together by the Illinois form of regula falsi, so each
+    iteration is a single batched altitude evaluation.  A body that turns back within the grid step can cross a
+    threshold twice between samples on the same side of it, as the sun does near a grazing twilight at high
+    latitude.  Intervals next to a sampled turning point whose ends are within WA_ALTITUDE_RATE_LIMIT times half
+    the step of the threshold are therefore split, and split again, until the step is below WA_ALTITUDE_REFINE_MINUTES.
+    Returns a dictionary by threshold name of dictionaries with Rise and Set arrays of Julian dates."""
+    thresholds = thresholdsIn if thresholdsIn is not None else WA_ALTITUDE_THRESHOLDS
+    names = list(thresholds)
+    h = np.array([thresholds[name] for name in names], dtype=float)
+    grid = np.linspace(startJDIn, endJDIn, max(2, int(math.ceil((endJDIn - startJDIn) * 24 / stepHoursIn)) + 1))
+    altitude = altitudeFunctionIn(grid)
+    f = altitude - h[:, np.newaxis]
+    # A TURNING POINT LIES NEAR A SAMPLE WHERE THE SLOPE CHANGES SIGN.  THE ENDS OF THE SPAN ARE TREATED AS ONE.
+    slope = np.diff(altitude)
+    turning = np.ones(len(grid), dtype=bool)
+    turning[1:-1] = slope[:-1] * slope[1:] <= 0
+    threshold, i = np.nonzero(np.ones((len(h), len(grid) - 1), dtype=bool))
+    a = grid[i]; b = grid[i + 1]; fa = f[threshold, i]; fb = f[threshold, i + 1]
+    candidate = turning[i] | turning[i + 1]
+    step = grid[1] - grid[0]
+    brackets = []
+    while True:
+        change = np.signbit(fa) != np.signbit(fb)
+        brackets.append((threshold[change], a[change], b[change], fa[change], fb[change]))
+        # TWO CROSSINGS WITHIN AN INTERVAL TAKE THE BODY PAST THE THRESHOLD, SO ONE END IS WITHIN THIS MARGIN OF IT
+        margin = WA_ALTITUDE_RATE_LIMIT * 24 * step / 2
+        split = candidate & ~change & (np.minimum(np.abs(fa), np.abs(fb)) < margin)
+        if not split.any() or step * 1440 < WA_ALTITUDE_REFINE_MINUTES:
+            break
+        threshold = threshold[split]; a = a[split]; b = b[split]; fa = fa[split]; fb = fb[split]
+        points = a[:, np.newaxis] + (b - a)[:, np.newaxis] * np.arange(WA_ALTITUDE_REFINE_DIVISIONS + 1) / WA_ALTITUDE_REFINE_DIVISIONS
+        values = np.column_stack((fa, (altitudeFunctionIn(points[:, 1:-1].ravel()).reshape(len(a), -1) -
+                                       h[threshold][:, np.newaxis]), fb))
+        threshold = np.repeat(threshold, WA_ALTITUDE_REFINE_DIVISIONS)
+        a = points[:, :-1].ravel(); b = points[:, 1:].ravel(); fa = values[:, :-1].ravel(); fb = values[:, 1:].ravel()
+        candidate = np.ones(len(a), dtype=bool)
+        step /= WA_ALTITUDE_REFINE_DIVISIONS
+    threshold, a, b, fa, fb = (np.concatenate(parts) for parts in zip(*brackets))
+    rising = fa < 0
+    c = a
+    for iteration in range(30):
+        if len(c) == 0:
+            break
+        cOld = c
+        with np.errstate(divide="ignore", invalid="ignore"):
+            c = np.where(fb != fa, (a * fb - b * fa) / (fb - fa), (a + b) / 2)
+        fc = altitudeFunctionIn(c) - h[threshold]
+        # KEEP THE ROOT BRACKETED BETWEEN a AND b.  HALVING THE RETAINED END IS THE ILLINOIS MODIFICATION.
+        swap = np.signbit(fc) != np.signbit(fb)
+        a = np.where(swap, b, a); fa = np.where(swap, fb, fa / 2)
+        b = c; fb = fc
+        if np.max(np.abs(c - cOld)) < WA_ALTITUDE_TOLERANCE_DAYS or np.all(fc == 0):
+            break
+    return {name: {"Rise": np.sort(c[(threshold == n) & rising]), "Set": np.sort(c[(threshold == n) & ~rising])}
+            for n, name in enumerate(names)}
+
+def waNightAltitudeCurves(sessionIn, stepMinutesIn: float = 1):
+    """Altitude and azimuth of the Sun and Moon through the session night, from sunset to sunrise, every
+    stepMinutesIn minutes.  Without a sunset or sunrise the curves run from noon to noon.  Returns a dictionary
+    of arrays:  Time (local datetime64), SunAltitude, SunAzimuth, MoonAltitude, MoonAzimuth, and the topocentric
+    MoonRA and MoonDec, all in degrees."""
+    start = sessionIn.Events["Sunset"]; end = sessionIn.Events["Sunrise"]
+    if start is None or end is None or not end > start:
+        start = datetime.datetime.combine(sessionIn.SessionTime1.date.date(), datetime.time(12,0,0))
+        end = start + datetime.timedelta(days=1)
+    step = np.timedelta64(int(round(stepMinutesIn * 60000000)),"us")
+    times = np.arange(np.datetime64(start,"us"), np.datetime64(end,"us") + step, step)
+    jd = waBatchJulianDates(times, sessionIn.Site)
+    sunAltitude, sunAzimuth = waBodyHorizontalCoordinates("Sun", jd, sessionIn.Site)
+    moonRA, moonDec, lst = waBodyTopocentricPositions("Moon", jd, sessionIn.Site)
+    moonAltitude, moonAzimuth = waHorizontalCoordinates(moonRA, moonDec, lst, sessionIn.Site.EarthPosition.latitude)
+    return {"Time": times, "SunAltitude": sunAltitude, "SunAzimuth": sunAzimuth,
+            "MoonAltitude": moonAltitude, "MoonAzimuth": moonAzimuth, "MoonRA": moonRA % 360, "MoonDec": moonDec}
+
+def waLocalDatetimes(jdIn, siteIn: waObserverLocation):
+    """Local datetime64 values at the site for an array of Julian dates.  NaN gives NaT."""
+    jd = np.asarray(jdIn, dtype=float)
+    return waDaysToDatetimes(np.datetime64("1970-01-01T00:00:00","us"), jd - 2440587.5 + waUTCOffsetHours(siteIn) / 24) # DAYS SINCE THE UNIX EPOCH
+
+def waIntervalsFromCrossings(crossingsIn: dict, belowAtStartIn: bool, startJDIn: float, endJDIn: float):
+    """Intervals below a threshold from its Rise and Set arrays of waAltitudeCrossings, as arrays of start and end
+    Julian dates.  Sets open intervals and rises close them, so the crossings alternate."""
+    starts = crossingsIn["Set"]; ends = crossingsIn["Rise"]
+    if belowAtStartIn:
+        starts = np.concatenate(([startJDIn], starts))
+    if len(starts) > len(ends):
+        ends = np.concatenate((ends, [endJDIn]))
+    return starts, ends
+
+def waBelowIntervals(altitudeFunctionIn, startJDIn: float, endJDIn: float, altitudeIn: float):
+    """Intervals between two Julian dates during which a body is below an altitude, as arrays of start and end
+    Julian dates."""
+    crossings = waAltitudeCrossings(altitudeFunctionIn, startJDIn, endJDIn, {"Below": altitudeIn})["Below"]
+    return waIntervalsFromCrossings(crossings, altitudeFunctionIn(np.array([startJDIn]))[0] < altitudeIn, startJDIn, endJDIn)
+
+def waIntersectIntervals(intervalsIn: list):
+    """Intersection of several sets of disjoint intervals, each a pair of sorted start and end arrays.
+    All boundaries are merged in one sort and a running count of the sets covering each point marks the
+    intervals covered by every set.  Ends sort before starts at the same time, so touching intervals do not join."""
+    starts = np.concatenate([intervals[0] for intervals in intervalsIn])
+    ends = np.concatenate([intervals[1] for intervals in intervalsIn])
+    times = np.concatenate((starts, ends))
+    steps = np.concatenate((np.ones(len(starts), dtype=int), -np.ones(len(ends), dtype=int)))
+    order = np.lexsort((steps, times))
+    times = times[order]
+    covered = np.flatnonzero(np.cumsum(steps[order]) == len(intervalsIn))
+    return times[covered], times[covered + 1]
+
+def waDarknessWindows(startDateIn: datetime.date, nightsIn: int, siteIn: waObserverLocation,
+                      sunAltitudeIn: float = WA_ALTITUDE_THRESHOLDS["Astronomical"], moonAltitudeIn: float = WA_ALTITUDE_THRESHOLDS["Horizon"]):
+    """All windows of darkness, when the sun is below sunAltitudeIn and the moon below moonAltitudeIn, over
+    nightsIn nights starting on the local date startDateIn.  A night runs from local noon to the next noon and
+    may hold more than one window.  Returns a dictionary of arrays with one entry per window:  Night (local date),
+    Darkness from, Darkness to (local datetime64) and Duration (hours)."""
+    startJD = waJulianDate(datetime.datetime(startDateIn.year, startDateIn.month, startDateIn.day, 12) - datetime.timedelta(hours=waUTCOffsetHours(siteIn)))
+    endJD = startJD + nightsIn
+    sun = waBelowIntervals(lambda jd: waAltitudes("Sun", jd, siteIn), startJD, endJD, sunAltitudeIn)
+    moon = waBelowIntervals(lambda jd: waAltitudes("Moon", jd, siteIn), startJD, endJD, moonAltitudeIn)
+    noon = startJD + np.arange(nightsIn + 1)
+    start, end = waIntersectIntervals([sun, moon, (noon[:-1], noon[1:])]) # THE NIGHTS SPLIT WINDOWS THAT CROSS NOON
+    keep = end > start
+    start = start[keep]; end = end[keep]
+    return {"Night": np.datetime64(startDateIn.strftime("%Y-%m-%d"),"D") + np.floor(start - startJD).astype(int),
+            "Darkness from": waLocalDatetimes(start, siteIn), "Darkness to": waLocalDatetimes(end, siteIn),
+            "Duration": (end - start) * 24}
+
+#
+#  MOON PHASE CATALOG
+#
+WA_MOON_PHASE_NAMES = ["New", "First Quarter", "Full", "Last Quarter"]
+
+class waMoonPhaseCatalog():
+    """Instants of the new, first quarter, full and last quarter moons from startYearIn through endYearIn,
+    computed in one vectorized pass with the series of waMoon.GetPhases (Jean Meeus chapter 49) and kept in
+    sorted arrays.  A catalog saved with Save is loaded by passing filenameIn.  Times are UTC."""
+    def __init__(self, startYearIn: int = 1990, endYearIn: int = 2060, filenameIn: str = None):
+        if filenameIn is not None:
+            catalog = np.load(filenameIn)
+            self.k = catalog["k"]; self.Time = catalog["Time"]
         else:
-            darkness_start = dusk1
-            darkness_end = dawn2 # DARKNESS STARTS AND ENDS AT DUSK SINCE MOON IS UP ALL NIGHT
-            moonriseLatest = moonrise2
-            moonsetLatest = moonset1
-            if DEBUGMODE: print("Session events condition 7")
-        if (darkness_end > darkness_start):
-            darkness_duration = darkness_end - darkness_start
-            darkness_duration = darkness_duration.total_seconds()/(3600) # HOURS
+            # K IS IN QUARTERS OF A LUNATION, WITH MARGIN FOR THE PHASES BEFORE AND AFTER THE FIRST AND LAST DAYS
+            kStart = math.floor(4*(startYearIn - 2000.0)*12.3685)/4.0 - 0.5
+            kEnd = math.floor(4*(endYearIn + 1 - 2000.0)*12.3685)/4.0 + 1.5
+            self.k = kStart + 0.25*np.arange(int(round(4*(kEnd - kStart))) + 1)
+            self.Time = self.GetTimes(self.k)
+        self.Phase = (4*(self.k - np.floor(self.k))).astype(int) # INDEX IN WA_MOON_PHASE_NAMES
+
+    def __len__(self):
+        return len(self.k)
+
+    def GetTimes(self, kIn):
+        """Vectorized form of the series in waMoon.GetPhases.  Returns UTC datetime64 values."""
+        k = kIn; T = k / 1236.85
+        JDE = 2451550.09766+29.530588861*k - 0.00015437*T*T + 0.00000015*np.power(T,3) + 0.00000000073*np.power(T,4)
+        # CORRECTIONS
+        E = 1-0.002516 * T - 0.0000074 * T * T
+        M_Sun = np.radians( (2.5534 + 29.10535670 * k - 1.4e-6 * T * T - 1.1e-7 * np.power(T,3)) % 360)
+        M_Moon = np.radians( (201.5643 + 385.81693528 * k + 0.0107582 * T * T + 1.238e-5 * np.power(T,3) - 5.8e-8 * np.power(T,4)) % 360)
+        F = np.radians( (160.7108 + 390.67050284 * k - 1.6118e-3 * T * T - 2.27e-6 * np.power(T,3) + 1.1e-8 * np.power(T,4)) % 360)
+        k_fraction = k - np.floor(k)
+        quarter = -0.62801 * np.sin(M_Moon) + 0.17172 * E * np.sin(M_Sun) - 0.01183 * E * np.sin(M_Sun + M_Moon) + \
+            0.00862 * np.sin(2 * M_Moon) + 0.00804 * np.sin(2 * F)
+        correction = np.select([k_fraction == 0, k_fraction == 0.25, k_fraction == 0.5, k_fraction == 0.75], [
+            -0.40720 * np.sin(M_Moon) + 0.17241 * E * np.sin(M_Sun) + 0.01608 * np.sin(2 * M_Moon) + 0.01039 * np.sin(2 * F), # NEW
+            quarter + 0.00306, # FIRST QUARTER
+            -0.40614 * np.sin(M_Moon) + 0.17302 * E * np.sin(M_Sun) + 0.01614 * np.sin(2 * M_Moon) + 0.01043 * np.sin(2 * F), # FULL
+            quarter - 0.00306]) # LAST QUARTER
+        # DAYS ARE CONVERTED WITH timedelta, AS IN waMoon.GetPhases, SO THE MICROSECONDS ROUND THE SAME WAY
+        microseconds = [(datetime.timedelta(days=d) + datetime.timedelta(days=c)) // datetime.timedelta(microseconds=1)
+                        for d, c in zip((JDE - 2451179.5).tolist(), correction.tolist())]
+        return np.datetime64("1999-01-01T00:00:00","us") + np.array(microseconds, dtype="timedelta64[us]")
+
+    def Save(self, filenameIn: str):
+        np.savez(filenameIn, k=self.k, Time=self.Time)
+
+    def Phases(self, indexIn: int, countIn: int, offsetHoursIn: int = 0):
+        """Phases from position indexIn as a list of [name, datetime], shifted by offsetHoursIn."""
+        times = (self.Time[indexIn:indexIn + countIn] + np.timedelta64(offsetHoursIn,"h")).astype(datetime.datetime)
+        return [[WA_MOON_PHASE_NAMES[phase], time] for phase, time in zip(self.Phase[indexIn:indexIn + countIn], times)]
+
+    def PhasesNear(self, sessionTimeIn: waSessionTime):
+        """The six phases waMoon.GetPhases reports for the session time, in local time, or None if outside the catalog."""
+        dateIn = sessionTimeIn.date
+        year = dateIn.year + dateIn.timetuple().tm_yday/365.25
+        k = round(math.floor(4*(year - 2000.0)*12.3685)/4.0,2) - 0.25 # SAME FIRST PHASE AS waMoon.GetPhases
+        index = int(round(4*(k - self.k[0])))
+        if index < 0 or index + 6 > len(self.k):
+            return None
+        return self.Phases(index, 6, int(sessionTimeIn.UTCOffset+sessionTimeIn.DST*1))
+
+    def NextPhases(self, timeIn: datetime.datetime, countIn: int = 4, offsetHoursIn: int = 0):
+        """The next countIn phases after the local time timeIn by binary search.  offsetHoursIn is the offset of local time from UTC."""
+        index = int(np.searchsorted(self.Time, np.datetime64(timeIn - datetime.timedelta(hours=offsetHoursIn),"us"), side="right"))
+        return self.Phases(index, countIn, offsetHoursIn)
+
+# MOON PHASE CATALOG USED BY waMoon.Phases.  IT IS BUILT ON FIRST USE UNLESS ONE IS LOADED WITH waUseMoonPhaseCatalog.
+waActiveMoonPhaseCatalog = None
+
+def waUseMoonPhaseCatalog(catalogIn: waMoonPhaseCatalog = None):
+    """Makes catalogIn the catalog used by waMoon.Phases, or the default catalog if None.  Returns it."""
+    global waActiveMoonPhaseCatalog
+    waActiveMoonPhaseCatalog = catalogIn if catalogIn is not None else waMoonPhaseCatalog()
+    return waActiveMoonPhaseCatalog
+
+#
+#  PRECOMPUTED EPHEMERIS TABLE
+#
+WA_EPHEMERIS_TABLE_COLUMNS = ["SunRA", "SunDec", "SunDistance", "MoonRA", "MoonDec", "MoonDistance"] # DEGREES AND KM
+WA_EPHEMERIS_TABLE_TOLERANCE_DEGREES = 0.0001 # MAXIMUM RA AND DEC ERROR OF THE TABLE AGAINST THE LIVE SERIES (0.36 ARCSECONDS)
+WA_EPHEMERIS_TABLE_TOLERANCE_DISTANCE = 0.000001 # MAXIMUM RELATIVE DISTANCE ERROR OF THE TABLE AGAINST THE LIVE SERIES
+
+def waEphemerisTableHeaderName(filenameIn: str):
+    """Name of the JSON header stored beside an ephemeris table."""
+    return os.path.splitext(filenameIn)[0] + ".json"
+
+def waBuildEphemerisTable(filenameIn: str, startYearIn: int = 2000, endYearIn: int = 2050, stepHoursIn: float = 1):
+    """Evaluates the solar and lunar series at a fixed step from January 1 of startYearIn through December 31
+    of endYearIn and writes the positions as a float32 .npy table with a JSON header.  One extra day is
+    stored at each end so that interpolation covers the whole span.  Returns the header dictionary."""
+    stepDays = stepHoursIn / 24
+    startJD = waJulianDate(datetime.datetime(startYearIn,1,1)) - 1
+    endJD = waJulianDate(datetime.datetime(endYearIn + 1,1,1)) + 1
+    rows = int(math.ceil((endJD - startJD) / stepDays)) + 1
+    table = np.lib.format.open_memmap(filenameIn, mode="w+", dtype=np.float32, shape=(rows, len(WA_EPHEMERIS_TABLE_COLUMNS)))
+    CHUNK = 8760 # ROWS PER PASS KEEPS THE SERIES TEMPORARIES SMALL
+    for first in range(0, rows, CHUNK):
+        jd = startJD + stepDays * np.arange(first, min(first + CHUNK, rows))
+        sun = waSunPositionBatch(jd, useTableIn=False)
+        ra, dec, distance = waMoonPositionKernel(jd - 2451545.0, useTableIn=False)
+        table[first:first + len(jd)] = np.column_stack([sun["ra"] % 360, sun["dec"], sun["distance"],
+            np.degrees(ra) % 360, np.degrees(dec), distance * WA_UNITS_EARTH_RADIUS_TO_KM])
+    table.flush()
+    del table
+    header = {"Version": __version__, "StartJD": startJD, "StepDays": stepDays, "Rows": rows,
+              "StartYear": startYearIn, "EndYear": endYearIn, "Columns": WA_EPHEMERIS_TABLE_COLUMNS}
+    with open(waEphemerisTableHeaderName(filenameIn),"wt") as headerfile:
+        json.dump(header, headerfile, indent=4)
+    return header
+
+class waEphemerisTable():
+    """Sun and Moon positions interpolated from a table written by waBuildEphemerisTable.
+    The table is memory mapped, so opening it reads only the header and each lookup touches
+    four rows.  Positions use four point (cubic) Lagrange interpolation."""
+    def __init__(self, filenameIn: str):
+        self.filename = filenameIn
+        with open(waEphemerisTableHeaderName(filenameIn),"rt") as headerfile:
+            self.header = json.load(headerfile)
+        self.StartJD = self.header["StartJD"]
+        self.StepDays = self.header["StepDays"]
+        self.data = np.load(filenameIn, mmap_mode="r")
+        # THE FIRST AND LAST INTERVALS LACK A NEIGHBOUR ROW FOR CUBIC INTERPOLATION
+        self.FirstJD = self.StartJD + self.StepDays
+        self.LastJD = self.StartJD + (len(self.data) - 2) * self.StepDays
+
+    def __len__(self):
+        return len(self.data)
+
+    def Covers(self, jdIn):
+        """True if every Julian date in jdIn lies within the table."""
+        jd = np.asarray(jdIn)
+        return bool(np.all((jd >= self.FirstJD) & (jd < self.LastJD)))
+
+    def Interpolate(self, jdIn, columnIn: int):
+        """Interpolated RA, Dec (degrees) and distance (km) from the three table columns starting at columnIn.
+        RA is unwrapped across 0/360 degrees before interpolating and returned in the range 0 to 360."""
+        x = (np.asarray(jdIn, dtype=float) - self.StartJD) / self.StepDays
+        i = np.floor(x).astype(np.intp)
+        f = (x - i)[..., np.newaxis]
+        rows = self.data[i[..., np.newaxis] + np.arange(-1,3), columnIn:columnIn + 3].astype(float)
+        ra = rows[..., 0]
+        rows[..., 0] = ra[..., :1] + (ra - ra[..., :1] + 180) % 360 - 180
+        p0, p1, p2, p3 = rows[..., 0, :], rows[..., 1, :], rows[..., 2, :], rows[..., 3, :]
+        value = p1 + f * ((p2 - p0)/2 + f * ((2*p0 - 5*p1 + 4*p2 - p3)/2 + f * (3*(p1 - p2) + p3 - p0)/2))
+        return value[..., 0] % 360, value[..., 1], value[..., 2]
+
+    def SunPositions(self, jdIn):
+        """RA, Dec (degrees) and distance (km) of the sun.  RA is in the range -180 to 180 like waSun.GetPosition."""
+        ra, dec, distance = self.Interpolate(jdIn, 0)
+        return np.where(ra > 180, ra - 360, ra), dec, distance
+
+    def MoonPositions(self, jdIn):
+        """Geocentric RA, Dec (degrees) and distance (km) of the moon."""
+        return self.Interpolate(jdIn, 3)
+
+    def Verify(self, samplesIn: int = 20000, seedIn: int = 0):
+        """Compares the table with the live series at random instants.  Returns the largest RA and Dec errors
+        in degrees and relative distance errors, and Passed if all are within the stated tolerances."""
+        jd = np.random.default_rng(seedIn).uniform(self.FirstJD, self.LastJD, samplesIn)
+        sun = waSunPositionBatch(jd, useTableIn=False)
+        ra, dec, distance = waMoonPositionKernel(jd - 2451545.0, useTableIn=False)
+        live = [(sun["ra"], sun["dec"], sun["distance"]),
+                (np.degrees(ra), np.degrees(dec), distance * WA_UNITS_EARTH_RADIUS_TO_KM)]
+        errors = {}
+        for name, table, series in zip(["Sun", "Moon"], [self.SunPositions(jd), self.MoonPositions(jd)], live):
+            errors[name + "RA"] = float(np.max(np.abs((table[0] - series[0] + 180) % 360 - 180)))
+            errors[name + "Dec"] = float(np.max(np.abs(table[1] - series[1])))
+            errors[name + "Distance"] = float(np.max(np.abs(table[2] / series[2] - 1)))
+        errors["Passed"] = all(errors[name] <= WA_EPHEMERIS_TABLE_TOLERANCE_DEGREES for name in errors if not name.endswith("Distance")) and \
+            all(errors[name] <= WA_EPHEMERIS_TABLE_TOLERANCE_DISTANCE for name in errors if name.endswith("Distance"))
+        return errors
+
+# ACTIVE EPHEMERIS TABLE.  POSITIONS FALL BACK TO THE LIVE SERIES OUTSIDE ITS SPAN OR WHEN NONE IS LOADED.
+waActiveEphemerisTable = None
+
+def waUseEphemerisTable(filenameIn: str = None):
+    """Makes the table in filenameIn the source of Sun and Moon positions, or returns to the live series if None.
+    The body and outlook caches are cleared so positions computed from the previous source are not reused."""
+    global waActiveEphemerisTable
+    waActiveEphemerisTable = waEphemerisTable(filenameIn) if filenameIn else None
+    waBodyCache.Clear()
+    waOutlookCache.Clear()
+    for store in list(waOpenSessionStores):
+        store.UseSource(waEphemerisSource())
+    return waActiveEphemerisTable
+
+def waEphemerisSource():
+    """Name of the active source of Sun and Moon positions:  the live series of this version of the module, or the
+    table file with the version and span recorded in its header."""
+    if waActiveEphemerisTable is None:
+        return "Series " + __version__
+    header = waActiveEphemerisTable.header
+    return "Table {} {} {} {} {}".format(os.path.basename(waActiveEphemerisTable.filename), header.get("Version"),
+                                         header["StartJD"], header["StepDays"], header["Rows"])
+
+#
+#  DARKNESS INDEX
+#
+class waDarknessIndex():
+    """Nightly darkness records of one site from waDarknessCalendar and waDarknessWindows, ordered by moon-free
+    darkness, for finding the best nights.  Duration is the sum of the windows of darkness of the night and Longest,
+    Darkness from and Darkness to are its longest window.  Weekend nights are Friday and Saturday nights.  An index saved with Save is loaded by passing filenameIn."""
+    def __init__(self, siteIn: waObserverLocation = None, startDateIn: datetime.date = None, nightsIn: int = 366, filenameIn: str = None):
+        if filenameIn is not None:
+            records = np.load(filenameIn)
+            self.Records = {name: records[name] for name in records.files}
+            self.site = str(self.Records.pop("Site"))
         else:
-            darkness_duration = 0
+            calendar = waDarknessCalendar(startDateIn, nightsIn, siteIn)
+            windows = waDarknessWindows(startDateIn, nightsIn, siteIn)
+            self.site = siteIn.name
+            self.Records = {"Date": calendar["Date"],
+                            "Darkness from": calendar["Darkness from"], "Darkness to": calendar["Darkness to"],
+                            "Duration": np.bincount((windows["Night"] - calendar["Date"][0]).astype(int), weights=windows["Duration"], minlength=nightsIn), # MOON-FREE DARKNESS IN HOURS
+                            "Longest": calendar["Duration"], # LONGEST WINDOW OF DARKNESS IN HOURS
+                            "Night": np.where(calendar["Dawn"] > calendar["Dusk"], (calendar["Dawn"] - calendar["Dusk"]) / np.timedelta64(3600000000,"us"), 0.0), # ASTRONOMICAL NIGHT IN HOURS
+                            "Illumination": calendar["Illumination"],
+                            "MoonConstellation": calendar["MoonConstellation"]}
+        # DAY OF THE WEEK, MONDAY 0.  THE UNIX EPOCH WAS A THURSDAY.
+        self.Weekday = (self.Records["Date"].astype("datetime64[D]").astype(np.int64) + 3) % 7
+        self.Order = np.argsort(-self.Records["Duration"], kind="stable") # MOST DARKNESS FIRST
+
+    def __len__(self):
+        return len(self.Order)
+
+    def Save(self, filenameIn: str):
+        np.savez(filenameIn, Site=self.site, **self.Records)
+
+    def Query(self, startDateIn: datetime.date = None, endDateIn: datetime.date = None, minimumHoursIn: float = 0.0,
+              maximumIlluminationIn: float = 1.0, weekendsIn: bool = False, topIn: int = 10):
+        """The topIn nights with the most moon-free darkness between startDateIn and endDateIn (inclusive) that have at
+        least minimumHoursIn hours of it and moon illumination no more than maximumIlluminationIn.
+        Returns a list of dictionaries of the night records, most darkness first."""
+        dates = self.Records["Date"]
+        selected = (self.Records["Duration"] >= minimumHoursIn) & (self.Records["Illumination"] <= maximumIlluminationIn)
+        if startDateIn is not None:
+            selected &= dates >= np.datetime64(startDateIn.strftime("%Y-%m-%d"),"D")
+        if endDateIn is not None:
+            selected &= dates <= np.datetime64(endDateIn.strftime("%Y-%m-%d"),"D")
+        if weekendsIn:
+            selected &= (self.Weekday == 4) | (self.Weekday == 5)
+        nights = self.Order[selected[self.Order]][:topIn]
+        return [{"Site": self.site, "Date": dates[i].astype(datetime.date),
+                 "Darkness from": self.Records["Darkness from"][i].astype(datetime.datetime),
+                 "Darkness to": self.Records["Darkness to"][i].astype(datetime.datetime),
+                 "Duration": float(self.Records["Duration"][i]), "Longest": float(self.Records["Longest"][i]),
+                 "Night": float(self.Records["Night"][i]),
+                 "Illumination": float(self.Records["Illumination"][i]),
+                 "MoonConstellation": str(self.Records["MoonConstellation"][i])} for i in nights]
+
+#
+#  PERSISTENT SESSION STORE
+#
+def waStoreEncode(valueIn):
+    """JSON encoding of the dates and times in stored session results."""
+    if isinstance(valueIn, datetime.datetime):
+        return {"datetime": valueIn.isoformat()}
+    if isinstance(valueIn, datetime.date):
+        return {"date": valueIn.isoformat()}
+    raise TypeError("Cannot store {}".format(type(valueIn).__name__))
+
+def waStoreDecode(objectIn: dict):
+    """Inverse of waStoreEncode, used as the JSON object hook."""
+    if len(objectIn) == 1 and "datetime" in objectIn:
+        return datetime.datetime.fromisoformat(objectIn["datetime"])
+    if len(objectIn) == 1 and "date" in objectIn:
+        return datetime.date.fromisoformat(objectIn["date"])
+    return objectIn
+
+# SESSION STORES OPEN IN THIS PROCESS, SO waUseEphemerisTable CAN DISCARD THEIR ROWS
+waOpenSessionStores = weakref.WeakSet()
+
+class waSessionStore():
+    """Session results kept in a SQLite file and keyed by site, ephemeris source and night, so a night computed
+    once is never computed again, by this program or another sharing the file.  The file records the version of
+    this module and the ephemeris source.  Rows written by another version or from another source are discarded
+    when the store is opened or when waUseEphemerisTable changes the source."""
+    def __init__(self, filenameIn: str = "wjnaSessions.sqlite"):
+        import sqlite3 # IMPORTED HERE, AS ONLY PROGRAMS KEEPING A SESSION STORE NEED IT
+        self.filename = filenameIn
+        self.connection = sqlite3.connect(filenameIn, timeout=10)
+        with self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS sessions (site TEXT, date TEXT, data TEXT, PRIMARY KEY (site, date))")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS outlook (site TEXT, date TEXT, data TEXT, PRIMARY KEY (site, date))")
+            version = self.connection.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+            if version is None or version[0] != __version__:
+                self.connection.execute("DELETE FROM sessions")
+                self.connection.execute("DELETE FROM outlook")
+                self.connection.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (__version__,))
+        self.UseSource(waEphemerisSource())
+        waOpenSessionStores.add(self)
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def Close(self):
+        waOpenSessionStores.discard(self)
+        self.connection.close()
+
+    def UseSource(self, sourceIn: str):
+        """Discards the rows if they were computed from an ephemeris source other than sourceIn."""
+        with self.connection:
+            source = self.connection.execute("SELECT value FROM meta WHERE key = 'source'").fetchone()
+            if source is None or source[0] != sourceIn:
+                self.connection.execute("DELETE FROM sessions")
+                self.connection.execute("DELETE FROM outlook")
+                self.connection.execute("INSERT OR REPLACE INTO meta VALUES ('source', ?)", (sourceIn,))
+        return
+
+    def Info(self):
+        return {"File": self.filename, "Version": __version__, "Source": waEphemerisSource(), "Sessions": len(self),
+                "Nights": self.connection.execute("SELECT COUNT(*) FROM outlook").fetchone()[0]}
+
+    def Clear(self):
+        with self.connection:
+            self.connection.execute("DELETE FROM sessions")
+            self.connection.execute("DELETE FROM outlook")
+
+    def SiteKey(self, siteIn: waObserverLocation):
+        """Row key of a site.  It includes the ephemeris source, so rows from two sources never mix even when two
+        programs with different sources share the file."""
+        return json.dumps(waSiteKey(siteIn) + (waEphemerisSource(),))
+
+    def Session(self, dateIn: datetime.datetime, siteIn: waObserverLocation):
+        """Returns the waSession for dateIn with its results loaded from the store, or computed and saved."""
+        session = waSession(dateIn, siteIn)
+        if not self.Load(session):
+            self.Save(session)
+        return session
+
+    def Load(self, sessionIn: waSession):
+        """Fills the session, its sun and its moon from the store.  Returns False if the night is not stored."""
+        row = self.connection.execute("SELECT data FROM sessions WHERE site = ? AND date = ?",
+            (self.SiteKey(sessionIn.Site), sessionIn.SessionTime1.date.date().isoformat())).fetchone()
+        if row is None:
+            return False
+        data = json.loads(row[0], object_hook=waStoreDecode)
+        sessionIn.__dict__["Events"] = data["Events"]
+        for name in ["Sun1", "Sun2", "Moon1", "Moon2"]:
+            # THE BODY STATE IS SHARED THROUGH waBodyCache, SO LATER SESSIONS ON THE SAME DAY SEE IT TOO
+            state = getattr(sessionIn, name).__dict__
+            for attribute, value in data[name].items():
+                state[attribute] = waSkyPosition(*value) if attribute == "SkyPosition" else value
+        return True
+
+    def Save(self, sessionIn: waSession):
+        """Computes all results of the session that the store keeps and writes them."""
+        data = {"Events": sessionIn.Events}
+        for name in ["Sun1", "Sun2"]:
+            body = getattr(sessionIn, name)
+            data[name] = {"SkyPosition": [body.SkyPosition.ra, body.SkyPosition.dec, body.SkyPosition.distance]}
+            try:
+                data[name]["Events"] = body.Events
+            except ValueError: # THE HOUR ANGLE METHOD OF waSun FAILS WHERE THE SUN DOES NOT RISE OR SET
+                pass
+        for name in ["Moon1", "Moon2"]:
+            body = getattr(sessionIn, name)
+            data[name] = {"Events": body.Events, "SkyPosition": [body.SkyPosition.ra, body.SkyPosition.dec, body.SkyPosition.distance],
+                          "IlluminatedFraction": body.IlluminatedFraction, "Phases": body.Phases}
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO sessions VALUES (?, ?, ?)",
+                (self.SiteKey(sessionIn.Site), sessionIn.SessionTime1.date.date().isoformat(), json.dumps(data, default=waStoreEncode)))
+        return
+
+    def GetNights(self, siteIn: waObserverLocation, datesIn: list):
+        """Stored outlook rows of waOutlookWindow for the dates given, as a dictionary by date."""
+        rows = self.connection.execute("SELECT date, data FROM outlook WHERE site = ? AND date IN ({})".format(",".join("?" * len(datesIn))),
+            [self.SiteKey(siteIn)] + [date.isoformat() for date in datesIn]).fetchall()
+        return {datetime.date.fromisoformat(date): json.loads(data, object_hook=waStoreDecode) for date, data in rows}
+
+    def PutNights(self, siteIn: waObserverLocation, rowsIn: list):
+        """Writes outlook rows of waOutlookWindow."""
+        siteKey = self.SiteKey(siteIn)
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO outlook VALUES (?, ?, ?)",
+                [(siteKey, row["Date"].isoformat(), json.dumps(row, default=waStoreEncode)) for row in rowsIn])
+        return
+
+#
+#  OUTLOOK
+#
+# PER-PROCESS CACHE OF OUTLOOK NIGHTS KEYED BY SITE AND LOCAL DATE
+waOutlookCache = waEphemerisCache(maxsizeIn=1024)
+
+class waOutlookWindow():
+    """Darkness outlook over consecutive nights.  Each night is kept as a row keyed by site and date,
+    so moving the window computes only the nights not already known and revisited dates reuse earlier rows.
+    Nights missing from the cache are read from the session store if one is given, and the rest are
+    computed together by waDarknessCalendar."""
+    def __init__(self, nightsIn: int = 7, cacheIn: waEphemerisCache = None, storeIn: waSessionStore = None):
+        self.nights = nightsIn
+        self.cache = cacheIn if cacheIn is not None else waOutlookCache
+        self.store = storeIn
+
+    def Nights(self, startDateIn, siteIn: waObserverLocation):
+        """Rows for the nights starting on the date of startDateIn.  Each row is a dictionary of Date,
+        Darkness from, Darkness to, Duration (hours), Illumination and MoonConstellation."""
+        startDate = startDateIn.date() if isinstance(startDateIn, datetime.datetime) else startDateIn
+        dates = [startDate + datetime.timedelta(days=d) for d in range(self.nights)]
+        keys = [waSiteKey(siteIn) + (date,) for date in dates]
+        rows = [self.cache.Get(key) for key in keys]
+        missing = [i for i, row in enumerate(rows) if row is None]
+        if missing and self.store is not None:
+            stored = self.store.GetNights(siteIn, [dates[i] for i in missing])
+            for i in missing:
+                if dates[i] in stored:
+                    rows[i] = stored[dates[i]]
+                    self.cache.Put(keys[i], rows[i])
+            missing = [i for i in missing if rows[i] is None]
+        if missing:
+            # ONE BATCHED PASS OVER THE SPAN OF MISSING NIGHTS
+            calendar = waDarknessCalendar(dates[missing[0]], missing[-1] - missing[0] + 1, siteIn)
+            for i in missing:
+                c = i - missing[0]
+                rows[i] = {"Date": dates[i],
+                           "Darkness from": calendar["Darkness from"][c].astype(datetime.datetime),
+                           "Darkness to": calendar["Darkness to"][c].astype(datetime.datetime),
+                           "Duration": float(calendar["Duration"][c]),
+                           "Illumination": float(calendar["Illumination"][c]),
+                           "MoonConstellation": str(calendar["MoonConstellation"][c])}
+                self.cache.Put(keys[i], rows[i])
+            if self.store is not None:
+                self.store.PutNights(siteIn, [rows[i] for i in missing])
+        return rows
+
+#
+#  PLANETS
+#
+WA_PLANET_NAMES = ["Mercury", "Venus", "Mars", "Jupiter", "Saturn", "Uranus", "Neptune"]
+WA_PLANET_HORIZON = -0.5667 # ALTITUDE OF A PLANET AT RISE AND SET, ALLOWING FOR REFRACTION ONLY
+WA_UNITS_LIGHT_TIME_DAYS = 0.0057755183 # DAYS FOR LIGHT TO TRAVEL ONE ASTRONOMICAL UNIT
+WA_PLANET_NODE_DAYS = 0.5 # SPACING OF THE NODES OF INTERPOLATED HELIOCENTRIC POSITIONS
+
+# TERMS OF THE TRUNCATED VSOP87 SERIES BY PLANET, LOADED FROM wjnaPlanets.csv ON FIRST USE
+waPlanetSeries = None
+
+def waLoadPlanetSeries(filenameIn: str = "wjnaPlanets.csv"):
+    """Reads the truncated VSOP87D series of Bretagnon and Francou.  Each row is one term A cos(B + C tau) of the
+    heliocentric L, B (radians) or R (AU) series of a planet, multiplied by tau to the power of the row.
+    Returns a dictionary by planet of the term arrays A, B, C and Column, and the number of columns.  Each
+    series power has a column, so one matrix product sums every series of a planet."""
+    with open(filenameIn, "rt", newline="") as seriesfile:
+        rows = list(csv.DictReader(seriesfile))
+    series = {}
+    for planet in dict.fromkeys(row["Planet"] for row in rows):
+        terms = [row for row in rows if row["Planet"] == planet]
+        powers = 1 + max(int(row["Power"]) for row in terms)
+        series[planet] = {"A": np.array([float(row["A"]) for row in terms]),
+                          "B": np.array([float(row["B"]) for row in terms]),
+                          "C": np.array([float(row["C"]) for row in terms]),
+                          "Column": np.array(["LBR".index(row["Series"]) * powers + int(row["Power"]) for row in terms]),
+                          "Powers": powers}
+    return series
+
+def waHeliocentricPositions(nameIn: str, jdIn):
+    """Heliocentric ecliptic longitude and latitude in radians and radius vector in AU of a planet, or of the
+    Earth, for an array of Julian dates.  Ecliptic and equinox of the date, Jean Meeus chapter 32."""
+    global waPlanetSeries
+    if waPlanetSeries is None:
+        waPlanetSeries = waLoadPlanetSeries()
+    series = waPlanetSeries[nameIn]
+    tau = (np.asarray(jdIn, dtype=float) - 2451545.0) / 365250 # JULIAN MILLENNIA FROM J2000.0
+    powers = series["Powers"]
+    weights = np.zeros((len(series["A"]), 3 * powers))
+    weights[np.arange(len(series["A"])), series["Column"]] = series["A"]
+    # EVERY TERM AT EVERY INSTANT, SUMMED BY SERIES AND POWER, THEN BY POWERS OF TAU
+    sums = np.cos(series["B"] + np.multiply.outer(tau, series["C"])) @ weights
+    sums = sums.reshape(tau.shape + (3, powers)) @ np.power.outer(tau, np.arange(powers))[..., np.newaxis]
+    return sums[..., 0, 0], sums[..., 1, 0], sums[..., 2, 0]
+
+def waRectangular(longitudeIn, latitudeIn, radiusIn):
+    """Rectangular coordinates of spherical coordinates in radians, stacked in the last axis."""
+    return np.stack((radiusIn * np.cos(latitudeIn) * np.cos(longitudeIn),
+                     radiusIn * np.cos(latitudeIn) * np.sin(longitudeIn),
+                     radiusIn * np.sin(latitudeIn)), axis=-1)
+
+def waNodeSpan(jdIn):
+    """Julian date of the first of the nodes every WA_PLANET_NODE_DAYS days that span an array of Julian dates with a
+    node to spare on each side, and the number of nodes."""
+    startJD = np.floor(np.min(jdIn)) - WA_PLANET_NODE_DAYS
+    return startJD, int((np.max(jdIn) - startJD) / WA_PLANET_NODE_DAYS) + 3
+
+def waCubicInterpolate(nodeValuesIn, xIn):
+    """Four point (cubic) Lagrange interpolation of rows of values at unit spaced nodes, at fractional node
+    positions xIn with at least one node before and two after each."""
+    x = np.asarray(xIn, dtype=float)
+    i = np.floor(x).astype(np.intp)
+    f = (x - i)[..., np.newaxis]
+    rows = nodeValuesIn[i[..., np.newaxis] + np.arange(-1,3)]
+    p0, p1, p2, p3 = rows[..., 0, :], rows[..., 1, :], rows[..., 2, :], rows[..., 3, :]
+    return p1 + f * ((p2 - p0)/2 + f * ((2*p0 - 5*p1 + 4*p2 - p3)/2 + f * (3*(p1 - p2) + p3 - p0)/2))
+
+def waHeliocentricRectangular(nameIn: str, jdIn):
+    """Heliocentric rectangular ecliptic coordinates in AU of a planet, or of the Earth, for an array of Julian dates.
+    When there are more instants than nodes every WA_PLANET_NODE_DAYS days across their span, the series are
+    evaluated at the nodes only and the coordinates interpolated by waCubicInterpolate."""
+    jd = np.asarray(jdIn, dtype=float)
+    if jd.size == 0 or waNodeSpan(jd)[1] >= jd.size:
+        return waRectangular(*waHeliocentricPositions(nameIn, jd))
+    startJD, nodes = waNodeSpan(jd)
+    coordinates = waRectangular(*waHeliocentricPositions(nameIn, startJD + WA_PLANET_NODE_DAYS * np.arange(nodes)))
+    return waCubicInterpolate(coordinates, (jd - startJD) / WA_PLANET_NODE_DAYS)
+
+def waPlanetPositionsBatch(timesIn, siteIn: waObserverLocation = None, namesIn: list = None):
+    """Apparent geocentric positions of planets for an array of instants in one vectorized pass per planet.
+    The Earth is evaluated once for all planets.  Each planet is corrected for light time, then reduced to the
+    FK5 system and corrected for aberration and nutation, Jean Meeus chapters 23, 32 and 33.  Returns a dictionary
+    by planet of dictionaries of arrays:  JD, ra and dec in degrees, distance in km, EclipticLongitude and
+    Elongation from the sun in degrees."""
+    jd = waBatchJulianDates(timesIn, siteIn)
+    waT = (jd - 2451545.0)/36525
+    earth = waHeliocentricRectangular("Earth", jd)
+    sunLongitude = np.arctan2(-earth[..., 1], -earth[..., 0]) # GEOMETRIC LONGITUDE OF THE SUN
+    # NUTATION AND OBLIQUITY AS FOR waSun.GetPosition
+    Omega = np.radians(125.04 - 1934.136 * waT)
+    epsilon0 = 23.43929111 + ( -46.8150 * waT -0.00059 * waT * waT + 0.001813 * waT * waT * waT)/3600.0
+    epsilon = np.radians(epsilon0 + .00256 * np.cos(Omega))
+    kappa = np.radians(20.49552/3600) # CONSTANT OF ABERRATION
+    e = 0.016708634 - 0.000042037 * waT - 0.0000001267 * waT * waT # ECCENTRICITY OF THE EARTH'S ORBIT
+    perihelion = np.radians(102.93735 + 1.71946 * waT + 0.00046 * waT * waT)
+    positions = {}
+    for name in (namesIn if namesIn is not None else WA_PLANET_NAMES):
+        geocentric = waHeliocentricRectangular(name, jd) - earth
+        distance = np.linalg.norm(geocentric, axis=-1)
+        # POSITION OF THE PLANET WHEN THE LIGHT LEFT IT
+        geocentric = waHeliocentricRectangular(name, jd - WA_UNITS_LIGHT_TIME_DAYS * distance) - earth
+        distance = np.linalg.norm(geocentric, axis=-1)
+        longitude = np.arctan2(geocentric[..., 1], geocentric[..., 0])
+        latitude = np.arcsin(geocentric[..., 2] / distance)
+        # REDUCTION TO THE FK5 SYSTEM
+        fk5 = longitude - np.radians(1.397 * waT + 0.00031 * waT * waT)
+        longitude = longitude + np.radians((-0.09033 + 0.03916 * (np.cos(fk5) + np.sin(fk5)) * np.tan(latitude))/3600)
+        latitude = latitude + np.radians(0.03916 * (np.cos(fk5) - np.sin(fk5))/3600)
+        # ANNUAL ABERRATION
+        longitude, latitude = longitude + kappa * (e * np.cos(perihelion - longitude) - np.cos(sunLongitude - longitude)) / np.cos(latitude), \
+            latitude - kappa * np.sin(latitude) * (np.sin(sunLongitude - longitude) - e * np.sin(perihelion - longitude))
+        # NUTATION IN LONGITUDE
+        longitude = longitude + np.radians(-0.00478 * np.sin(Omega))
+        ra = np.degrees(np.arctan2(np.sin(longitude) * np.cos(epsilon) - np.tan(latitude) * np.sin(epsilon), np.cos(longitude))) % 360
+        dec = np.degrees(np.arcsin(np.sin(latitude) * np.cos(epsilon) + np.cos(latitude) * np.sin(epsilon) * np.sin(longitude)))
+        elongation = np.degrees(np.arccos(np.clip(-np.sum(geocentric * earth, axis=-1) / (distance * np.linalg.norm(earth, axis=-1)), -1, 1)))
+        positions[name] = {"JD": jd, "ra": ra, "dec": dec, "distance": distance * WA_UNITS_AU_TO_KM,
+                           "EclipticLongitude": np.degrees(longitude) % 360, "Elongation": elongation}
+    return positions
+
+def waPlanetPositionBatch(nameIn: str, timesIn, siteIn: waObserverLocation = None):
+    """Apparent geocentric position of one planet for an array of instants.  See waPlanetPositionsBatch."""
+    return waPlanetPositionsBatch(timesIn, siteIn, [nameIn])[nameIn]
+
+def waFirstInNights(jdIn, startJDIn: float, nightsIn: int, siteIn: waObserverLocation):
+    """Local datetime64 of the first of a sorted array of Julian dates in each of nightsIn nights, where night n
+    runs from startJDIn + n to the next.  NaT for nights without one."""
+    jd = np.asarray(jdIn, dtype=float)
+    firsts = np.full(nightsIn, np.datetime64("NaT"), dtype="datetime64[us]")
+    night, first = np.unique(np.floor(jd - startJDIn).astype(int), return_index=True)
+    keep = (night >= 0) & (night < nightsIn)
+    firsts[night[keep]] = waLocalDatetimes(jd[first[keep]], siteIn)
+    return firsts
+
+def waLastInNights(jdIn, startJDIn: float, nightsIn: int, siteIn: waObserverLocation):
+    """Local datetime64 of the last of a sorted array of Julian dates in each of nightsIn nights, as waFirstInNights."""
+    jd = np.asarray(jdIn, dtype=float)[::-1]
+    lasts = np.full(nightsIn, np.datetime64("NaT"), dtype="datetime64[us]")
+    night, last = np.unique(np.floor(jd - startJDIn).astype(int), return_index=True)
+    keep = (night >= 0) & (night < nightsIn)
+    lasts[night[keep]] = waLocalDatetimes(jd[last[keep]], siteIn)
+    return lasts
+
+def waPlanetEventsBatch(nameIn: str, startDateIn: datetime.date, nightsIn: int, siteIn: waObserverLocation):
+    """Rise, transit and set of a planet on nightsIn nights starting on the local date startDateIn.  A night runs
+    from local noon to the next noon.  Rise and set are crossings of WA_PLANET_HORIZON and transit is the upper
+    crossing of the meridian, each found for every night at once by waAltitudeCrossings.  The position is interpolated
+    between nodes every WA_PLANET_NODE_DAYS days, as in waHeliocentricRectangular.  Returns a dictionary of
+    arrays with one entry per night:  Rise, Transit and Set (local datetime64, NaT if the event does not occur)."""
+    startJD = waJulianDate(datetime.datetime(startDateIn.year, startDateIn.month, startDateIn.day, 12) - datetime.timedelta(hours=waUTCOffsetHours(siteIn)))
+    endJD = startJD + nightsIn
+    # THE SOLVER INTERPOLATES RA, DEC AND DISTANCE FROM NODES EVALUATED ONCE ACROSS THE NIGHTS
+    nodeJD, nodes = waNodeSpan(np.array([startJD, endJD]))
+    position = waPlanetPositionBatch(nameIn, nodeJD + WA_PLANET_NODE_DAYS * np.arange(nodes))
+    track = np.stack((np.unwrap(position["ra"], period=360), position["dec"], position["distance"]), axis=-1)
+    def waTrack(jdIn):
+        return waCubicInterpolate(track, (jdIn - nodeJD) / WA_PLANET_NODE_DAYS)
+    def waTrackAltitudes(jdIn):
+        values = waTrack(jdIn)
+        altitude = waHorizontalCoordinates(values[..., 0], values[..., 1], waLocalSiderealTimes(jdIn, siteIn.EarthPosition.longitude),
+            siteIn.EarthPosition.latitude)[0]
+        return altitude - np.degrees(np.arcsin(siteIn.EarthPosition.radiusEquatorial / values[..., 2] * np.cos(np.radians(altitude))))
+    def waSineHourAngle(jdIn):
+        # THE SINE OF THE HOUR ANGLE RISES THROUGH ZERO AT THE UPPER TRANSIT
+        return np.sin(np.radians(15 * waLocalSiderealTimes(jdIn, siteIn.EarthPosition.longitude) - waTrack(jdIn)[..., 0]))
+    horizon = waAltitudeCrossings(waTrackAltitudes, startJD, endJD, {"Horizon": WA_PLANET_HORIZON})["Horizon"]
+    meridian = waAltitudeCrossings(waSineHourAngle, startJD, endJD, {"Meridian": 0.0})["Meridian"]
+    return {"Rise": waFirstInNights(horizon["Rise"], startJD, nightsIn, siteIn),
+            "Transit": waFirstInNights(meridian["Rise"], startJD, nightsIn, siteIn),
+            "Set": waFirstInNights(horizon["Set"], startJD, nightsIn, siteIn)}
+
+def waPlanetVisibility(startDateIn: datetime.date, nightsIn: int, siteIn: waObserverLocation, minimumAltitudeIn: float = 10.0,
+                       sunAltitudeIn: float = WA_ALTITUDE_THRESHOLDS["Nautical"], stepMinutesIn: float = 10.0, namesIn: list = None):
+    """Nightly visibility of the planets over nightsIn nights starting on the local date startDateIn.  Positions of
+    every planet are evaluated together on one grid of stepMinutesIn minutes from local noon.  Returns a dictionary by
+    planet of dictionaries of arrays with one entry per night:  Rise, Transit, Set (see waPlanetEventsBatch),
+    MaximumAltitude (degrees while the sun is below sunAltitudeIn, NaN if never), Hours above minimumAltitudeIn
+    while the sun is below sunAltitudeIn, and Elongation (degrees) and Constellation (IAU name) at local midnight."""
+    names = namesIn if namesIn is not None else WA_PLANET_NAMES
+    steps = int(round(24 * 60 / stepMinutesIn))
+    startJD = waJulianDate(datetime.datetime(startDateIn.year, startDateIn.month, startDateIn.day, 12) - datetime.timedelta(hours=waUTCOffsetHours(siteIn)))
+    jd = startJD + np.arange(nightsIn * steps).reshape(nightsIn, steps) / steps
+    dark = waAltitudes("Sun", jd, siteIn) < sunAltitudeIn
+    lst = waLocalSiderealTimes(jd, siteIn.EarthPosition.longitude)
+    positions = waPlanetPositionsBatch(jd, namesIn=names)
+    visibility = {}
+    for name in names:
+        altitude = waHorizontalCoordinates(positions[name]["ra"], positions[name]["dec"], lst, siteIn.EarthPosition.latitude)[0]
+        darkAltitude = np.where(dark, altitude, -90.0)
+        midnight = {key: values[:, steps // 2] for key, values in positions[name].items()}
+        visibility[name] = waPlanetEventsBatch(name, startDateIn, nightsIn, siteIn)
+        visibility[name].update({"MaximumAltitude": np.where(dark.any(axis=1), darkAltitude.max(axis=1), np.nan),
+                                 "Hours": np.count_nonzero(darkAltitude > minimumAltitudeIn, axis=1) * stepMinutesIn / 60,
+                                 "Elongation": midnight["Elongation"],
+                                 "Constellation": wc.waConstellations(midnight["ra"], midnight["dec"], float(midnight["JD"][0]), True)})
+    return visibility
+
+class waPlanet(waSkyObject):
+    """Planet at a session time.  The position comes from waPlanetPositionBatch and the events of the session
+    night, from local noon, from waPlanetEventsBatch."""
+    def __init__(self, nameIn, sessionTimeIn: waSessionTime):
+        cacheKey = waEphemerisKey(nameIn, sessionTimeIn)
+        cachedState = waBodyCache.Get(cacheKey)
+        if cachedState is not None:
+            self.__dict__ = cachedState # SHARE THE STATE ALREADY COMPUTED FOR THIS SITE AND INSTANT
+            return
+        super().__init__(nameIn, None, sessionTimeIn)
+        waBodyCache.Put(cacheKey, self.__dict__)
 
-        sessionEvents = {"Sunset": sunset1, "Dusk": dusk1, "Dawn": dawn2, "Sunrise": sunrise2, 
-                         "Moonrise": moonriseLatest, "Moonset": moonsetLatest,
-                         "Darkness from": darkness_start, "Darkness to": darkness_end, "Duration": darkness_duration
-                         }
-        return sessionEvents
+    def GetPosition(self, sessionTimeIn: waSessionTime):
+        position = waPlanetPositionBatch(self.name, np.array([sessionTimeIn.JulianDate]))
+        return waSkyPosition(float(position["ra"][0]), float(position["dec"][0]), float(position["distance"][0]))
+
+    def GetAltitudes(self, jdIn):
+        return waAltitudes(self.name, jdIn, self.SessionTime.location)
+
+    def GetEvents(self, skyPositionIn: waSkyPosition):
+        """Calculates the events of rise, transit and set.  None if the event does not occur."""
+        events = waPlanetEventsBatch(self.name, self.SessionTime.date.date(), 1, self.SessionTime.location)
+        return {event: None if np.isnat(times[0]) else times[0].astype(datetime.datetime) for event, times in events.items()}
+
+class waMercury(waPlanet):
+    def __init__(self, nameIn, sessionTimeIn: waSessionTime):
+        super().__init__("Mercury", sessionTimeIn)
+
+class waVenus(waPlanet):
+    def __init__(self, nameIn, sessionTimeIn: waSessionTime):
+        super().__init__("Venus", sessionTimeIn)
+
+class waMars(waPlanet):
+    def __init__(self, nameIn, sessionTimeIn: waSessionTime):
+        super().__init__("Mars", sessionTimeIn)
+
+class waJupiter(waPlanet):
+    def __init__(self, nameIn, sessionTimeIn: waSessionTime):
+        super().__init__("Jupiter", sessionTimeIn)
+
+class waSaturn(waPlanet):
+    def __init__(self, nameIn, sessionTimeIn: waSessionTime):
+        super().__init__("Saturn", sessionTimeIn)
+
+class waUranus(waPlanet):
+    def __init__(self, nameIn, sessionTimeIn: waSessionTime):
+        super().__init__("Uranus", sessionTimeIn)
+
+class waNeptune(waPlanet):
+    def __init__(self, nameIn, sessionTimeIn: waSessionTime):
+        super().__init__("Neptune", sessionTimeIn)
 
 class wjnaGlobalConfiguration():
     """Global configuration values."""
@@ -1202,6 +2395,13 @@ def wjnaLoadSettings():
     settings = json.loads(configfile.read())
     wjnaGlobalConfiguration.DST = settings["DST"]
     configfile.close()
+    # USE THE PRECOMPUTED EPHEMERIS TABLE AND MOON PHASE CATALOG IF THEY HAVE BEEN BUILT
+    ephemerisTable = settings.get("EphemerisTable")
+    if ephemerisTable and os.path.exists(ephemerisTable) and os.path.exists(waEphemerisTableHeaderName(ephemerisTable)):
+        waUseEphemerisTable(ephemerisTable)
+    phaseCatalog = settings.get("PhaseCatalog")
+    if phaseCatalog and os.path.exists(phaseCatalog):
+        waUseMoonPhaseCatalog(waMoonPhaseCatalog(filenameIn=phaseCatalog))
     # LOAD DEFINED LOCATIONS
     FILENAME = "wjnaLocations.json"
     locationsfile = open(FILENAME,"rt")
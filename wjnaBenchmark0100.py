@@ -0,0 +1,246 @@
+#####################################################################################
+####    wjnaBenchmark.py  Astrometry Engine Benchmarks
+####    Version 1, October 18, 2026
+####        Times the astrometry engine and session pipeline at every configured site
+####        and at high latitude sites, and compares the times with a saved baseline
+####    William Neubert
+#####################################################################################
+
+__version__ = "1.00"
+__author__ = "William Neubert"
+
+# IMPORT MODULES
+import argparse
+import concurrent.futures
+import datetime
+import json
+import multiprocessing
+import platform
+import sys
+import time
+import wjnaAstrometry0200 as wa
+
+#  DEFINE GLOBAL CONSTANTS
+WA_BENCHMARK_BASELINE = "wjnaBenchmark.json"
+WA_BENCHMARK_THRESHOLD = 0.25 # A CASE SLOWER THAN THE BASELINE BY MORE THAN THIS FRACTION IS A REGRESSION
+WA_BENCHMARK_DATE = datetime.date(2025,1,15) # FIXED SESSION DATE SO RUNS ARE COMPARABLE
+WA_BENCHMARK_SAMPLE_SECONDS = 0.05 # SHORT CASES ARE REPEATED FOR ABOUT THIS LONG IN EACH SAMPLE
+WA_BENCHMARK_WARMUP_RUNS = 3 # UNTIMED RUNS BEFORE CALIBRATION, SO ONE-TIME COSTS OF THE FIRST CALLS ARE NOT TIMED
+WA_BENCHMARK_PROCESSES = 3 # THE SUITE RUNS IN THIS MANY FRESH PROCESSES, AS THE SPEED OF ONE PROCESS CAN DIFFER FROM THE NEXT
+
+# SITES WHERE THE SUN OR MOON MAY NOT RISE OR SET, IN ADDITION TO THE CONFIGURED SITES
+WA_BENCHMARK_HIGH_LATITUDE_SITES = [
+    {"name": "NO-Tromso", "lat": 69.6496, "lon": 18.9560, "alt": 10, "timezone": "CET", "UTCOffset": 1},
+    {"name": "AK-Fairbanks", "lat": 64.8378, "lon": -147.7164, "alt": 136, "timezone": "AKST", "UTCOffset": -9}
+    ]
+
+#
+#  BENCHMARK CASES
+#
+# EACH CASE TAKES A SITE AND A SESSION DATE AND RETURNS A FUNCTION THAT RUNS THE WORK ONCE.
+# THE PER-PROCESS CACHES ARE CLEARED BEFORE EACH RUN SO EVERY RUN COMPUTES FROM SCRATCH.
+def wjnaCaseSessionTime(siteIn: wa.waObserverLocation, dateIn: datetime.date):
+    start = datetime.datetime.combine(dateIn, datetime.time(12,0,0))
+    def run():
+        for minute in range(0, 1440, 10):
+            sessionTime = wa.waSessionTime(start + datetime.timedelta(minutes=minute), siteIn)
+            sessionTime.JD(); sessionTime.LocalSiderealTime()
+    return run
+
+def wjnaCaseSun(siteIn: wa.waObserverLocation, dateIn: datetime.date):
+    sessionTime = wa.waSessionTime(datetime.datetime.combine(dateIn, datetime.time(12,0,0)), siteIn)
+    def run():
+        sun = wa.waSun("Sun", sessionTime)
+        sun.SkyPosition; sun.Events
+    return run
+
+def wjnaCaseMoonPosition(siteIn: wa.waObserverLocation, dateIn: datetime.date):
+    sessionTime = wa.waSessionTime(datetime.datetime.combine(dateIn, datetime.time(12,0,0)), siteIn)
+    moon = wa.waMoon("Moon", sessionTime)
+    def run():
+        moon.GetPosition3(sessionTime)
+    return run
+
+def wjnaCaseMoonPhases(siteIn: wa.waObserverLocation, dateIn: datetime.date):
+    sessionTime = wa.waSessionTime(datetime.datetime.combine(dateIn, datetime.time(12,0,0)), siteIn)
+    moon = wa.waMoon("Moon", sessionTime)
+    def run():
+        moon.GetPhases(sessionTime)
+    return run
+
+def wjnaCaseSession(siteIn: wa.waObserverLocation, dateIn: datetime.date):
+    def run():
+        session = wa.waSession(datetime.datetime.combine(dateIn, datetime.time(12,0,0)), siteIn)
+        session.Events; session.Moon1.IlluminatedFraction; session.Moon1.Phases
+    return run
+
+def wjnaCaseOutlook(nightsIn: int):
+    # THE OUTLOOK TABLE OF THE GRAPHICAL PROGRAM, WITHOUT THE SESSION STORE
+    def case(siteIn: wa.waObserverLocation, dateIn: datetime.date):
+        def run():
+            wa.waOutlookWindow(nightsIn, cacheIn=wa.waEphemerisCache(maxsizeIn=nightsIn)).Nights(dateIn, siteIn)
+        return run
+    return case
+
+WA_BENCHMARK_CASES = {
+    "SessionTime": wjnaCaseSessionTime,
+    "Sun": wjnaCaseSun,
+    "MoonPosition3": wjnaCaseMoonPosition,
+    "MoonPhases": wjnaCaseMoonPhases,
+    "Session": wjnaCaseSession,
+    "Outlook7": wjnaCaseOutlook(7),
+    "Outlook30": wjnaCaseOutlook(30),
+    "Outlook365": wjnaCaseOutlook(365)
+    }
+
+#
+#  FUNCTIONS
+#
+def wjnaBenchmarkSites():
+    """Configured sites from wjnaLocations.json followed by the high latitude sites.  The live series and the
+    default phase catalog are used even if an ephemeris table or catalog file is configured, so results do not
+    depend on local files.  The catalog is built here, so its one-time cost is not part of any case."""
+    Configuration, LocationList = wa.wjnaLoadSettings()
+    wa.waUseEphemerisTable(None)
+    wa.waUseMoonPhaseCatalog()
+    sites = list(LocationList)
+    for site in WA_BENCHMARK_HIGH_LATITUDE_SITES:
+        sites.append(wa.waObserverLocation(site["name"], wa.waEarthPosition(site["lat"], site["lon"], site["alt"]),
+                                           site["timezone"], site["UTCOffset"], False))
+    return sites
+
+def wjnaSample(runIn, runsIn: int):
+    """Mean time in seconds of runsIn runs, clearing the per-process caches before every run."""
+    start = time.perf_counter()
+    for run in range(runsIn):
+        wa.waBodyCache.Clear()
+        wa.waOutlookCache.Clear()
+        runIn()
+    return (time.perf_counter() - start) / runsIn
+
+def wjnaCalibrate(runIn, sampleSecondsIn: float = WA_BENCHMARK_SAMPLE_SECONDS):
+    """Runs per sample that take about sampleSecondsIn seconds, after WA_BENCHMARK_WARMUP_RUNS untimed runs that
+    take the one-time costs of the first calls, then as many timed warm runs."""
+    wjnaSample(runIn, WA_BENCHMARK_WARMUP_RUNS)
+    return max(1, int(sampleSecondsIn / max(wjnaSample(runIn, WA_BENCHMARK_WARMUP_RUNS), 1e-9)))
+
+def wjnaSummarizeSamples(timesIn: list, runsIn: int):
+    times = sorted(timesIn)
+    return {"Best": times[0], "Median": times[len(times) // 2], "Runs": runsIn}
+
+def wjnaTimeCase(runIn, repeatIn: int, sampleSecondsIn: float = WA_BENCHMARK_SAMPLE_SECONDS, runsIn: int = None):
+    """Best and median time in seconds of one run over repeatIn samples.  Each sample repeats the run runsIn
+    times, or as many as wjnaCalibrate finds, so short cases are not lost in timer noise."""
+    runs = runsIn if runsIn else wjnaCalibrate(runIn, sampleSecondsIn)
+    return wjnaSummarizeSamples([wjnaSample(runIn, runs) for repeat in range(repeatIn)], runs)
+
+def wjnaRunBenchmarks(casesIn: list, sitesIn: list, dateIn: datetime.date, repeatIn: int, baselineIn: dict = None):
+    """Times every case at every site.  The samples are taken in rounds of one sample of every case, so a slow
+    spell of the machine falls on all cases alike rather than on the few timed during it.  A case in the baseline
+    results baselineIn is repeated as many times in each sample as it was there, and is otherwise calibrated.
+    Returns a dictionary keyed by case/site of the sample Times and Runs, or of the error if the case fails at the site."""
+    results = {}; cases = {}
+    for name in casesIn:
+        for site in sitesIn:
+            key = "{}/{}".format(name, site.name)
+            try:
+                run = WA_BENCHMARK_CASES[name](site, dateIn)
+                runs = (baselineIn or {}).get(key, {}).get("Runs")
+                if runs:
+                    wjnaSample(run, WA_BENCHMARK_WARMUP_RUNS)
+                cases[key] = (run, runs or wjnaCalibrate(run))
+            except Exception as error:
+                results[key] = {"Error": "{}: {}".format(type(error).__name__, error)}
+    for key, (run, runs) in cases.items():
+        results[key] = {"Times": [], "Runs": runs}
+    for repeat in range(repeatIn):
+        for key, (run, runs) in cases.items():
+            results[key]["Times"].append(wjnaSample(run, runs))
+    return results
+
+def wjnaBenchmarkProcess(casesIn: list, siteNamesIn: list, dateIn: datetime.date, repeatIn: int, baselineIn: dict = None):
+    """wjnaRunBenchmarks at the sites named in siteNamesIn, or at all sites if None, for a fresh process."""
+    sites = wjnaBenchmarkSites()
+    if siteNamesIn:
+        names = [name.lower() for name in siteNamesIn]
+        sites = [site for site in sites if site.name.lower() in names]
+    return wjnaRunBenchmarks(casesIn, sites, dateIn, repeatIn, baselineIn)
+
+def wjnaRunProcesses(casesIn: list, siteNamesIn: list, dateIn: datetime.date, repeatIn: int, processesIn: int = WA_BENCHMARK_PROCESSES,
+                     baselineIn: dict = None):
+    """Runs the suite in processesIn fresh processes one after another, or in this process if processesIn is 0, and
+    combines the samples of every case.  Without a baseline the first process calibrates the repeats of the rest.
+    Returns a dictionary keyed by case/site of the best and median times over all samples, or of the error."""
+    passes = []
+    for process in range(max(1, processesIn)):
+        baseline = baselineIn if baselineIn or not passes else passes[0]
+        if processesIn:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                passes.append(executor.submit(wjnaBenchmarkProcess, casesIn, siteNamesIn, dateIn, repeatIn, baseline).result())
+        else:
+            passes.append(wjnaBenchmarkProcess(casesIn, siteNamesIn, dateIn, repeatIn, baseline))
+    results = {}
+    for key, result in passes[0].items():
+        if "Error" in result:
+            results[key] = result
+        else:
+            results[key] = wjnaSummarizeSamples([sample for each in passes for sample in each[key].get("Times", [])], result["Runs"])
+    return results
+
+def wjnaCompareBaseline(resultsIn: dict, baselineIn: dict, thresholdIn: float):
+    """Lists the cases whose median time exceeds the baseline median time by more than thresholdIn, as tuples of key,
+    baseline and current time.  Cases missing from either run or failing in either are not compared."""
+    regressions = []
+    for key, result in resultsIn.items():
+        baseline = baselineIn.get(key, {})
+        if "Median" in result and "Median" in baseline and result["Median"] > baseline["Median"] * (1 + thresholdIn):
+            regressions.append((key, baseline["Median"], result["Median"]))
+    return regressions
+
+def wjnaBenchmarkParser():
+    parser = argparse.ArgumentParser(description="Benchmarks of the astrometry engine and session pipeline.")
+    parser.add_argument("--cases", default=",".join(WA_BENCHMARK_CASES), help="comma separated cases (default all)")
+    parser.add_argument("--sites", default=None, help="comma separated site names (default all)")
+    parser.add_argument("--date", type=lambda text: datetime.datetime.strptime(text, "%Y-%m-%d").date(), default=WA_BENCHMARK_DATE,
+                        help="session date, YYYY-MM-DD (default {})".format(WA_BENCHMARK_DATE.isoformat()))
+    parser.add_argument("--repeat", type=int, default=7, help="samples of each case in each process, the median of all is compared (default 7)")
+    parser.add_argument("--processes", type=int, default=WA_BENCHMARK_PROCESSES,
+                        help="fresh processes that run the suite, 0 for this one (default {})".format(WA_BENCHMARK_PROCESSES))
+    parser.add_argument("--baseline", default=WA_BENCHMARK_BASELINE, help="baseline file (default {})".format(WA_BENCHMARK_BASELINE))
+    parser.add_argument("--threshold", type=float, default=WA_BENCHMARK_THRESHOLD,
+                        help="slowdown fraction flagged as a regression (default {})".format(WA_BENCHMARK_THRESHOLD))
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    return parser
+
+def main(argv=None):
+    args = wjnaBenchmarkParser().parse_args(argv)
+    try:
+        with open(args.baseline, "rt") as baselinefile:
+            baseline = json.load(baselinefile)
+    except FileNotFoundError:
+        baseline = {"Results": {}}
+    # A NEW BASELINE CALIBRATES ITS OWN REPEATS
+    results = wjnaRunProcesses(args.cases.split(","), args.sites.split(",") if args.sites else None, args.date, args.repeat,
+                               args.processes, None if args.save else baseline["Results"])
+
+    print("{:<36} {:>11} {:>11} {:>11}".format("Case/Site", "Best ms", "Median ms", "Baseline ms"))
+    for key, result in results.items():
+        if "Error" in result:
+            print("{:<36} {}".format(key, result["Error"]))
+            continue
+        median = baseline["Results"].get(key, {}).get("Median")
+        print("{:<36} {:>11.3f} {:>11.3f} {:>11}".format(key, 1000*result["Best"], 1000*result["Median"],
+            "--" if median is None else "{:.3f}".format(1000*median)))
+    regressions = wjnaCompareBaseline(results, baseline["Results"], args.threshold)
+    for key, before, after in regressions:
+        print("REGRESSION {}:  {:.3f} ms to {:.3f} ms ({:+.0f}%)".format(key, 1000*before, 1000*after, 100*(after/before - 1)))
+
+    if args.save:
+        with open(args.baseline, "wt") as baselinefile:
+            json.dump({"Date": args.date.isoformat(), "Repeat": args.repeat, "Processes": args.processes, "Python": platform.python_version(),
+                       "Machine": platform.machine(), "Astrometry": wa.__version__, "Results": results}, baselinefile, indent=1)
+        print("Saved the baseline to {}".format(args.baseline))
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,289 @@
+#####################################################################################
+####    wjnaCommandLine.py  Headless Darkness Command Line Tool
+####    Version 1, October 18, 2026
+####        Darkness summary of all configured sites ranked by darkness duration
+####        Builds the precomputed Sun and Moon ephemeris table and moon phase catalog
+####        Session and outlook of one site through the shared session store
+####        Best nights of one site from the darkness index
+####        Imaging target schedule over a range of nights
+####        Darkness report of a range of nights streamed as CSV or JSON Lines
+####    William Neubert
+#####################################################################################
+
+__version__ = "1.00"
+__author__ = "William Neubert"
+
+# IMPORT MODULES
+import argparse
+import csv
+import datetime
+import json
+import sys
+import wjnaAstrometry0200 as wa
+import wjnaTargets0100 as wt
+
+#  DEFINE GLOBAL CONSTANTS
+WA_REPORT_FIELDS = ["Site", "Date", "Sunset", "Dusk", "Darkness from", "Darkness to", "Dawn", "Sunrise",
+                    "Moonrise", "Moonset", "Duration", "Illumination", "MoonConstellation"]
+
+#
+#  FUNCTIONS
+#
+def wjnaParseDate(dateIn: str):
+    """Parses a YYYY-MM-DD command line date."""
+    return datetime.datetime.strptime(dateIn, "%Y-%m-%d").date()
+
+def wjnaFormatTime(timeIn, formatIn: str = "%m/%d %H:%M"):
+    """Formats an event time, or dashes if the event does not occur."""
+    if timeIn is None:
+        return "--"
+    return timeIn.strftime(formatIn)
+
+def wjnaCommandSites(args):
+    """Ranks every site in wjnaLocations.json by darkness duration."""
+    Configuration, LocationList = wa.wjnaLoadSettings()
+    if args.dst:
+        for location in LocationList:
+            location.DST = True
+    if args.nights < 1:
+        raise SystemExit("The number of nights must be at least 1.")
+    summaries = wa.waMultiSiteDarkness(LocationList, args.date, args.nights, args.workers)
+
+    print("Darkness from {} for {} night(s), {} site(s)".format(args.date.isoformat(), args.nights, len(summaries)))
+    print("{:>4}  {:<24} {:>11} {:>11} {:>9} {:>9}".format("Rank", "Site", "From", "To", "Tonight", "Total"))
+    for summary in summaries:
+        print("{:>4}  {:<24} {:>11} {:>11} {:>9} {:>9}".format(summary["Rank"], summary["Site"][:24],
+            wjnaFormatTime(summary["Darkness from"]), wjnaFormatTime(summary["Darkness to"]),
+            wa.waDecimalToDHMS(summary["Duration"],24,"HM"), wa.waDecimalToDHMS(summary["Total"],24,"HM")))
+    return
+
+def wjnaFindSite(siteIn: str, locationsIn: list):
+    """Finds a configured site by name, or the first site if no name is given."""
+    if siteIn is None:
+        return locationsIn[0]
+    for location in locationsIn:
+        if location.name.lower() == siteIn.lower():
+            return location
+    raise SystemExit("Unknown site {}.  Sites are:  {}".format(siteIn, ", ".join(location.name for location in locationsIn)))
+
+def wjnaCommandSession(args):
+    """Prints the session and outlook of one site, using the session store shared with the graphical program."""
+    Configuration, LocationList = wa.wjnaLoadSettings()
+    site = wjnaFindSite(args.site, LocationList)
+    if args.dst:
+        site.DST = True
+    cacheFile = args.cache if args.cache is not None else Configuration.get("SessionCache")
+    store = wa.waSessionStore(cacheFile) if cacheFile else None
+    sessionDate = datetime.datetime.combine(args.date, datetime.time(12,0,0))
+    session = store.Session(sessionDate, site) if store is not None else wa.waSession(sessionDate, site)
+
+    print("{}  {}".format(site.name, args.date.isoformat()))
+    for name in ["Sunset", "Dusk", "Darkness from", "Darkness to", "Dawn", "Sunrise"]:
+        print("{:<14} {}".format(name, wjnaFormatTime(session.Events[name], "%Y-%m-%d %H:%M")))
+    print("{:<14} {}".format("Duration", wa.waDecimalToDHMS(session.Events["Duration"],24,"HM")))
+    print("{:<14} {:.0f}%".format("Illumination", 100*session.Moon1.IlluminatedFraction))
+    print(session.Moon1.Events["Description"])
+    print(session.Moon2.Events["Description"])
+    for phase in session.Moon1.Phases:
+        print("{:<14} {}".format(phase[0], phase[1].strftime("%Y-%m-%d %H:%M")))
+    if args.nights > 1:
+        print()
+        for night in wa.waOutlookWindow(args.nights, storeIn=store).Nights(args.date, site):
+            print("{}  {} {}  {:>8}  {} {:.0f}%".format(night["Date"].strftime("%Y-%m-%d %a"),
+                night["Darkness from"].strftime("%H:%M"), night["Darkness to"].strftime("%H:%M"),
+                wa.waDecimalToDHMS(night["Duration"],24,"HM"), night["MoonConstellation"], 100*night["Illumination"]))
+    if store is not None:
+        store.Close()
+    return
+
+def wjnaCommandBest(args):
+    """Lists the best nights of one site from the darkness index."""
+    Configuration, LocationList = wa.wjnaLoadSettings()
+    site = wjnaFindSite(args.site, LocationList)
+    if args.dst:
+        site.DST = True
+    end = args.end if args.end is not None else args.start + datetime.timedelta(days=365)
+    if end < args.start:
+        raise SystemExit("The end date {} is before the start date {}.".format(end.isoformat(), args.start.isoformat()))
+    index = wa.waDarknessIndex(site, args.start, (end - args.start).days + 1)
+    nights = index.Query(args.start, end, args.min_hours, args.max_illumination, args.weekends, args.top)
+
+    print("Best nights at {} from {} to {}".format(site.name, args.start.isoformat(), end.isoformat()))
+    print("{:<15} {:>6} {:>6} {:>9} {:>9} {:>9}  {}".format("Night", "From", "To", "Longest", "Darkness", "Night", "Moon"))
+    for night in nights:
+        print("{:<15} {:>6} {:>6} {:>9} {:>9} {:>9}  {} {:.0f}%".format(night["Date"].strftime("%Y-%m-%d %a"),
+            wjnaFormatTime(night["Darkness from"], "%H:%M"), wjnaFormatTime(night["Darkness to"], "%H:%M"),
+            wa.waDecimalToDHMS(night["Longest"],24,"HM"), wa.waDecimalToDHMS(night["Duration"],24,"HM"),
+            wa.waDecimalToDHMS(night["Night"],24,"HM"),
+            night["MoonConstellation"], 100*night["Illumination"]))
+    return
+
+def wjnaCommandSchedule(args):
+    """Allocates the darkness of a range of nights to imaging targets and writes the plan."""
+    Configuration, LocationList = wa.wjnaLoadSettings()
+    site = wjnaFindSite(args.site, LocationList)
+    if args.dst:
+        site.DST = True
+    catalog = wt.waTargetCatalog(args.catalog)
+    targets = catalog.Find(args.targets.split(","))
+    schedule = wt.waScheduleTargets(catalog, targets, args.start, args.nights, site, args.hours, args.min_altitude, args.min_separation)
+    if args.csv:
+        wt.waScheduleToCSV(catalog, schedule, args.csv)
+        print("Wrote {} blocks to {}".format(len(schedule["Night"]), args.csv))
+        return
+    for night, target, start, end in zip(schedule["Night"], schedule["Target"], schedule["Start"], schedule["End"]):
+        print("{}  {:<10} {} to {}".format(night, catalog.Label(target),
+            start.astype(datetime.datetime).strftime("%H:%M"), end.astype(datetime.datetime).strftime("%H:%M")))
+    return
+
+def wjnaReportSite(args):
+    """The site of a report, from --lat and --lon if given, otherwise by name from wjnaLocations.json."""
+    if args.lat is not None or args.lon is not None:
+        if args.lat is None or args.lon is None:
+            raise SystemExit("Both --lat and --lon are needed for a site by position.")
+        site = wa.waObserverLocation(args.name, wa.waEarthPosition(args.lat, args.lon, args.alt), args.timezone, args.utc_offset, args.dst)
+        return site
+    Configuration, LocationList = wa.wjnaLoadSettings()
+    site = wjnaFindSite(args.site, LocationList)
+    if args.dst:
+        site.DST = True
+    return site
+
+def wjnaReportRecords(siteIn: wa.waObserverLocation, startDateIn: datetime.date, endDateIn: datetime.date):
+    """Yields one report record per night with the fields of WA_REPORT_FIELDS as text and numbers.
+    Times are local ISO date and time to the minute, or empty for an event that does not occur."""
+    for night in wa.waDarknessNights(startDateIn, endDateIn, siteIn):
+        record = {"Site": siteIn.name, "Date": night["Date"].isoformat()}
+        for name in ["Sunset", "Dusk", "Darkness from", "Darkness to", "Dawn", "Sunrise", "Moonrise", "Moonset"]:
+            record[name] = "" if night[name] is None else night[name].strftime("%Y-%m-%dT%H:%M")
+        record["Duration"] = round(night["Duration"], 3)
+        record["Illumination"] = round(night["Illumination"], 3)
+        record["MoonConstellation"] = night["MoonConstellation"]
+        yield record
+
+def wjnaWriteReport(recordsIn, formatIn: str, streamIn):
+    """Writes each record as it arrives as a CSV row or a JSON line, so a reader sees every night as soon as it is
+    computed.  Returns the number of records written."""
+    count = 0
+    if formatIn == "csv":
+        writer = csv.DictWriter(streamIn, fieldnames=WA_REPORT_FIELDS, lineterminator="\n")
+        writer.writeheader()
+    for record in recordsIn:
+        if formatIn == "csv":
+            writer.writerow(record)
+        else:
+            streamIn.write(json.dumps(record) + "\n")
+        streamIn.flush()
+        count += 1
+    return count
+
+def wjnaCommandReport(args):
+    """Streams the darkness of every night of a date range at one site as CSV or JSON Lines."""
+    site = wjnaReportSite(args)
+    if args.nights is not None and args.nights < 1:
+        raise SystemExit("The number of nights must be at least 1.")
+    end = args.end if args.end is not None else args.start + datetime.timedelta(days=(args.nights or 365) - 1)
+    if end < args.start:
+        raise SystemExit("The end date {} is before the start date {}.".format(end.isoformat(), args.start.isoformat()))
+    records = wjnaReportRecords(site, args.start, end)
+    if args.output is None or args.output == "-":
+        try:
+            wjnaWriteReport(records, args.format, sys.stdout)
+        except BrokenPipeError: # THE READER, SUCH AS head, STOPPED EARLY
+            sys.stderr.close()
+        return
+    with open(args.output, "wt", newline="") as reportfile:
+        count = wjnaWriteReport(records, args.format, reportfile)
+    print("Wrote {} nights to {}".format(count, args.output))
+    return
+
+def wjnaCommandEphemeris(args):
+    """Builds the precomputed Sun and Moon ephemeris table, verifies it against the live series and builds the moon phase catalog."""
+    header = wa.waBuildEphemerisTable(args.file, args.start, args.end, args.step)
+    print("Wrote {} rows for {} to {} at {} hour steps to {}".format(header["Rows"], header["StartYear"], header["EndYear"], args.step, args.file))
+    errors = wa.waEphemerisTable(args.file).Verify()
+    for name in wa.WA_EPHEMERIS_TABLE_COLUMNS:
+        tolerance = wa.WA_EPHEMERIS_TABLE_TOLERANCE_DISTANCE if name.endswith("Distance") else wa.WA_EPHEMERIS_TABLE_TOLERANCE_DEGREES
+        print("{:<14} max error {:.3e}  tolerance {:.1e}".format(name, errors[name], tolerance))
+    print("Verified" if errors["Passed"] else "FAILED VERIFICATION")
+    catalog = wa.waMoonPhaseCatalog(args.start, args.end)
+    catalog.Save(args.phases)
+    print("Wrote {} moon phases to {}".format(len(catalog), args.phases))
+    return
+
+def wjnaCommandLineParser():
+    parser = argparse.ArgumentParser(description="Darkness calculations without the graphical display.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    sites = commands.add_parser("sites", help="rank all configured sites by darkness duration")
+    sites.add_argument("--date", type=wjnaParseDate, default=datetime.date.today(), help="first night, YYYY-MM-DD (default tonight)")
+    sites.add_argument("--nights", type=int, default=1, help="number of nights (default 1)")
+    sites.add_argument("--workers", type=int, default=None, help="worker processes (default one per core)")
+    sites.add_argument("--dst", action="store_true", help="use daylight savings time at every site")
+    sites.set_defaults(function=wjnaCommandSites)
+
+    session = commands.add_parser("session", help="darkness session and outlook of one site")
+    session.add_argument("--site", default=None, help="site name from wjnaLocations.json (default the first)")
+    session.add_argument("--date", type=wjnaParseDate, default=datetime.date.today(), help="night, YYYY-MM-DD (default tonight)")
+    session.add_argument("--nights", type=int, default=1, help="outlook nights (default 1, no outlook)")
+    session.add_argument("--dst", action="store_true", help="use daylight savings time")
+    session.add_argument("--cache", default=None, help="session store file (default SessionCache in wjnaSettings.json, empty for none)")
+    session.set_defaults(function=wjnaCommandSession)
+
+    best = commands.add_parser("best", help="best nights of one site by moon-free darkness")
+    best.add_argument("--site", default=None, help="site name from wjnaLocations.json (default the first)")
+    best.add_argument("--start", type=wjnaParseDate, default=datetime.date.today(), help="first night, YYYY-MM-DD (default tonight)")
+    best.add_argument("--end", type=wjnaParseDate, default=None, help="last night, YYYY-MM-DD (default a year after the start)")
+    best.add_argument("--min-hours", type=float, default=0.0, help="minimum hours of moon-free darkness")
+    best.add_argument("--max-illumination", type=float, default=1.0, help="maximum moon illuminated fraction, 0 to 1")
+    best.add_argument("--weekends", action="store_true", help="Friday and Saturday nights only")
+    best.add_argument("--top", type=int, default=10, help="number of nights (default 10)")
+    best.add_argument("--dst", action="store_true", help="use daylight savings time")
+    best.set_defaults(function=wjnaCommandBest)
+
+    schedule = commands.add_parser("schedule", help="allocate darkness to imaging targets over a range of nights")
+    schedule.add_argument("targets", help="comma separated targets, such as M31,M42,NGC7000")
+    schedule.add_argument("--site", default=None, help="site name from wjnaLocations.json (default the first)")
+    schedule.add_argument("--start", type=wjnaParseDate, default=datetime.date.today(), help="first night, YYYY-MM-DD (default tonight)")
+    schedule.add_argument("--nights", type=int, default=30, help="number of nights (default 30)")
+    schedule.add_argument("--hours", type=float, default=4.0, help="hours wanted per target (default 4)")
+    schedule.add_argument("--min-altitude", type=float, default=30.0, help="minimum target altitude in degrees (default 30)")
+    schedule.add_argument("--min-separation", type=float, default=30.0, help="minimum moon separation in degrees (default 30)")
+    schedule.add_argument("--catalog", default="wjnaTargets.csv", help="target catalog (default wjnaTargets.csv)")
+    schedule.add_argument("--csv", default=None, help="write the plan to this CSV file")
+    schedule.add_argument("--dst", action="store_true", help="use daylight savings time")
+    schedule.set_defaults(function=wjnaCommandSchedule)
+
+    report = commands.add_parser("report", help="darkness of every night of a date range, streamed as CSV or JSON Lines")
+    report.add_argument("--site", default=None, help="site name from wjnaLocations.json (default the first)")
+    report.add_argument("--lat", type=float, default=None, help="latitude in degrees, north positive, instead of a named site")
+    report.add_argument("--lon", type=float, default=None, help="longitude in degrees, east positive, instead of a named site")
+    report.add_argument("--alt", type=float, default=0.0, help="altitude in meters with --lat and --lon (default 0)")
+    report.add_argument("--utc-offset", type=float, default=0.0, help="hours from UTC of local time with --lat and --lon (default 0)")
+    report.add_argument("--timezone", default="UTC", help="time zone name with --lat and --lon (default UTC)")
+    report.add_argument("--name", default="Custom", help="site name with --lat and --lon (default Custom)")
+    report.add_argument("--start", type=wjnaParseDate, default=datetime.date.today(), help="first night, YYYY-MM-DD (default tonight)")
+    span = report.add_mutually_exclusive_group()
+    span.add_argument("--end", type=wjnaParseDate, default=None, help="last night, YYYY-MM-DD")
+    span.add_argument("--nights", type=int, default=None, help="number of nights instead of --end (default 365)")
+    report.add_argument("--format", choices=["csv", "jsonl"], default="csv", help="output format (default csv)")
+    report.add_argument("--output", default=None, help="output file (default standard output)")
+    report.add_argument("--dst", action="store_true", help="use daylight savings time")
+    report.set_defaults(function=wjnaCommandReport)
+
+    ephemeris = commands.add_parser("ephemeris", help="build the precomputed Sun and Moon ephemeris table and moon phase catalog")
+    ephemeris.add_argument("--file", default="wjnaEphemeris.npy", help="table file (default wjnaEphemeris.npy)")
+    ephemeris.add_argument("--phases", default="wjnaPhases.npz", help="moon phase catalog file (default wjnaPhases.npz)")
+    ephemeris.add_argument("--start", type=int, default=2000, help="first year (default 2000)")
+    ephemeris.add_argument("--end", type=int, default=2050, help="last year (default 2050)")
+    ephemeris.add_argument("--step", type=float, default=1, help="step in hours (default 1)")
+    ephemeris.set_defaults(function=wjnaCommandEphemeris)
+    return parser
+
+def main(argv=None):
+    args = wjnaCommandLineParser().parse_args(argv)
+    args.function(args)
+    return
+
+if __name__ == "__main__":
+    main()
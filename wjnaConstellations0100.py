@@ -0,0 +1,107 @@
+#####################################################################################
+####    wjnaConstellations.py  Constellation Module
+####    Version 1, October 18, 2026
+####        Constellation of any position from the IAU constellation boundaries
+####        The boundaries wjnaConstellations.csv are from Roman 1987 (CDS catalog VI/42)
+####    William Neubert
+#####################################################################################
+
+__version__ = "1.00"
+__author__ = "William Neubert"
+
+# IMPORT MODULES
+import csv
+import math
+import numpy as np
+
+#  DEFINE GLOBAL CONSTANTS
+WA_J2000_JD = 2451545.0 # JULIAN DATE OF EPOCH J2000.0
+WA_B1875_JD = 2405889.258550475 # JULIAN DATE OF EPOCH B1875.0, THE EPOCH OF THE CONSTELLATION BOUNDARIES
+
+# IAU CONSTELLATION ABBREVIATIONS AND NAMES
+WA_CONSTELLATION_NAMES = {
+    "And": "Andromeda", "Ant": "Antlia", "Aps": "Apus", "Aqr": "Aquarius", "Aql": "Aquila", "Ara": "Ara",
+    "Ari": "Aries", "Aur": "Auriga", "Boo": "Bootes", "Cae": "Caelum", "Cam": "Camelopardalis", "Cnc": "Cancer",
+    "CVn": "Canes Venatici", "CMa": "Canis Major", "CMi": "Canis Minor", "Cap": "Capricornus", "Car": "Carina",
+    "Cas": "Cassiopeia", "Cen": "Centaurus", "Cep": "Cepheus", "Cet": "Cetus", "Cha": "Chamaeleon", "Cir": "Circinus",
+    "Col": "Columba", "Com": "Coma Berenices", "CrA": "Corona Australis", "CrB": "Corona Borealis", "Crv": "Corvus",
+    "Crt": "Crater", "Cru": "Crux", "Cyg": "Cygnus", "Del": "Delphinus", "Dor": "Dorado", "Dra": "Draco",
+    "Equ": "Equuleus", "Eri": "Eridanus", "For": "Fornax", "Gem": "Gemini", "Gru": "Grus", "Her": "Hercules",
+    "Hor": "Horologium", "Hya": "Hydra", "Hyi": "Hydrus", "Ind": "Indus", "Lac": "Lacerta", "Leo": "Leo",
+    "LMi": "Leo Minor", "Lep": "Lepus", "Lib": "Libra", "Lup": "Lupus", "Lyn": "Lynx", "Lyr": "Lyra",
+    "Men": "Mensa", "Mic": "Microscopium", "Mon": "Monoceros", "Mus": "Musca", "Nor": "Norma", "Oct": "Octans",
+    "Oph": "Ophiuchus", "Ori": "Orion", "Pav": "Pavo", "Peg": "Pegasus", "Per": "Perseus", "Phe": "Phoenix",
+    "Pic": "Pictor", "Psc": "Pisces", "PsA": "Piscis Austrinus", "Pup": "Puppis", "Pyx": "Pyxis", "Ret": "Reticulum",
+    "Sge": "Sagitta", "Sgr": "Sagittarius", "Sco": "Scorpius", "Scl": "Sculptor", "Sct": "Scutum", "Ser": "Serpens",
+    "Sex": "Sextans", "Tau": "Taurus", "Tel": "Telescopium", "Tri": "Triangulum", "TrA": "Triangulum Australe",
+    "Tuc": "Tucana", "UMa": "Ursa Major", "UMi": "Ursa Minor", "Vel": "Vela", "Vir": "Virgo", "Vol": "Volans",
+    "Vul": "Vulpecula"}
+
+#
+#  FUNCTIONS
+#
+def waPrecess(raIn, decIn, fromJDIn: float, toJDIn: float):
+    """Precesses arrays of RA and Dec in degrees from the equinox of one Julian date to another.
+    Rigorous method of Jean Meeus chapter 21, equations 21.2 to 21.4."""
+    T = (fromJDIn - WA_J2000_JD)/36525
+    t = (toJDIn - fromJDIn)/36525
+    zeta = math.radians(((2306.2181 + 1.39656 * T - 0.000139 * T * T) * t + (0.30188 - 0.000344 * T) * t * t + 0.017998 * t * t * t)/3600)
+    z = math.radians(((2306.2181 + 1.39656 * T - 0.000139 * T * T) * t + (1.09468 + 0.000066 * T) * t * t + 0.018203 * t * t * t)/3600)
+    theta = math.radians(((2004.3109 - 0.85330 * T - 0.000217 * T * T) * t - (0.42665 + 0.000217 * T) * t * t - 0.041833 * t * t * t)/3600)
+    ra = np.radians(raIn) + zeta; dec = np.radians(decIn)
+    A = np.cos(dec) * np.sin(ra)
+    B = math.cos(theta) * np.cos(dec) * np.cos(ra) - math.sin(theta) * np.sin(dec)
+    C = math.sin(theta) * np.cos(dec) * np.cos(ra) + math.cos(theta) * np.sin(dec)
+    return np.degrees(np.arctan2(A, B) + z) % 360, np.degrees(np.arcsin(np.clip(C, -1, 1)))
+
+#
+#  DEFINE CLASSES
+#
+class waConstellationIndex():
+    """IAU constellation boundaries compiled into a grid.  The boundaries run along lines of constant RA and Dec
+    of epoch B1875.0, so the distinct RA and Dec of the boundary rows split the sky into cells that each lie in
+    one constellation.  A lookup is two binary searches and one grid read for every position at once."""
+    def __init__(self, filenameIn: str = "wjnaConstellations.csv"):
+        self.filename = filenameIn
+        with open(filenameIn, "rt", newline="") as boundaryfile:
+            rows = list(csv.DictReader(boundaryfile))
+        raLow = np.array([float(row["RALow"]) for row in rows])
+        raHigh = np.array([float(row["RAHigh"]) for row in rows])
+        decLow = np.array([float(row["DecLow"]) for row in rows])
+        self.Abbreviation, code = np.unique([row["Constellation"] for row in rows], return_inverse=True)
+        self.Name = np.array([WA_CONSTELLATION_NAMES[abbreviation] for abbreviation in self.Abbreviation])
+        self.RAEdges = np.unique(np.concatenate((raLow, raHigh))) # HOURS
+        self.DecEdges = np.unique(decLow) # DEGREES
+        # THE FIRST BOUNDARY ROW, IN FILE ORDER, THAT HOLDS THE LOWER CORNER OF A CELL GIVES THE CONSTELLATION OF THE CELL
+        ra = self.RAEdges[:-1, np.newaxis]; dec = self.DecEdges[np.newaxis, :]
+        self.Grid = np.full((len(self.RAEdges) - 1, len(self.DecEdges)), -1, dtype=np.int8)
+        for row in range(len(rows) - 1, -1, -1):
+            inside = (raLow[row] <= ra) & (ra < raHigh[row]) & (dec >= decLow[row])
+            self.Grid[inside] = code[row]
+
+    def __len__(self):
+        return len(self.Abbreviation)
+
+    def Codes(self, raIn, decIn, epochJDIn: float = WA_J2000_JD):
+        """Indices into Abbreviation and Name of the constellations of arrays of RA and Dec in degrees of the
+        equinox of the Julian date epochJDIn (default J2000.0)."""
+        ra, dec = waPrecess(raIn, decIn, epochJDIn, WA_B1875_JD)
+        i = np.clip(np.searchsorted(self.RAEdges, ra / 15, side="right") - 1, 0, len(self.RAEdges) - 2)
+        j = np.clip(np.searchsorted(self.DecEdges, dec, side="right") - 1, 0, len(self.DecEdges) - 1)
+        return self.Grid[i, j]
+
+    def Lookup(self, raIn, decIn, epochJDIn: float = WA_J2000_JD):
+        """IAU abbreviations of the constellations of arrays of RA and Dec in degrees.  See Codes."""
+        return self.Abbreviation[self.Codes(raIn, decIn, epochJDIn)]
+
+# CONSTELLATION INDEX, LOADED FROM wjnaConstellations.csv ON FIRST USE
+waActiveConstellationIndex = None
+
+def waConstellations(raIn, decIn, epochJDIn: float = WA_J2000_JD, namesIn: bool = False):
+    """IAU abbreviations, or full names if namesIn is True, of the constellations of arrays of RA and Dec in degrees
+    of the equinox of the Julian date epochJDIn (default J2000.0)."""
+    global waActiveConstellationIndex
+    if waActiveConstellationIndex is None:
+        waActiveConstellationIndex = waConstellationIndex()
+    codes = waActiveConstellationIndex.Codes(raIn, decIn, epochJDIn)
+    return waActiveConstellationIndex.Name[codes] if namesIn else waActiveConstellationIndex.Abbreviation[codes]
@@ -0,0 +1,141 @@
+#####################################################################################
+####    wjnaProfiler.py  Timing Instrumentation
+####    Version 1, October 18, 2026
+####        Call counts and latency histograms of the key astrometry and display functions
+####        Enabled by the WJNA_PROFILE environment variable or "Profile" in wjnaSettings.json
+####        Functions are wrapped only when profiling is enabled, so it costs nothing otherwise
+####    William Neubert
+#####################################################################################
+
+__version__ = "1.00"
+__author__ = "William Neubert"
+
+# IMPORT MODULES
+import bisect
+import functools
+import json
+import os
+import time
+
+#  DEFINE GLOBAL CONSTANTS
+WA_PROFILE_ENVIRONMENT = "WJNA_PROFILE" # SET TO 1 TO PROFILE, OR TO 0 TO OVERRIDE THE SETTING
+WA_PROFILE_FILE = "wjnaProfile.json"
+WA_PROFILE_BUCKETS_MS = [0.1, 1, 10, 100, 1000] # UPPER EDGES OF THE LATENCY HISTOGRAM BUCKETS, THE LAST BUCKET IS OPEN
+
+# ASTROMETRY FUNCTIONS TIMED BY waProfileAstrometry, AS CLASS OR NONE FOR A MODULE FUNCTION, AND NAME
+WA_PROFILE_ASTROMETRY_TARGETS = [("waSession", "__init__"), ("waSession", "GetEvents"), ("waSkyObject", "GetEvents"),
+    ("waSun", "GetEvents"), ("waPlanet", "GetEvents"), ("waMoon", "GetPosition3"), ("waMoon", "GetPhases"),
+    ("waOutlookWindow", "Nights"), (None, "waNightAltitudeCurves"), (None, "waDarknessWindows"), (None, "waPlanetVisibility")]
+
+#
+#  DEFINE CLASSES
+#
+class waProfileStatistics():
+    """Call count, total and largest time, and latency histogram of one timed function or section of code."""
+    def __init__(self):
+        self.Count = 0
+        self.Total = 0.0 # SECONDS
+        self.Max = 0.0 # SECONDS
+        self.Histogram = [0] * (len(WA_PROFILE_BUCKETS_MS) + 1)
+
+    def Add(self, secondsIn: float):
+        self.Count += 1
+        self.Total += secondsIn
+        self.Max = max(self.Max, secondsIn)
+        self.Histogram[bisect.bisect_left(WA_PROFILE_BUCKETS_MS, 1000*secondsIn)] += 1
+
+    def Summary(self):
+        """Dictionary of the statistics in milliseconds with the histogram keyed by bucket."""
+        labels = ["<{}ms".format(edge) for edge in WA_PROFILE_BUCKETS_MS] + [">={}ms".format(WA_PROFILE_BUCKETS_MS[-1])]
+        return {"Count": self.Count, "Total ms": 1000*self.Total, "Mean ms": 1000*self.Total/self.Count if self.Count else 0.0,
+                "Max ms": 1000*self.Max, "Histogram": dict(zip(labels, self.Histogram))}
+
+class waProfiler():
+    """Statistics of timed functions and sections by name."""
+    def __init__(self):
+        self.Statistics = {}
+        self.Started = time.time()
+
+    def Record(self, nameIn: str, secondsIn: float):
+        statistics = self.Statistics.get(nameIn)
+        if statistics is None:
+            statistics = self.Statistics[nameIn] = waProfileStatistics()
+        statistics.Add(secondsIn)
+
+    def Timed(self, functionIn, nameIn: str):
+        """Wraps a function so every call is recorded under nameIn, including calls that raise."""
+        @functools.wraps(functionIn)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return functionIn(*args, **kwargs)
+            finally:
+                self.Record(nameIn, time.perf_counter() - start)
+        timed.waProfiled = True
+        return timed
+
+    def Summary(self):
+        """Statistics of every name, slowest total first."""
+        return {name: statistics.Summary() for name, statistics in
+                sorted(self.Statistics.items(), key=lambda item: item[1].Total, reverse=True)}
+
+    def Rows(self):
+        """Table rows of name, calls, mean, max and total milliseconds and the histogram counts."""
+        return [[name, summary["Count"], "{:.2f}".format(summary["Mean ms"]), "{:.2f}".format(summary["Max ms"]),
+                 "{:.0f}".format(summary["Total ms"]), " ".join(str(count) for count in summary["Histogram"].values())]
+                for name, summary in self.Summary().items()]
+
+    def Save(self, filenameIn: str = WA_PROFILE_FILE):
+        with open(filenameIn, "wt") as profilefile:
+            json.dump({"Started": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.Started)),
+                       "Saved": time.strftime("%Y-%m-%d %H:%M:%S"), "Buckets ms": WA_PROFILE_BUCKETS_MS,
+                       "Functions": self.Summary()}, profilefile, indent=1)
+        return
+
+#
+#  FUNCTIONS
+#
+# ACTIVE PROFILER, OR NONE WHEN PROFILING IS DISABLED
+waActiveProfiler = None
+
+def waProfilingRequested(settingsIn: dict = None):
+    """True if the WJNA_PROFILE environment variable is set to anything but 0, or if it is unset and
+    "Profile" is true in the settings."""
+    environment = os.environ.get(WA_PROFILE_ENVIRONMENT, "").strip().lower()
+    if environment:
+        return environment not in ("0", "false", "no", "off")
+    return bool(settingsIn.get("Profile", False)) if settingsIn else False
+
+def waEnableProfiling():
+    """Starts profiling and returns the active profiler."""
+    global waActiveProfiler
+    if waActiveProfiler is None:
+        waActiveProfiler = waProfiler()
+    return waActiveProfiler
+
+def waInstrument(ownerIn, nameIn: str, labelIn: str = None):
+    """Replaces the function nameIn of a class or module with a timed wrapper.  Does nothing unless profiling is
+    enabled, or if the function is already timed.  Only the owner's own attribute is wrapped, so a subclass that
+    inherits the function is timed under the name of the base class."""
+    if waActiveProfiler is None or nameIn not in vars(ownerIn):
+        return
+    function = vars(ownerIn)[nameIn]
+    if getattr(function, "waProfiled", False):
+        return
+    label = labelIn if labelIn is not None else ("{}.{}".format(ownerIn.__name__, nameIn) if isinstance(ownerIn, type) else nameIn)
+    setattr(ownerIn, nameIn, waActiveProfiler.Timed(function, label))
+    return
+
+def waProfileAstrometry(astrometryIn):
+    """Times the functions of WA_PROFILE_ASTROMETRY_TARGETS in the astrometry module astrometryIn."""
+    for className, name in WA_PROFILE_ASTROMETRY_TARGETS:
+        owner = astrometryIn if className is None else getattr(astrometryIn, className, None)
+        if owner is not None:
+            waInstrument(owner, name)
+    return
+
+def waRecordSince(nameIn: str, startIn: float):
+    """Records the time since the time.perf_counter value startIn under nameIn, if profiling is enabled."""
+    if waActiveProfiler is not None:
+        waActiveProfiler.Record(nameIn, time.perf_counter() - startIn)
+    return
@@ -0,0 +1,181 @@
+#####################################################################################
+####    wjnaSessionCore.py  Darkness Session Core
+####    Version 1, October 18, 2026
+####        Settings, session store, outlook and table data of the darkness clock without any display
+####        Importing it reads no files and touches no hardware;  wjnaStartCore loads the settings
+####    William Neubert
+#####################################################################################
+
+__version__ = "1.00"
+__author__ = "William Neubert"
+
+# IMPORT MODULES
+import datetime
+import numpy as np
+import sys
+import wjnaAstrometry0200 as wa
+import wjnaTargets0100 as wt
+import wjnaProfiler0100 as wp
+
+#####################################################################################
+####  STATE, SET BY wjnaStartCore
+#####################################################################################
+Configuration = None
+LocationList = []
+wjnaGlobalConfig = {"GPSTimeOffset":False, "GPSTimeOffsetValue":datetime.timedelta(seconds=0.0)}
+sessionStore = None
+outlookWindow = None
+waActiveTargetCatalog = None # LOADED FROM wjnaTargets.csv ON FIRST USE
+
+#
+#  FUNCTIONS
+#
+def wjnaStartCore():
+    """Loads the settings and sites, opens the session store and outlook, and starts profiling if it is asked for.
+    Only the first call does the work, so every part of a program can call it.  Returns the settings and sites."""
+    global Configuration, LocationList, sessionStore, outlookWindow
+    if Configuration is not None:
+        return Configuration, LocationList
+    Configuration, LocationList = wa.wjnaLoadSettings()
+    # TIMING OF THE KEY FUNCTIONS, ONLY WHEN ASKED FOR BY WJNA_PROFILE OR "Profile" IN THE SETTINGS
+    if wp.waProfilingRequested(Configuration):
+        wp.waEnableProfiling()
+        wp.waProfileAstrometry(wa)
+        for name in ["waStartSession", "waGenerateMultidayLayout", "waGeneratePlanetsLayout", "waGenerateTargetsLayout"]:
+            wp.waInstrument(sys.modules[__name__], name)
+    # RESULTS OF NIGHTS ALREADY COMPUTED ARE KEPT ON DISK SO A COLD START SHOWS THEM IMMEDIATELY
+    sessionStore = wa.waSessionStore(Configuration["SessionCache"]) if Configuration.get("SessionCache") else None
+    outlookWindow = wa.waOutlookWindow(Configuration.get("OutlookNights", 7), storeIn=sessionStore)
+    return Configuration, LocationList
+
+def wjnaTargetCatalog():
+    """The target catalog, loaded from wjnaTargets.csv on first use."""
+    global waActiveTargetCatalog
+    if waActiveTargetCatalog is None:
+        waActiveTargetCatalog = wt.waTargetCatalog("wjnaTargets.csv")
+    return waActiveTargetCatalog
+
+def waTimeNow():
+   """This return the current time, using the system time, plus an application defined offset.
+   This is useful for use when the system does not have a real time clock, and having a GPS reference time."""
+   wTimeNow = datetime.datetime.now()
+   if wjnaGlobalConfig["GPSTimeOffset"] == True:
+       wTimeNow += wjnaGlobalConfig["GPSTimeOffsetValue"]
+   return wTimeNow
+
+def waNewSession(dateIn: datetime.datetime, locationIn: wa.waObserverLocation):
+  """Session for the date, read from the session store when it has been computed before."""
+  if sessionStore is not None:
+    return sessionStore.Session(dateIn, locationIn)
+  return wa.waSession(dateIn, locationIn)
+
+def waStartSession(startDateIn: datetime.datetime, locationIn: wa.waObserverLocation): # FROM THE SELECTED START DATE DETERMIN THE SESSION START DATE
+  session = waNewSession(startDateIn, locationIn)
+  #sessionEvents = session.Events
+  if startDateIn.hour < 12  and startDateIn < session.Sun1.Events["Rise"]:
+    startDateIn = startDateIn - datetime.timedelta(days=1)
+    session = waNewSession(startDateIn, locationIn)
+    print("Session start date reset to the previous evening")
+  return session
+
+def waPrintSessionText(sessionIn: wa.waSession, versionIn: str = __version__):
+    print(">>> ASTRONOMICAL OBERVING SESSION <<<")
+    print(versionIn)
+    print("Astrometry engine ",wa.__version__)
+    print(sessionIn.Site)
+    # sessionDateSelected = sessionIn.SessionTime0
+    sessionEvents = sessionIn.Events
+
+    print("\n>> Start Date At Midnight")
+    print("Local Time: "+sessionIn.SessionTime0.date.isoformat())
+    print("UTC: ",sessionIn.SessionTime0.utc)
+    print("JD: ",sessionIn.SessionTime0.JD())
+    print("LST: "+wa.waHtoHMS(sessionIn.SessionTime0.LocalSiderealTime())," (" + wa.waMeridianEclipticalConstellation(sessionIn.SessionTime0.LocalSiderealTime())[0] + ")")
+
+    # SUN
+    #skyPosition1 = waSkyPosition(0,0)
+    print("\n>> "+sessionIn.Sun1.name)
+    print(sessionIn.Sun1.SkyPosition, sessionIn.Sun1.SkyPosition.EclipticConstellation[0])
+    print("Geocentric:   ",wa.waDtoHMS(sessionIn.Sun1.SkyPosition.ra), wa.waDtoDMS(sessionIn.Sun1.SkyPosition.dec))
+    print("Topocentric:  ",wa.waDtoHMS(sessionIn.Sun1.SkyPositionTopocentric.ra), wa.waDtoDMS(sessionIn.Sun1.SkyPositionTopocentric.dec))
+    print("Sunset: ",wa.waFormatTime(sessionEvents["Sunset"]), "  Dusk: ",wa.waFormatTime(sessionEvents["Dusk"]))
+    print("Morning Twilight: ",wa.waFormatTime(sessionEvents["Dawn"]), "  Sunrise: ",wa.waFormatTime(sessionEvents["Sunrise"]))
+
+    #MOON
+    moon1 = sessionIn.Moon1
+    print("\n>> "+moon1.name," at start date midnight")
+    print("Geocentric:   ",wa.waDtoHMS(moon1.SkyPosition.ra), " ", wa.waDtoDMS(moon1.SkyPosition.dec), moon1.SkyPosition.EclipticConstellation[0])
+    print("Topocentric:  ",wa.waDtoHMS(moon1.SkyPositionTopocentric.ra), " ", wa.waDtoDMS(moon1.SkyPositionTopocentric.dec), moon1.SkyPosition.EclipticConstellation[0])
+    print("Illumination:  {0:.0f}%".format(100*moon1.IlluminatedFraction))
+    sessionMoonEvents = moon1.Events
+    print("Rise: ",sessionMoonEvents["Rise"].strftime("%H:%M"), "  Set: ",sessionMoonEvents["Set"].strftime("%H:%M"))
+    print(sessionMoonEvents["Description"])
+    moon2 = sessionIn.Moon2
+    print("\n>> "+moon2.name," at end date midnight")
+    # print(wa.waDtoHMS(moon2.SkyPosition.ra), " ", wa.waDtoDMS(moon2.SkyPosition.dec), moon2.SkyPosition.EclipticConstellation[0])
+    print("Geocentric:   ",wa.waDtoHMS(moon2.SkyPosition.ra), " ", wa.waDtoDMS(moon2.SkyPosition.dec), moon2.SkyPosition.EclipticConstellation[0])
+    print("Topocentric:  ",wa.waDtoHMS(moon2.SkyPositionTopocentric.ra), " ", wa.waDtoDMS(moon2.SkyPositionTopocentric.dec), moon2.SkyPosition.EclipticConstellation[0])
+    print("Illumination:  {0:.0f}%".format(100*moon2.IlluminatedFraction))
+    sessionMoonEvents2 = moon2.Events
+    print("Rise: ",sessionMoonEvents2["Rise"].strftime("%H:%M"), "  Set: ",sessionMoonEvents2["Set"].strftime("%H:%M"))
+    print(sessionMoonEvents2["Description"])
+
+
+    durationText = wa.waDecimalToDHMS(sessionEvents["Duration"],24,"HM")
+    print("Duration of Darkness: ",durationText)
+    return
+
+def waSessionNextDay(sessionIn: wa.waSession):
+  # DETERMINE IF SESSION NEEDS TO ADVANCE TO THE NEXT DAY
+  # WITHOUT A SUNRISE THE SESSION ENDS AT NOON OF THE NEXT DAY
+  sunrise = sessionIn.Events["Sunrise"] if sessionIn.Events["Sunrise"] is not None else sessionIn.SessionTime2.date
+  if datetime.datetime.now() > sunrise:
+    update = True
+  else:
+    update = False
+  return update
+
+def waGenerateMultidayLayout(sessionDateIn: wa.waSessionTime, locationIn: wa.waObserverLocation):
+    """Creates darkness duration data for multiple days."""
+    tableEvents = []
+    # NIGHTS ALREADY COMPUTED FOR THIS SITE ARE REUSED, SO ONLY NEWLY EXPOSED NIGHTS COST ANYTHING
+    for night in outlookWindow.Nights(sessionDateIn, locationIn):
+        tableEvents.append([
+           night["Date"].strftime("%Y-%m-%d %a"),
+           night["Darkness from"].strftime("%H:%M"),
+           night["Darkness to"].strftime("%H:%M"),
+           wa.waDecimalToDHMS(night["Duration"],24,"HM"),
+           "{0:}  {1:.0f}%".format(night["MoonConstellation"], 100*night["Illumination"])
+           ])
+
+    return tableEvents
+
+def waGenerateTargetsLayout(sessionIn: wa.waSession, minimumAltitudeIn: float = 30.0, countIn: int = 15):
+    """Creates the table of the targets longest above the minimum altitude during the darkness."""
+    targetCatalog = wjnaTargetCatalog()
+    visibility = wt.waTargetVisibility(targetCatalog, sessionIn, minimumAltitudeIn)
+    tableTargets = []
+    for i in visibility["Order"][:countIn]:
+        transit = visibility["Transit"][i].astype(datetime.datetime)
+        tableTargets.append([
+           targetCatalog.Label(i), targetCatalog.CommonName[i], targetCatalog.Type[i],
+           "" if np.isnan(targetCatalog.Magnitude[i]) else "{:.1f}".format(targetCatalog.Magnitude[i]),
+           wa.waDecimalToDHMS(visibility["Minutes"][i]/60,24,"HM"),
+           "{:.0f}".format(visibility["MaximumAltitude"][i]),
+           transit.strftime("%H:%M")
+           ])
+    return tableTargets
+
+def waGeneratePlanetsLayout(sessionIn: wa.waSession):
+    """Creates the table of rise, transit, set and dark sky visibility of each planet on the session night."""
+    tablePlanets = []
+    for name, visibility in sessionIn.Planets.items():
+        times = [("--" if np.isnat(visibility[event][0]) else visibility[event][0].astype(datetime.datetime).strftime("%H:%M"))
+                 for event in ("Rise", "Transit", "Set")]
+        tablePlanets.append([name] + times + [
+           "--" if np.isnan(visibility["MaximumAltitude"][0]) else "{:.0f}".format(visibility["MaximumAltitude"][0]),
+           wa.waDecimalToDHMS(visibility["Hours"][0],24,"HM"),
+           "{:.0f}".format(visibility["Elongation"][0]),
+           str(visibility["Constellation"][0])
+           ])
+    return tablePlanets
@@ -0,0 +1,214 @@
+#####################################################################################
+####    wjnaTargets.py  Deep Sky Target Module
+####    Version 1, October 18, 2026
+####        Visibility of catalog targets during the darkness of a session
+####        The catalog wjnaTargets.csv holds the Messier objects and the NGC and IC objects
+####        to magnitude 12, from the OpenNGC database by Mattia Verga (CC-BY-SA-4.0)
+####    William Neubert
+#####################################################################################
+
+__version__ = "1.00"
+__author__ = "William Neubert"
+
+# IMPORT MODULES
+import csv
+import datetime
+import math
+import numpy as np
+import wjnaAstrometry0200 as wa
+
+#  DEFINE GLOBAL CONSTANTS
+WA_SIDEREAL_RATE = 1.00273790935 # SIDEREAL HOURS PER SOLAR HOUR
+WA_TARGET_HORIZON = -0.5667 # ALTITUDE OF A POINT SOURCE AT RISE AND SET, ALLOWING FOR REFRACTION
+
+#
+#  CLASSES
+#
+class waTargetCatalog():
+    """Deep sky targets read from a CSV file with the columns Name, Messier, Type, RA, Dec (J2000 degrees),
+    Magnitude, Size (arcminutes), Constellation and CommonName.  Each column is held as an array.
+    An index of the targets sorted by RA answers which targets are near a given hour angle."""
+    def __init__(self, filenameIn: str = "wjnaTargets.csv"):
+        self.filename = filenameIn
+        with open(filenameIn, "rt", newline="") as catalogfile:
+            rows = list(csv.DictReader(catalogfile))
+        for column in ["Name", "Messier", "Type", "Constellation", "CommonName"]:
+            setattr(self, column, np.array([row[column] for row in rows]))
+        for column in ["RA", "Dec", "Magnitude", "Size"]:
+            setattr(self, column, np.array([float(row[column]) if row[column] else np.nan for row in rows]))
+        # RA INDEX
+        self.RAOrder = np.argsort(self.RA, kind="stable")
+        self.RASorted = self.RA[self.RAOrder]
+
+    def __len__(self):
+        return len(self.Name)
+
+    def Label(self, indexIn: int):
+        """Messier number if there is one, otherwise the catalog name."""
+        return str(self.Messier[indexIn] or self.Name[indexIn])
+
+    def Find(self, namesIn: list):
+        """Indices of targets given by Messier number or catalog name, such as M31 or NGC7000."""
+        labels = {}
+        for i in range(len(self.Name)):
+            labels[str(self.Name[i]).upper()] = i
+            if self.Messier[i]:
+                labels[str(self.Messier[i]).upper()] = i
+        indices = []
+        for name in namesIn:
+            key = name.strip().upper().replace(" ", "")
+            if key not in labels and (key[:3] == "NGC" or key[:2] == "IC"):
+                prefix = "IC" if key.startswith("IC") else "NGC"
+                key = prefix + key[len(prefix):].zfill(4) # CATALOG NAMES ARE ZERO PADDED, AS NGC0224
+            if key not in labels:
+                raise ValueError("Target {} is not in the catalog".format(name))
+            indices.append(labels[key])
+        return np.array(indices, dtype=int)
+
+    def NearRA(self, raIn: float, halfWidthIn: float):
+        """Indices of targets with RA within halfWidthIn degrees of raIn, by binary search in the RA index."""
+        low = (raIn - halfWidthIn) % 360; high = (raIn + halfWidthIn) % 360
+        first = np.searchsorted(self.RASorted, low, side="left")
+        last = np.searchsorted(self.RASorted, high, side="right")
+        if halfWidthIn >= 180:
+            return self.RAOrder.copy()
+        if low <= high:
+            return self.RAOrder[first:last]
+        return np.concatenate((self.RAOrder[first:], self.RAOrder[:last])) # THE RANGE WRAPS THROUGH 0 DEGREES
+
+    def NearMeridian(self, sessionTimeIn: wa.waSessionTime, halfWidthHoursIn: float = 1.0, minimumAltitudeIn: float = 0.0):
+        """Indices of targets within halfWidthHoursIn hours of the meridian at the session time that transit above
+        minimumAltitudeIn degrees, in order of hour angle."""
+        lst = sessionTimeIn.LocalSiderealTime()
+        near = self.NearRA(15 * lst, 15 * halfWidthHoursIn)
+        latitude = sessionTimeIn.location.EarthPosition.latitude
+        near = near[90 - np.abs(latitude - self.Dec[near]) >= minimumAltitudeIn] # ALTITUDE AT TRANSIT
+        hourAngle = (15 * lst - self.RA[near] + 180) % 360 - 180
+        return near[np.argsort(hourAngle)]
+
+#
+#  FUNCTIONS
+#
+def waSineAltitudes(raIn, decIn, lstIn, latitudeIn: float):
+    """Sine of the altitude for every target (rows) at every local sidereal time in hours (columns).
+    sin(phi) sin(dec) + cos(phi) cos(dec) cos(LST - RA) is evaluated with the cosine expanded, so the matrix is one
+    matrix product and no trigonometry is evaluated per element."""
+    phi = wa.waRadians(latitudeIn); ra = np.radians(raIn); dec = np.radians(decIn)
+    lstRadians = np.radians(15 * np.asarray(lstIn))
+    b = math.cos(phi) * np.cos(dec)
+    return (math.sin(phi) * np.sin(dec))[:, np.newaxis] + \
+        np.column_stack((b * np.cos(ra), b * np.sin(ra))) @ np.vstack((np.cos(lstRadians), np.sin(lstRadians)))
+
+def waCosineSeparations(raIn, decIn, raOtherIn, decOtherIn):
+    """Cosine of the angular separation of every target (rows) from a moving position (columns)."""
+    ra = np.radians(raIn); dec = np.radians(decIn)
+    raOther = np.radians(raOtherIn); decOther = np.radians(decOtherIn)
+    return np.sin(dec)[:, np.newaxis] * np.sin(decOther) + np.column_stack((np.cos(dec) * np.cos(ra), np.cos(dec) * np.sin(ra))) @ \
+        np.vstack((np.cos(decOther) * np.cos(raOther), np.cos(decOther) * np.sin(raOther)))
+
+def waTargetVisibility(catalogIn: waTargetCatalog, sessionIn: wa.waSession, minimumAltitudeIn: float = 30.0, stepMinutesIn: float = 5.0):
+    """Visibility of every target during the darkness of the session, from waSession.Events Darkness from and to.
+    Altitudes are evaluated as one target by time matrix every stepMinutesIn minutes.  Returns a dictionary of
+    arrays with one entry per target:  Rise, Transit and Set (local datetime64 nearest the darkness, NaT if the
+    target never rises or never sets), MaximumAltitude in degrees during darkness and Minutes above minimumAltitudeIn,
+    and Order, the target indices ranked by minutes above the altitude and then by maximum altitude."""
+    site = sessionIn.Site
+    latitude = site.EarthPosition.latitude
+    start = np.datetime64(sessionIn.Events["Darkness from"],"us"); end = np.datetime64(sessionIn.Events["Darkness to"],"us")
+    step = np.timedelta64(int(round(stepMinutesIn * 60000000)),"us")
+    times = np.arange(start, end, step) if end > start else np.array([start])
+    lst = wa.waLocalSiderealTimes(wa.waBatchJulianDates(times, site), site.EarthPosition.longitude)
+    sinAltitude = waSineAltitudes(catalogIn.RA, catalogIn.Dec, lst, latitude)
+    minutes = np.count_nonzero(sinAltitude >= math.sin(wa.waRadians(minimumAltitudeIn)), axis=1) * stepMinutesIn if end > start else np.zeros(len(catalogIn))
+    maximumAltitude = np.degrees(np.arcsin(np.clip(sinAltitude.max(axis=1), -1, 1)))
+
+    # TRANSIT NEAREST THE MIDDLE OF THE DARKNESS, THEN RISE AND SET FROM THE HOUR ANGLE AT THE HORIZON
+    middle = start + (end - start) / 2 if end > start else start
+    lstMiddle = wa.waLocalSiderealTimes(wa.waBatchJulianDates(np.array([middle]), site), site.EarthPosition.longitude)[0]
+    hourAngle = (15 * lstMiddle - catalogIn.RA + 180) % 360 - 180 # DEGREES
+    phi = wa.waRadians(latitude); dec = np.radians(catalogIn.Dec)
+    with np.errstate(invalid="ignore"):
+        H0 = np.degrees(np.arccos((math.sin(wa.waRadians(WA_TARGET_HORIZON)) - math.sin(phi) * np.sin(dec)) / (math.cos(phi) * np.cos(dec))))
+    toMicroseconds = 3600000000 / (15 * WA_SIDEREAL_RATE) # MICROSECONDS OF SOLAR TIME PER DEGREE OF HOUR ANGLE
+    transit = middle - np.round(hourAngle * toMicroseconds).astype("timedelta64[us]")
+    offset = np.round(np.nan_to_num(H0) * toMicroseconds).astype("timedelta64[us]")
+    events = np.isfinite(H0) # TARGETS THAT ARE CIRCUMPOLAR OR NEVER RISE HAVE NO RISE OR SET
+    nat = np.datetime64("NaT","us")
+    return {"Rise": np.where(events, transit - offset, nat), "Transit": transit, "Set": np.where(events, transit + offset, nat),
+            "MaximumAltitude": maximumAltitude, "Minutes": minutes,
+            "Order": np.lexsort((-maximumAltitude, -minutes))}
+
+def waScheduleTargets(catalogIn: waTargetCatalog, targetsIn, startDateIn: datetime.date, nightsIn: int, siteIn: wa.waObserverLocation,
+                      hoursPerTargetIn: float = 4.0, minimumAltitudeIn: float = 30.0, minimumMoonSeparationIn: float = 30.0, slotMinutesIn: float = 10.0,
+                      minimumBlockMinutesIn: float = 60.0):
+    """Allocates the astronomical darkness of a range of nights to targets, up to hoursPerTargetIn hours each.
+    The darkness, when the sun is below -18 degrees, comes from waDarknessWindows and is divided into slots of
+    slotMinutesIn minutes.  A target is usable in a slot if it is above minimumAltitudeIn and the moon is below the
+    horizon or at least minimumMoonSeparationIn degrees away.  The visibility of all targets in all slots is one
+    boolean matrix.  Targets with the fewest usable slots are served first.  Each takes runs of consecutive usable
+    free slots, those the fewest other targets still need first, in blocks of at least minimumBlockMinutesIn minutes
+    unless less time is still wanted;  a second pass then allows shorter blocks.  Consecutive slots of a target form one block.
+    Returns a dictionary of arrays with one entry per block:  Night, Target (catalog index), Start, End (local
+    datetime64) and Minutes."""
+    targets = np.asarray(targetsIn, dtype=int)
+    slot = np.timedelta64(int(round(slotMinutesIn * 60000000)),"us")
+    # ASTRONOMICAL DARKNESS, IGNORING THE MOON, CUT INTO SLOTS
+    windows = wa.waDarknessWindows(startDateIn, nightsIn, siteIn, moonAltitudeIn=90.0)
+    counts = ((windows["Darkness to"] - windows["Darkness from"]) // slot).astype(int)
+    window = np.repeat(np.arange(len(counts)), counts)
+    position = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    starts = windows["Darkness from"][window] + position * slot
+    jd = wa.waBatchJulianDates(starts + slot / 2, siteIn)
+
+    # VISIBILITY MATRIX, TARGETS BY SLOTS
+    lst = wa.waLocalSiderealTimes(jd, siteIn.EarthPosition.longitude)
+    sinAltitude = waSineAltitudes(catalogIn.RA[targets], catalogIn.Dec[targets], lst, siteIn.EarthPosition.latitude)
+    moon = wa.waMoonPositionBatch(jd)
+    moonDown = wa.waBodyHorizontalCoordinates("Moon", jd, siteIn)[0] < wa.WA_ALTITUDE_THRESHOLDS["Horizon"]
+    moonClear = waCosineSeparations(catalogIn.RA[targets], catalogIn.Dec[targets], moon["ra"], moon["dec"]) <= math.cos(wa.waRadians(minimumMoonSeparationIn))
+    usable = (sinAltitude >= math.sin(wa.waRadians(minimumAltitudeIn))) & (moonDown[np.newaxis, :] | moonClear)
+
+    # GREEDY ALLOCATION IN RUNS OF CONSECUTIVE FREE SLOTS
+    assigned = np.full(len(starts), -1)
+    remaining = np.full(len(targets), int(round(hoursPerTargetIn * 60 / slotMinutesIn)))
+    minimumBlock = max(1, int(round(minimumBlockMinutesIn / slotMinutesIn)))
+    for blockMinimum in (minimumBlock, 1): # A SECOND PASS FILLS SHORTER GAPS FOR TARGETS STILL SHORT OF TIME
+        for t in np.argsort(usable.sum(axis=1), kind="stable"):
+            free = usable[t] & (assigned < 0)
+            if remaining[t] <= 0 or not free.any():
+                continue
+            demand = usable[remaining > 0].sum(axis=0) # TARGETS STILL WANTING EACH SLOT
+            runStart = free.copy()
+            runStart[1:] &= ~free[:-1] | (window[1:] != window[:-1]) | (position[1:] != position[:-1] + 1)
+            run = np.cumsum(runStart) - 1
+            first = np.flatnonzero(runStart)
+            length = np.bincount(run[free], minlength=len(first))
+            meanDemand = np.bincount(run[free], weights=demand[free], minlength=len(first)) / length
+            for r in np.lexsort((-length, meanDemand)): # LEAST CONTESTED RUNS FIRST, THEN LONGEST
+                if remaining[t] <= 0:
+                    break
+                if length[r] < min(blockMinimum, remaining[t]):
+                    continue
+                take = min(length[r], remaining[t])
+                assigned[first[r]:first[r] + take] = t
+                remaining[t] -= take
+
+    # CONSECUTIVE SLOTS OF THE SAME TARGET IN THE SAME WINDOW BECOME ONE BLOCK
+    used = np.flatnonzero(assigned >= 0)
+    newBlock = np.ones(len(used), dtype=bool)
+    newBlock[1:] = (assigned[used[1:]] != assigned[used[:-1]]) | (window[used[1:]] != window[used[:-1]]) | (used[1:] != used[:-1] + 1)
+    first = used[newBlock]
+    last = used[np.append(np.flatnonzero(newBlock)[1:] - 1, len(used) - 1)] if len(used) else used
+    return {"Night": windows["Night"][window[first]], "Target": targets[assigned[first]],
+            "Start": starts[first], "End": starts[last] + slot,
+            "Minutes": (last - first + 1) * slotMinutesIn}
+
+def waScheduleToCSV(catalogIn: waTargetCatalog, scheduleIn: dict, filenameIn: str):
+    """Writes the plan of waScheduleTargets as a CSV file with one row per block."""
+    with open(filenameIn, "wt", newline="") as schedulefile:
+        writer = csv.writer(schedulefile)
+        writer.writerow(["Night", "Target", "Name", "Start", "End", "Minutes"])
+        for night, target, start, end, minutes in zip(scheduleIn["Night"], scheduleIn["Target"], scheduleIn["Start"], scheduleIn["End"], scheduleIn["Minutes"]):
+            writer.writerow([str(night), catalogIn.Label(target), catalogIn.CommonName[target],
+                             start.astype(datetime.datetime).strftime("%Y-%m-%d %H:%M"), end.astype(datetime.datetime).strftime("%Y-%m-%d %H:%M"), int(minutes)])
+    return